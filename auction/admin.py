@@ -1,8 +1,18 @@
 # auction/admin.py
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
+from django.db import transaction
 from django.utils.html import format_html
-from .models import User, Team, Player, AuctionSession, Bid, AuctionLog, PaddleRaise
+from . import journal
+from .engine import invalidate_engines
+from .models import User, Team, Player, AuctionSession, Bid, AuctionLog, PaddleRaise, AuctionEvent
+
+
+def _teams_changed(team_ids):
+    """Journal teams edited here; live engines reload them once committed"""
+    journal.record_teams(team_ids)
+    transaction.on_commit(invalidate_engines)
+
 
 @admin.register(User)
 class UserAdmin(BaseUserAdmin):
@@ -40,6 +50,16 @@ class UserAdmin(BaseUserAdmin):
             return format_html('<img src="{}" width="50" height="50" style="border-radius: 50%; object-fit: cover;" />', obj.profile_picture.url)
         return '-'
     profile_pic_display.short_description = 'Profile Picture'
+    
+    def delete_model(self, request, obj):
+        team_ids = list(Team.objects.of_users([obj]).values_list('id', flat=True))
+        super().delete_model(request, obj)
+        _teams_changed(team_ids)
+    
+    def delete_queryset(self, request, queryset):
+        team_ids = list(Team.objects.of_users(queryset).values_list('id', flat=True))
+        super().delete_queryset(request, queryset)
+        _teams_changed(team_ids)
 
 @admin.register(Team)
 class TeamAdmin(admin.ModelAdmin):
@@ -72,6 +92,20 @@ class TeamAdmin(admin.ModelAdmin):
     def slots_remaining(self, obj):
         return f"{obj.slots_remaining()}/{obj.max_players}"
     slots_remaining.short_description = 'Slots Remaining'
+    
+    def save_model(self, request, obj, form, change):
+        super().save_model(request, obj, form, change)
+        _teams_changed([obj.id])
+    
+    def delete_model(self, request, obj):
+        team_id = obj.id
+        super().delete_model(request, obj)
+        _teams_changed([team_id])
+    
+    def delete_queryset(self, request, queryset):
+        team_ids = list(queryset.values_list('id', flat=True))
+        super().delete_queryset(request, queryset)
+        _teams_changed(team_ids)
 
 @admin.register(Player)
 class PlayerAdmin(admin.ModelAdmin):
@@ -125,9 +159,27 @@ class PlayerAdmin(admin.ModelAdmin):
     reject_players.short_description = "Reject selected players"
     
     def reset_players(self, request, queryset):
+        team_ids = list(queryset.values_list('team_id', flat=True))
         updated = queryset.update(status='approved', current_bid=0, team=None)
+        _teams_changed(team_ids)
         self.message_user(request, f'{updated} player(s) reset to available status.')
     reset_players.short_description = "Reset players (set to approved, remove team)"
+    
+    def save_model(self, request, obj, form, change):
+        previous_team_id = Player.objects.filter(pk=obj.pk).values_list('team_id', flat=True).first()
+        super().save_model(request, obj, form, change)
+        if obj.team_id != previous_team_id:
+            _teams_changed([previous_team_id, obj.team_id])
+    
+    def delete_model(self, request, obj):
+        team_id = obj.team_id
+        super().delete_model(request, obj)
+        _teams_changed([team_id])
+    
+    def delete_queryset(self, request, queryset):
+        team_ids = list(queryset.values_list('team_id', flat=True))
+        super().delete_queryset(request, queryset)
+        _teams_changed(team_ids)
 
 @admin.register(AuctionSession)
 class AuctionSessionAdmin(admin.ModelAdmin):
@@ -209,6 +261,22 @@ class AuctionLogAdmin(admin.ModelAdmin):
     def session(self, obj):
         return obj.auction_session.name
     session.short_description = 'Auction Session'
+
+@admin.register(AuctionEvent)
+class AuctionEventAdmin(admin.ModelAdmin):
+    """The journal is append-only: view it, never edit it"""
+    list_display = ['id', 'event_type', 'auction_session', 'player_id', 'team_id', 'amount', 'timestamp']
+    list_filter = ['event_type', 'auction_session']
+    readonly_fields = ['auction_session', 'event_type', 'player_id', 'team_id', 'amount', 'data', 'timestamp']
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
     
     
 # Add to auction/admin.py
@@ -0,0 +1,142 @@
+"""
+Reconnect-storm control for auction sockets
+
+After a deploy or a Redis blip every browser reconnects at once. Two
+things spread them out:
+
+- Each worker admits at most AUCTION_MAX_HANDSHAKES connects at a time.
+  AdmissionMiddleware, outermost in the websocket stack
+  (sepl_project/asgi.py), takes the token before the session or user is
+  looked up; the handshake holds it until the consumer has joined its
+  groups and caught up, or is rejected or disconnects. An excess connect
+  is accepted only to be closed with code 1013 (Try Again Later), after
+  a 'retry' control frame; both carry a retry_after in milliseconds.
+- Every admitted socket gets a 'reconnect_policy' control frame (base
+  delay, jitter, cap). Clients back off exponentially from the base and
+  add a random share of the jitter, so they do not all come back in the
+  same second.
+
+Usage:
+    from auction.admission import AdmissionMiddleware
+
+    AdmissionMiddleware(CachedAuthMiddlewareStack(URLRouter(...)))
+
+    # in the consumer, once the socket has caught up
+    self.scope['admission'].release()
+"""
+
+import json
+import random
+
+from django.conf import settings
+
+from . import wire
+
+TRY_AGAIN_LATER = 1013
+
+
+def policy():
+    """The reconnect policy sent to clients (milliseconds)"""
+    return {
+        'base': getattr(settings, 'AUCTION_RECONNECT_BASE_MS', 1000),
+        'jitter': getattr(settings, 'AUCTION_RECONNECT_JITTER_MS', 4000),
+        'max': getattr(settings, 'AUCTION_RECONNECT_MAX_MS', 30000),
+    }
+
+
+def retry_after():
+    """Base delay plus jitter, for a connect turned away (milliseconds)"""
+    reconnect = policy()
+    return reconnect['base'] + random.randint(0, reconnect['jitter'])
+
+
+class AdmissionLimiter:
+    """Concurrent handshakes admitted by this worker"""
+
+    def __init__(self):
+        self.in_flight = 0
+        self.admitted = 0
+        self.rejected = 0
+
+    def limit(self):
+        return getattr(settings, 'AUCTION_MAX_HANDSHAKES', 100)
+
+    def try_acquire(self):
+        if self.in_flight >= self.limit():
+            self.rejected += 1
+            return False
+        self.in_flight += 1
+        self.admitted += 1
+        return True
+
+    def release(self):
+        self.in_flight -= 1
+
+    def stats(self):
+        return {
+            'in_flight': self.in_flight,
+            'limit': self.limit(),
+            'admitted': self.admitted,
+            'rejected': self.rejected,
+        }
+
+
+limiter = AdmissionLimiter()
+
+
+class Handshake:
+    """An admitted connect's token; releasing it more than once is harmless"""
+
+    def __init__(self):
+        self.released = False
+
+    def release(self):
+        if not self.released:
+            self.released = True
+            limiter.release()
+
+
+class AdmissionMiddleware:
+    """Turns away websocket connects over the handshake limit (see above)"""
+
+    def __init__(self, inner):
+        self.inner = inner
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'websocket':
+            return await self.inner(scope, receive, send)
+        if not limiter.try_acquire():
+            return await turn_away(scope, receive, send)
+
+        handshake = Handshake()
+
+        async def send_tracked(message):
+            if message['type'] == 'websocket.close':
+                handshake.release()
+            await send(message)
+
+        try:
+            return await self.inner(dict(scope, admission=handshake), receive, send_tracked)
+        finally:
+            handshake.release()
+
+
+async def turn_away(scope, receive, send):
+    """
+    Refuse a connect over the limit
+
+    Accepted first so the browser can read why: a 'retry' frame, then a
+    1013 close with the same retry_after (ms) as the reason.
+    """
+    message = await receive()
+    if message['type'] != 'websocket.connect':
+        return
+    delay = retry_after()
+    frame = {'type': 'retry', 'retry_after': delay}
+    if wire.SUBPROTOCOL in scope.get('subprotocols', []):
+        await send({'type': 'websocket.accept', 'subprotocol': wire.SUBPROTOCOL})
+        await send({'type': 'websocket.send', 'bytes': wire.encode(frame)})
+    else:
+        await send({'type': 'websocket.accept'})
+        await send({'type': 'websocket.send', 'text': json.dumps(frame)})
+    await send({'type': 'websocket.close', 'code': TRY_AGAIN_LATER, 'reason': str(delay)})
@@ -0,0 +1,87 @@
+"""
+Server-side going-once/twice/SOLD clock
+
+One countdown task per live session runs on the worker's event loop.
+Every bid, new lot or manual call restarts it; each tick advances the
+going count through auction.live and is broadcast to the room as a
+'going_update' carrying server timestamps, so clients can correct for
+their own clock skew. At SOLD the sale is completed automatically when
+AUCTION_GOING_AUTO_COMPLETE is on; otherwise the auctioneer confirms it.
+"""
+
+import asyncio
+import logging
+import time
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+_tasks = {}
+
+
+def interval():
+    return getattr(settings, 'AUCTION_GOING_INTERVAL', 5)
+
+
+def server_time():
+    """Server clock in epoch milliseconds"""
+    return int(time.time() * 1000)
+
+
+def next_call_at():
+    """When the next call is due (epoch ms), or None when the clock is off"""
+    if interval() <= 0:
+        return None
+    return server_time() + int(interval() * 1000)
+
+
+def restart(session_id, player_id):
+    """(Re)start the countdown for the lot; returns next_call_at()"""
+    stop(session_id)
+    if interval() <= 0:
+        return None
+    loop = asyncio.get_running_loop()
+    _tasks[session_id] = loop.create_task(_countdown(session_id, player_id))
+    return next_call_at()
+
+
+def stop(session_id):
+    """Cancel the session's countdown, if any"""
+    task = _tasks.pop(session_id, None)
+    if task is None or task.done() or task is asyncio.current_task():
+        return
+    loop = task.get_loop()
+    if loop.is_closed():
+        return
+    try:
+        running = asyncio.get_running_loop()
+    except RuntimeError:
+        running = None
+    if loop is running:
+        task.cancel()
+    else:
+        loop.call_soon_threadsafe(task.cancel)
+
+
+async def _countdown(session_id, player_id):
+    from . import live
+
+    try:
+        while True:
+            await asyncio.sleep(interval())
+            result = await live.call_going(session_id, player_id=player_id, from_clock=True)
+            if not result['success']:
+                return
+            if result['should_complete']:
+                break
+
+        if getattr(settings, 'AUCTION_GOING_AUTO_COMPLETE', False):
+            result = await live.complete_sale(session_id, player_id)
+            if not result['success']:
+                logger.warning('Auto-complete of player %s failed: %s', player_id, result['message'])
+    except Exception:
+        logger.exception('Going clock for session %s failed', session_id)
+    finally:
+        if _tasks.get(session_id) is asyncio.current_task():
+            del _tasks[session_id]
@@ -395,14 +395,17 @@
 
 import json
 import asyncio
+from urllib.parse import parse_qs
 from channels.generic.websocket import AsyncWebsocketConsumer
 from channels.db import database_sync_to_async
 from django.contrib.auth import get_user_model
-from django.db import transaction
-from django.db.models import F
-from django.core.cache import cache
-from .models import Team, Player, Bid, AuctionSession
-import time
+from .models import Team
+from .engine import resolve_session_id
+from . import admission, drain, live, outbox, presence, wire
+from .sendqueue import SendQueue
+from .utils import (
+    public_group, spectator_group, staff_group, team_group,
+)
 
 User = get_user_model()
 
@@ -415,27 +418,163 @@ class AuctionConsumer(AsyncWebsocketConsumer):
     Only the auctioneer can place bids via the auctioneer dashboard.
     
     Team owners use this only to receive real-time updates.
+    
+    The auctioneer dashboard sends its commands (bid, start_player,
+    call_going, complete_sale) over this socket. Each command carries a
+    client-chosen 'id' which is echoed back in an 'ack' frame; the
+    resulting broadcast goes to the whole room.
+
+    Team owners send 'raise_paddle' (acked the same way); the auctioneer
+    gets the updated paddle queue (auction.paddles).
+
+    A socket belongs to one live session's room: ws/auction/<session_id>/
+    (ws/auction/ is the oldest live session). Commands sent over it act
+    on that session.
     """
     
+    AUCTIONEER_COMMANDS = ('bid', 'start_player', 'call_going', 'complete_sale')
+    
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
         self.bid_lock = asyncio.Lock()
+        self.binary = False
+        self.queue = None
+        self.session_id = None
     
     async def connect(self):
-        self.room_name = 'auction_room'
-        self.room_group_name = 'auction_room_group'
+        # Binary frames for clients that offer them, JSON otherwise
+        self.binary = wire.SUBPROTOCOL in self.scope.get('subprotocols', [])
+        if drain.draining:
+            await self.turn_away(drain.SERVICE_RESTART)
+            return
+        try:
+            self.session_id = await database_sync_to_async(resolve_session_id)(
+                self.scope['url_route']['kwargs'].get('session_id')
+            )
+            if self.session_id is None:
+                # No such live session; reject the handshake
+                await self.close()
+                return
+            self.role, self.team_id = await self.get_audience()
+            self.audience_groups = self.groups_for(self.session_id, self.role, self.team_id)
+
+            for group in self.audience_groups:
+                await self.channel_layer.group_add(group, self.channel_name)
+            await self.accept(subprotocol=wire.SUBPROTOCOL if self.binary else None)
+            await self.send_frame({'type': 'reconnect_policy', **admission.policy()})
+            await self.resume()
+        finally:
+            # Admitted by admission.AdmissionMiddleware (absent when the
+            # consumer is mounted without it)
+            handshake = self.scope.get('admission')
+            if handshake is not None:
+                handshake.release()
+        self.queue = SendQueue(self)
+        self.queue.start()
+        presence.join(self, self.role, self.team_id)
+        outbox.start()
+        drain.install()
+
+    async def turn_away(self, code):
+        """
+        Refuse a connect while the worker is draining
+
+        Accepted first so the browser can read why: a 'retry' frame, then
+        the close `code` with the same retry_after (ms) as the reason.
+        """
+        retry_after = admission.retry_after()
+        await self.accept(subprotocol=wire.SUBPROTOCOL if self.binary else None)
+        await self.send_frame({'type': 'retry', 'retry_after': retry_after})
+        await self.close(code=code, reason=str(retry_after))
 
-        await self.channel_layer.group_add(
-            self.room_group_name,
-            self.channel_name
+    async def resume(self):
+        """
+        Catch up a reconnecting client (?last_seq=<seq>&epoch=<epoch>)
+
+        Missed broadcasts are replayed from the feed's ring buffer; when the
+        gap is older than the buffer (or the epoch changed) a single
+        'snapshot' frame is sent instead. The group was joined before this
+        runs, so nothing broadcast in between is lost - the client drops
+        anything it sees twice by seq.
+        """
+        params = parse_qs(self.scope.get('query_string', b'').decode())
+        last_seq = params.get('last_seq', [''])[0]
+        if not last_seq.isdigit():
+            return
+        epoch = params.get('epoch', [None])[0]
+
+        catch_up = await database_sync_to_async(live.resume)(
+            self.session_id, int(last_seq), epoch, self.is_staff_audience(), self.team_id
         )
-        await self.accept()
+        if 'events' in catch_up:
+            for message in catch_up['events']:
+                await self.send_frame(message)
+        else:
+            await self.send_frame(self.snapshot_frame(catch_up))
 
-    async def disconnect(self, close_code):
-        await self.channel_layer.group_discard(
-            self.room_group_name,
-            self.channel_name
+    async def send_snapshot(self):
+        """Send a fresh snapshot (a lagging socket leaving snapshot mode)"""
+        catch_up = await database_sync_to_async(live.resume)(
+            self.session_id, None, staff=self.is_staff_audience(), team_id=self.team_id
         )
+        await self.send_frame(self.snapshot_frame(catch_up))
+
+    @staticmethod
+    def snapshot_frame(catch_up):
+        return {
+            'type': 'snapshot',
+            'seq': catch_up['seq'],
+            'epoch': catch_up['epoch'],
+            'data': catch_up['snapshot'],
+        }
+
+    async def send_frame(self, message):
+        """Send one unencoded message in this socket's format"""
+        if self.binary:
+            await self.send(bytes_data=wire.encode(message))
+        else:
+            await self.send(text_data=json.dumps(message))
+
+    async def disconnect(self, close_code):
+        presence.leave(self)
+        if self.queue is not None:
+            self.queue.stop()
+        for group in getattr(self, 'audience_groups', ()):
+            await self.channel_layer.group_discard(group, self.channel_name)
+
+    @database_sync_to_async
+    def get_audience(self):
+        """(role, team_id) of this socket; role is the user_type or 'spectator'"""
+        user = self.scope.get('user')
+        if not (user and user.is_authenticated):
+            return 'spectator', None
+        if user.user_type == 'team_owner':
+            if 'team_id' in self.scope:
+                # Resolved with the user by auction.wsauth
+                return 'team_owner', self.scope['team_id']
+            team_id = Team.objects.filter(owner_id=user.id).values_list('id', flat=True).first()
+            return 'team_owner', team_id
+        return user.user_type, None
+
+    def is_staff_audience(self):
+        # The audience of the staff group (see groups_for)
+        return self.role in ('admin', 'auctioneer')
+
+    @staticmethod
+    def groups_for(session_id, role, team_id):
+        """
+        Groups for this socket's audience in its session's room (see auction.utils)
+
+        Auctioneer and admins get the full stream; owners the public one
+        plus their team's channel; everyone else the coalesced spectator
+        stream.
+        """
+        if role in ('admin', 'auctioneer'):
+            return [staff_group(session_id)]
+        if role == 'team_owner':
+            public = public_group(session_id)
+            return [public, team_group(session_id, team_id)] if team_id else [public]
+        return [spectator_group(session_id)]
 
     async def receive(self, text_data):
         """
@@ -448,15 +587,36 @@ class AuctionConsumer(AsyncWebsocketConsumer):
             data = json.loads(text_data)
             action = data.get('action')
 
+            # Client heartbeat for presence (auction.presence)
+            if action == 'heartbeat':
+                presence.heartbeat(self)
+
+            # A client that lost track of the lot asks for a fresh snapshot
+            elif action == 'resync':
+                await self.send_snapshot()
+
             # DISABLED: Team owner bidding
-            if action == 'place_bid':
+            elif action == 'place_bid':
                 await self.send(text_data=json.dumps({
                     'type': 'error',
                     'message': 'Direct bidding is disabled. The auctioneer will enter all bids during the live auction. Please raise your paddle to signal the auctioneer.'
                 }))
                 return
             
+            # Paddle raise: the owner's signal to the auctioneer
+            elif action == 'raise_paddle':
+                await self.raise_paddle(data)
+
+            # Auctioneer command channel
+            elif action in self.AUCTIONEER_COMMANDS:
+                await self.auctioneer_command(action, data)
+            
             # Admin/Auctioneer actions (kept for backward compatibility)
+            elif action in ('start_auction', 'next_player', 'end_bidding') and not self.is_auction_staff():
+                await self.send(text_data=json.dumps({
+                    'type': 'error',
+                    'message': 'Not allowed'
+                }))
             elif action == 'start_auction':
                 await self.start_auction(data)
             elif action == 'next_player':
@@ -480,6 +640,54 @@ class AuctionConsumer(AsyncWebsocketConsumer):
                 'message': f'Server error: {str(e)}'
             }))
 
+    def is_auction_staff(self):
+        user = self.scope.get('user')
+        return bool(user and user.is_authenticated and user.user_type in ('admin', 'auctioneer'))
+
+    async def auctioneer_command(self, action, data):
+        """Run an auctioneer command and ack it with the caller's correlation id"""
+        user = self.scope.get('user')
+        
+        try:
+            if not (user and user.is_authenticated and user.user_type == 'auctioneer'):
+                result = {'success': False, 'message': 'Only the auctioneer can send auction commands'}
+            elif action == 'bid':
+                result = await live.place_bid(
+                    self.session_id, data.get('team_id'), data.get('player_id'), data.get('amount')
+                )
+            elif action == 'start_player':
+                result = await live.start_player(self.session_id, data.get('player_id'))
+            elif action == 'call_going':
+                result = await live.call_going(self.session_id)
+            else:
+                result = await live.complete_sale(self.session_id, data.get('player_id'))
+        except Exception as e:
+            result = {'success': False, 'message': f'Error: {str(e)}'}
+        
+        await self.send(text_data=json.dumps({
+            'type': 'ack',
+            'id': data.get('id'),
+            'action': action,
+            'data': result
+        }))
+
+    async def raise_paddle(self, data):
+        """Queue this owner's team for the auctioneer and ack with the raise"""
+        if self.role != 'team_owner' or not self.team_id:
+            result = {'success': False, 'message': 'Only team owners can raise a paddle'}
+        else:
+            try:
+                result = await live.raise_paddle(self.session_id, self.team_id, data.get('player_id'))
+            except Exception as e:
+                result = {'success': False, 'message': f'Error: {str(e)}'}
+
+        await self.send(text_data=json.dumps({
+            'type': 'ack',
+            'id': data.get('id'),
+            'action': 'raise_paddle',
+            'data': result
+        }))
+
     # ============================================================
     # DEPRECATED FUNCTION - KEPT FOR REFERENCE ONLY
     # ============================================================
@@ -685,61 +893,6 @@ class AuctionConsumer(AsyncWebsocketConsumer):
     # ACTIVE FUNCTIONS - Used for admin/auctioneer control
     # ============================================================
 
-    @database_sync_to_async
-    def start_next_player(self, player_id):
-        """Admin/Auctioneer function to start a new player"""
-        try:
-            with transaction.atomic():
-                session = AuctionSession.objects.select_for_update().filter(status='live').first()
-                if not session:
-                    return {'success': False, 'message': 'No active auction session'}
-                
-                player = Player.objects.select_for_update().get(id=player_id, status='approved')
-                
-                player.current_bid = 0
-                player.save()
-                
-                session.current_player = player
-                session.save()
-                
-                user = player.user
-                player_data = {
-                    'id': player.id,
-                    'name': user.get_full_name(),
-                    'category': player.get_category_display(),
-                    'base_price': player.base_price,
-                    'current_bid': player.current_bid,
-                    'next_bid': player.base_price,
-                    'photo': user.profile_picture.url if user.profile_picture else None,
-                    'batting_style': player.batting_style,
-                    'bowling_style': player.bowling_style,
-                    'previous_team': player.previous_team,
-                }
-                
-                if user.player_type == 'student':
-                    player_data.update({
-                        'player_type': 'Student',
-                        'roll_number': user.roll_number or 'N/A',
-                        'course': user.get_course_display() if user.course else 'N/A',
-                        'branch': user.get_branch_display() if user.branch else 'N/A',
-                        'year': user.get_year_of_study_display() if user.year_of_study else 'N/A',
-                    })
-                elif user.player_type == 'faculty':
-                    player_data.update({
-                        'player_type': 'Faculty',
-                        'branch': user.get_branch_display() if user.branch else 'N/A',
-                    })
-                
-                return {
-                    'success': True,
-                    'player': player_data
-                }
-                
-        except Player.DoesNotExist:
-            return {'success': False, 'message': 'Player not found or not approved'}
-        except Exception as e:
-            return {'success': False, 'message': f'Error starting player auction: {str(e)}'}
-
     async def next_player(self, data):
         """Handle next player request"""
         player_id = data.get('player_id')
@@ -751,100 +904,16 @@ class AuctionConsumer(AsyncWebsocketConsumer):
             }))
             return
         
-        result = await self.start_next_player(player_id)
+        # Same command as the auctioneer's start_player: serialised with the
+        # session's other commands and announced through the outbox
+        result = await live.start_player(self.session_id, player_id)
         
-        if result['success']:
-            await self.channel_layer.group_send(
-                self.room_group_name,
-                {
-                    'type': 'player_update',
-                    'data': result
-                }
-            )
-        else:
+        if not result['success']:
             await self.send(text_data=json.dumps({
                 'type': 'error',
                 'message': result['message']
             }))
 
-    @database_sync_to_async
-    def complete_bidding(self, player_id):
-        """Complete bidding for current player"""
-        try:
-            from .models import AuctionLog
-            
-            with transaction.atomic():
-                session = AuctionSession.objects.select_for_update().filter(status='live').first()
-                if not session:
-                    return {'success': False, 'message': 'No active auction session'}
-                
-                player = Player.objects.select_for_update().get(id=player_id)
-                
-                winning_bid = Bid.objects.filter(
-                    player=player, 
-                    auction_session=session
-                ).order_by('-amount').first()
-                
-                if winning_bid:
-                    team = Team.objects.select_for_update().get(id=winning_bid.team_id)
-                    
-                    if not team.can_buy_player():
-                        return {
-                            'success': False,
-                            'message': f'Team {team.name} has reached maximum player limit'
-                        }
-                    
-                    player.status = 'sold'
-                    player.team = team
-                    player.save()
-                    
-                    Team.objects.filter(id=team.id).update(
-                        purse_remaining=F('purse_remaining') - winning_bid.amount
-                    )
-                    team.refresh_from_db()
-                    
-                    AuctionLog.objects.create(
-                        auction_session=session,
-                        player=player,
-                        winning_team=team,
-                        final_amount=winning_bid.amount,
-                        sold=True
-                    )
-                    
-                    return {
-                        'success': True,
-                        'sold': True,
-                        'team_name': team.name,
-                        'team_id': team.id,
-                        'amount': winning_bid.amount,
-                        'player_name': player.user.get_full_name(),
-                        'player_id': player.id,
-                        'team_purse_remaining': team.purse_remaining,
-                        'team_slots_remaining': team.slots_remaining()
-                    }
-                else:
-                    player.status = 'unsold'
-                    player.save()
-                    
-                    AuctionLog.objects.create(
-                        auction_session=session,
-                        player=player,
-                        final_amount=player.base_price,
-                        sold=False
-                    )
-                    
-                    return {
-                        'success': True,
-                        'sold': False,
-                        'player_name': player.user.get_full_name(),
-                        'player_id': player.id
-                    }
-                    
-        except Player.DoesNotExist:
-            return {'success': False, 'message': 'Player not found'}
-        except Exception as e:
-            return {'success': False, 'message': f'Error completing bidding: {str(e)}'}
-
     async def end_bidding(self, data):
         """Handle end bidding request"""
         player_id = data.get('player_id')
@@ -856,17 +925,10 @@ class AuctionConsumer(AsyncWebsocketConsumer):
             }))
             return
         
-        result = await self.complete_bidding(player_id)
+        # The auctioneer's complete_sale, under the session's command lock
+        result = await live.complete_sale(self.session_id, player_id)
         
-        if result['success']:
-            await self.channel_layer.group_send(
-                self.room_group_name,
-                {
-                    'type': 'bidding_end',
-                    'data': result
-                }
-            )
-        else:
+        if not result['success']:
             await self.send(text_data=json.dumps({
                 'type': 'error',
                 'message': result['message']
@@ -875,24 +937,40 @@ class AuctionConsumer(AsyncWebsocketConsumer):
     # ============================================================
     # WebSocket event handlers (broadcast to all clients)
     # ============================================================
+    # Events arrive stamped by auction.feed and already encoded
+    # (event['text'] / event['bytes']), so they are forwarded as-is,
+    # through the socket's bounded send queue (auction.sendqueue).
+
+    async def forward(self, event):
+        if self.binary:
+            await self.send(bytes_data=event['bytes'])
+        else:
+            await self.send(text_data=event['text'])
 
     async def bid_update(self, event):
         """Broadcast bid update to all connected clients"""
-        await self.send(text_data=json.dumps({
-            'type': 'bid_update',
-            'data': event['data']
-        }))
+        self.queue.put(event)
 
     async def player_update(self, event):
         """Broadcast player update to all connected clients"""
-        await self.send(text_data=json.dumps({
-            'type': 'player_update',
-            'data': event['data']
-        }))
+        self.queue.put(event)
 
     async def bidding_end(self, event):
         """Broadcast bidding end to all connected clients"""
-        await self.send(text_data=json.dumps({
-            'type': 'bidding_end',
-            'data': event['data']
-        }))
\ No newline at end of file
+        self.queue.put(event)
+
+    async def bid_rejected(self, event):
+        """Withdraw a broadcast bid that lost the race in the database"""
+        self.queue.put(event)
+
+    async def going_update(self, event):
+        """Broadcast a going-once/twice/SOLD call to all connected clients"""
+        self.queue.put(event)
+
+    async def team_update(self, event):
+        """Send a team's own purse/slots to its owner"""
+        self.queue.put(event)
+
+    async def paddle_queue(self, event):
+        """Send the paddle queue to the auctioneer and admins"""
+        self.queue.put(event)
\ No newline at end of file
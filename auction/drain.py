@@ -0,0 +1,139 @@
+"""
+Graceful drain of auction sockets on worker shutdown
+
+Killing a daphne worker drops all of its sockets at once and every
+client reconnects in the same moment. Instead, the first SIGTERM puts the
+worker into drain mode:
+
+- new connects are turned away (close code 1012, Service Restart, with a
+  retry_after), so the load balancer's retries land on other workers;
+- open sockets are closed in AUCTION_DRAIN_BATCHES batches spread over
+  AUCTION_DRAIN_WINDOW seconds. Each gets a 'migrate' control frame
+  after whatever it still had queued, carrying the seq/epoch of its
+  room's feed it was sent up to and a retry_after, then a 1012 close.
+  The client reconnects with ?last_seq as usual and the new worker
+  catches it up;
+- once every socket is closed (or the window has passed) the bids the
+  live engine accepted are written (the persister is flushed, waiting up
+  to AUCTION_DRAIN_FLUSH_TIMEOUT seconds, off the event loop) and the
+  signal is handed to the handler that was there before
+  (daphne/Twisted), which stops the server.
+
+A second SIGTERM skips the drain. The handler is installed by the first
+socket to connect, after the server has installed its own.
+
+Usage:
+    from auction import drain
+
+    drain.install()
+    if drain.draining: ...
+"""
+
+import asyncio
+import logging
+import math
+import os
+import signal
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+
+from . import admission, sendqueue
+from .feed import get_feed
+from .persistence import persister
+
+logger = logging.getLogger(__name__)
+
+SERVICE_RESTART = 1012
+
+draining = False
+_previous = None
+_installed = False
+
+
+def window():
+    return getattr(settings, 'AUCTION_DRAIN_WINDOW', 10)
+
+
+def batches():
+    return max(1, getattr(settings, 'AUCTION_DRAIN_BATCHES', 10))
+
+
+def flush_timeout():
+    return getattr(settings, 'AUCTION_DRAIN_FLUSH_TIMEOUT', 10)
+
+
+def install():
+    """Take over SIGTERM for this worker (idempotent)"""
+    global _previous, _installed
+    if _installed:
+        return
+    loop = asyncio.get_running_loop()
+    try:
+        _previous = signal.signal(
+            signal.SIGTERM,
+            lambda signum, frame: loop.call_soon_threadsafe(_on_sigterm, loop),
+        )
+    except ValueError:
+        return  # not the main thread; shutdown stays abrupt
+    _installed = True
+
+
+def _on_sigterm(loop):
+    if draining:
+        logger.warning('Second SIGTERM, stopping without finishing the drain')
+        _shutdown()
+        return
+    loop.create_task(_drain_then_shutdown())
+
+
+async def _drain_then_shutdown():
+    try:
+        await drain()
+    except Exception:
+        logger.exception('Auction drain failed')
+    await flush_writes()
+    _shutdown()
+
+
+async def flush_writes():
+    """Wait for the queued bid writes, in a thread of its own"""
+    flush = sync_to_async(persister.flush, thread_sensitive=False)
+    if not await flush(timeout=flush_timeout()):
+        logger.warning('Auction writes still queued after %ss; exiting anyway', flush_timeout())
+
+
+async def drain():
+    """Turn away new sockets and close the open ones in staggered batches"""
+    global draining
+    draining = True
+    queues = list(sendqueue.connections)
+    logger.info('Draining %d auction sockets over %ss', len(queues), window())
+
+    pause = window() / batches()
+    size = math.ceil(len(queues) / batches()) or 1
+    for start in range(0, len(queues), size):
+        if start:
+            await asyncio.sleep(pause)
+        for queue in queues[start:start + size]:
+            feed = get_feed(queue.consumer.session_id)
+            queue.migrate({
+                'type': 'migrate',
+                'seq': feed.seq,
+                'epoch': feed.epoch,
+                'retry_after': admission.retry_after(),
+            })
+
+    # Give the last batch's writers time to flush their queues
+    deadline = asyncio.get_running_loop().time() + pause
+    while sendqueue.connections and asyncio.get_running_loop().time() < deadline:
+        await asyncio.sleep(0.05)
+
+
+def _shutdown():
+    # Hand the signal to whoever had it before us
+    if callable(_previous):
+        _previous(signal.SIGTERM, None)
+    else:
+        signal.signal(signal.SIGTERM, _previous if _previous is not None else signal.SIG_DFL)
+        os.kill(os.getpid(), signal.SIGTERM)
@@ -0,0 +1,576 @@
+"""
+In-memory live auction state engine
+
+Holds the authoritative state of a live AuctionSession - current lot,
+current bid, last bidder, going count and per-team purse/slots - so that
+bids are validated without touching the database. The Bid/Player/
+AuctionSession rows and the event journal are written behind by
+auction.persistence; after a restart the engine is rebuilt from the last
+journal snapshot plus the events after it (auction.journal).
+
+One engine exists per live session per process; all mutations go through
+the engine lock (single writer). Several sessions can be live at once:
+teams are shared, so a sale in one session is applied to the teams of
+the other engines in the process too (in other processes the purse is
+re-read when their next lot opens, and the sale's conditional debit
+stays the final check).
+"""
+
+import logging
+import threading
+import time
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+
+from . import journal
+from .persistence import StaleWrite, persister, write_bid, write_going_count
+
+logger = logging.getLogger(__name__)
+
+GOING_CALLS = ['Going once...', 'Going twice...', 'SOLD!']
+
+
+def bid_increment(amount):
+    """Increment rule used throughout the auction"""
+    return 50 if amount < 700 else 100
+
+
+def next_bid_amount(current_bid, base_price):
+    """Amount the next bid must be for a lot"""
+    if current_bid == 0:
+        return base_price
+    return current_bid + bid_increment(current_bid)
+
+
+class BidRejected(Exception):
+    """Raised when the engine refuses a bid; str(e) is user facing"""
+
+
+class StaleBid(BidRejected):
+    """Raised when a bid was placed against a price that has moved on"""
+
+    def __init__(self, next_bid):
+        super().__init__(f'Stale bid, next is ₹{next_bid}')
+        self.next_bid = next_bid
+
+
+class TeamState:
+    __slots__ = ('id', 'name', 'purse_remaining', 'max_players',
+                 'regular_count', 'iconic_count')
+
+    def __init__(self, id, name, purse_remaining, max_players,
+                 regular_count, iconic_count=0):
+        self.id = id
+        self.name = name
+        self.purse_remaining = purse_remaining
+        self.max_players = max_players
+        self.regular_count = regular_count
+        self.iconic_count = iconic_count
+
+    def slots_remaining(self):
+        # Iconic players shrink the squad limit
+        return (self.max_players - self.iconic_count) - self.regular_count
+
+    def can_bid(self, amount):
+        return self.slots_remaining() > 0 and self.purse_remaining >= amount
+
+
+class LotState:
+    __slots__ = ('player_id', 'player_name', 'base_price', 'current_bid',
+                 'last_bid_team_id', 'going_count')
+
+    def __init__(self, player_id, player_name, base_price, current_bid=0,
+                 last_bid_team_id=None, going_count=0):
+        self.player_id = player_id
+        self.player_name = player_name
+        self.base_price = base_price
+        self.current_bid = current_bid
+        self.last_bid_team_id = last_bid_team_id
+        self.going_count = going_count
+
+    @property
+    def next_bid(self):
+        return next_bid_amount(self.current_bid, self.base_price)
+
+
+class LiveAuctionEngine:
+    """Authoritative live state for one AuctionSession"""
+
+    def __init__(self, session_id):
+        self.session_id = session_id
+        self.lock = threading.RLock()
+        self.lot = None
+        self.teams = {}
+
+    # ============================================================
+    # Recovery
+    # ============================================================
+
+    def recover(self):
+        """Restore from the journal, falling back to the durable tables"""
+        # Not registered yet, so nothing else can be waiting on the lock
+        if not journal.restore(self):
+            self.rebuild()
+        return self
+
+    def rebuild(self):
+        """
+        Re-derive state from the Bid/Player/AuctionSession/Team rows and snapshot it
+
+        The rows are read without the lock; only swapping the state in
+        holds it, so bids on a loaded engine never wait on the database.
+        """
+        from .models import AuctionSession, Bid, Team
+
+        position = journal.last_event_id()
+
+        session = AuctionSession.objects.select_related(
+            'current_player__user'
+        ).get(id=self.session_id)
+
+        teams = self._read_teams(Team)
+
+        lot = None
+        player = session.current_player
+        if player and player.status == 'approved':
+            top_bid = Bid.objects.filter(
+                auction_session_id=self.session_id,
+                player_id=player.id,
+            ).order_by('-amount').values('amount', 'team_id').first()
+
+            current_bid = player.current_bid
+            last_bid_team_id = session.last_bid_team_id
+            if top_bid and top_bid['amount'] >= current_bid:
+                current_bid = top_bid['amount']
+                last_bid_team_id = top_bid['team_id']
+            elif not top_bid:
+                current_bid = 0
+                last_bid_team_id = None
+
+            lot = LotState(
+                player_id=player.id,
+                player_name=player.user.get_full_name(),
+                base_price=player.base_price,
+                current_bid=current_bid,
+                last_bid_team_id=last_bid_team_id,
+                going_count=session.bid_call_count,
+            )
+
+        with self.lock:
+            self.teams = teams
+            self.lot = lot
+        journal.save_snapshot(self, position)
+        return self
+
+    def _read_teams(self, Team):
+        return {
+            t['id']: TeamState(
+                id=t['id'],
+                name=t['name'],
+                purse_remaining=t['purse_remaining'],
+                max_players=t['max_players'],
+                regular_count=t['regular_count'],
+                iconic_count=t['iconic_count'],
+            )
+            for t in Team.objects.with_eligibility().values(
+                'id', 'name', 'purse_remaining', 'max_players',
+                'regular_count', 'iconic_count',
+            )
+        }
+
+    def refresh_teams(self):
+        """Reload purse/slots for every team (one query)"""
+        from .models import Team
+
+        teams = self._read_teams(Team)
+        with self.lock:
+            self.teams = teams
+
+    # ============================================================
+    # Snapshots and replay
+    # ============================================================
+
+    def to_state(self):
+        """JSON-serialisable copy of the engine state"""
+        with self.lock:
+            lot = self.lot
+            return {
+                'lot': {name: getattr(lot, name) for name in LotState.__slots__} if lot else None,
+                'teams': [
+                    {name: getattr(team, name) for name in TeamState.__slots__}
+                    for team in self.teams.values()
+                ],
+            }
+
+    def load_state(self, state):
+        with self.lock:
+            self.lot = LotState(**state['lot']) if state['lot'] else None
+            self.teams = {team['id']: TeamState(**team) for team in state['teams']}
+
+    def apply_event(self, event):
+        """
+        Replay one AuctionEvent; returns False if it cannot be applied
+
+        Lot events only move the lot of this engine's session, but team
+        effects (a sale in another session, admin changes) always apply.
+        """
+        with self.lock:
+            own_session = event.auction_session_id in (None, self.session_id)
+            lot = self.lot if own_session else None
+            kind = event.event_type
+
+            if kind == 'lot_started':
+                if own_session:
+                    self.lot = LotState(
+                        player_id=event.player_id,
+                        player_name=event.data['player_name'],
+                        base_price=event.data['base_price'],
+                    )
+            elif kind == 'bid':
+                if event.team_id not in self.teams:
+                    return False
+                if lot and lot.player_id == event.player_id:
+                    lot.current_bid = event.amount
+                    lot.last_bid_team_id = event.team_id
+                    lot.going_count = 0
+            elif kind == 'going':
+                if lot:
+                    lot.going_count = event.data['count']
+            elif kind == 'sold':
+                team = self.teams.get(event.team_id)
+                if team is None:
+                    return False
+                if 'team' in event.data:
+                    # The buyer's counters after the sale: replaying the
+                    # event over state that already has it changes nothing
+                    self.teams[event.team_id] = TeamState(id=event.team_id, **event.data['team'])
+                else:
+                    # Journaled before sales carried the counters
+                    team.purse_remaining -= event.amount
+                    team.regular_count += 1
+                if lot and lot.player_id == event.player_id:
+                    self.lot = None
+            elif kind == 'unsold':
+                if lot and lot.player_id == event.player_id:
+                    self.lot = None
+            elif kind in ('iconic_assigned', 'team_reset', 'team_updated'):
+                # Team events carry absolute counters
+                if event.data.get('deleted'):
+                    self.teams.pop(event.team_id, None)
+                else:
+                    self.teams[event.team_id] = TeamState(
+                        id=event.team_id,
+                        **{name: event.data[name] for name in journal.TEAM_FIELDS}
+                    )
+            return True
+
+    # ============================================================
+    # Mutations
+    # ============================================================
+
+    def start_lot(self, player):
+        """Put a player under the hammer"""
+        self.refresh_teams()
+        with self.lock:
+            self.lot = LotState(
+                player_id=player.id,
+                player_name=player.user.get_full_name(),
+                base_price=player.base_price,
+            )
+            persister.submit(
+                journal.record, 'lot_started',
+                session_id=self.session_id,
+                player_id=player.id,
+                player_name=self.lot.player_name,
+                base_price=player.base_price,
+            )
+            return self.lot
+
+    def place_bid(self, team_id, player_id, amount):
+        """
+        Validate and apply a bid in memory, then queue it for persistence
+
+        Returns a dict describing the accepted bid; raises BidRejected
+        (StaleBid when the amount was for a price already bid).
+        """
+        with self.lock:
+            lot = self.lot
+            if lot is None or lot.player_id != player_id:
+                raise BidRejected('This player is not currently being auctioned')
+
+            team = self.teams.get(team_id)
+            if team is None:
+                raise BidRejected('Team not found')
+
+            if team.slots_remaining() <= 0:
+                raise BidRejected(f'{team.name} has reached maximum player limit')
+
+            if team.purse_remaining < amount:
+                raise BidRejected(
+                    f'{team.name} has insufficient purse (₹{team.purse_remaining} remaining)'
+                )
+
+            expected = lot.next_bid
+            if amount != expected:
+                if lot.current_bid == 0:
+                    raise BidRejected(f'First bid must be base price: ₹{lot.base_price}')
+                if amount < expected:
+                    # Someone else's bid landed first; the bidder lost the race
+                    raise StaleBid(expected)
+                raise BidRejected(f'Next bid must be: ₹{expected}')
+
+            previous_bid = lot.current_bid
+            lot.current_bid = amount
+            lot.last_bid_team_id = team_id
+            lot.going_count = 0
+
+            persister.submit(
+                write_bid, self.session_id, player_id, team_id, amount,
+                previous_bid, lot.going_count,
+            )
+
+            return {
+                'team_name': team.name,
+                'team_id': team.id,
+                'player_id': player_id,
+                'player_name': lot.player_name,
+                'amount': amount,
+                'next_bid': lot.next_bid,
+                'purse_remaining': team.purse_remaining,
+                'team_slots_remaining': team.slots_remaining(),
+                'timestamp': timezone.now().isoformat(),
+            }
+
+    def paddle_amount(self, team_id, player_id):
+        """
+        The bid a team's paddle raise stands for, and the team's name
+
+        Raises BidRejected when the team could not make that bid.
+        """
+        with self.lock:
+            lot = self.lot
+            if lot is None or lot.player_id != player_id:
+                raise BidRejected('This player is not currently being auctioned')
+
+            team = self.teams.get(team_id)
+            if team is None:
+                raise BidRejected('Team not found')
+            if lot.last_bid_team_id == team_id:
+                raise BidRejected('You already hold the highest bid')
+            if not team.can_bid(lot.next_bid):
+                raise BidRejected(f'{team.name} cannot bid ₹{lot.next_bid}')
+            return lot.next_bid, team.name
+
+    def call_going(self):
+        """Advance the going-once/twice counter; returns (count, call_text)"""
+        with self.lock:
+            if self.lot is None:
+                raise BidRejected('No player currently being auctioned')
+            self.lot.going_count += 1
+            count = self.lot.going_count
+            persister.submit(write_going_count, self.session_id, count)
+        return count, GOING_CALLS[min(count - 1, 2)]
+
+    def close_lot(self, team_id=None, amount=0):
+        """Record the outcome of the current lot (team_id None for unsold)"""
+        with self.lock:
+            self.apply_sale(team_id, amount)
+            self.lot = None
+        if team_id is not None:
+            # Outside our lock: two sessions settling at once must not
+            # wait on each other's engines
+            for engine in list(_engines.values()):
+                if engine is not self:
+                    engine.apply_sale(team_id, amount)
+
+    def apply_sale(self, team_id, amount):
+        """Charge a team for a player bought (in this or another session)"""
+        with self.lock:
+            team = self.teams.get(team_id)
+            if team is not None:
+                team.purse_remaining -= amount
+                team.regular_count += 1
+
+    def eligible_team_ids(self, amount):
+        """Ids of teams that can still bid `amount` (no queries)"""
+        with self.lock:
+            return [t.id for t in self.teams.values() if t.can_bid(amount)]
+
+
+# ============================================================
+# Registry
+# ============================================================
+
+_engines = {}
+_live_session_ids = None
+_live_version = None
+_live_checked_at = 0.0
+_registry_lock = threading.Lock()
+
+# Bumped in the shared cache whenever a session starts or ends, so every
+# process re-reads which sessions are live
+LIVE_VERSION_KEY = 'auction:live_sessions:version'
+
+
+def recheck_interval():
+    return getattr(settings, 'AUCTION_LIVE_SESSIONS_RECHECK', 1)
+
+
+def get_engine(session_id):
+    """Engine for a session, recovered from the database on first use"""
+    engine = _engines.get(session_id)
+    if engine is not None:
+        return engine
+
+    # Recover from a durable record that includes every queued write
+    persister.flush()
+    with _registry_lock:
+        engine = _engines.get(session_id)
+        if engine is None:
+            engine = LiveAuctionEngine(session_id).recover()
+            _engines[session_id] = engine
+        return engine
+
+
+def live_session_ids():
+    """
+    Ids of the live sessions, oldest first
+
+    Cached in the process and re-read when LIVE_VERSION_KEY has moved on
+    (checked at most every AUCTION_LIVE_SESSIONS_RECHECK seconds). An
+    empty list is not cached. Engines of sessions that started or ended
+    since the last read are dropped.
+    """
+    global _live_session_ids, _live_version, _live_checked_at
+    from .models import AuctionSession
+
+    session_ids = _live_session_ids
+    now = time.monotonic()
+    if session_ids is not None and now - _live_checked_at < recheck_interval():
+        return session_ids
+
+    version = cache.get(LIVE_VERSION_KEY)
+    if session_ids is not None and version == _live_version:
+        _live_checked_at = now
+        return session_ids
+
+    fresh = list(
+        AuctionSession.objects.filter(status='live').order_by('id').values_list('id', flat=True)
+    )
+    with _registry_lock:
+        for session_id in set(session_ids or ()) ^ set(fresh):
+            _engines.pop(session_id, None)
+        if fresh:
+            _live_session_ids, _live_version, _live_checked_at = fresh, version, now
+        else:
+            _live_session_ids = None
+    return fresh
+
+
+def live_sessions_changed():
+    """Make every process re-read the live sessions (a session started or ended)"""
+    if not cache.add(LIVE_VERSION_KEY, 1, timeout=None):
+        try:
+            cache.incr(LIVE_VERSION_KEY)
+        except ValueError:
+            cache.set(LIVE_VERSION_KEY, 1, timeout=None)
+
+
+def resolve_session_id(session_id=None):
+    """
+    The live session a request or socket is for
+
+    `session_id` when that session is live; with no session_id, the
+    oldest live session (pages and clients that predate rooms). None
+    when there is no such live session.
+    """
+    session_ids = live_session_ids()
+    if session_id is None or session_id == '':
+        return session_ids[0] if session_ids else None
+    try:
+        session_id = int(session_id)
+    except (TypeError, ValueError):
+        return None
+    return session_id if session_id in session_ids else None
+
+
+def get_live_engine(session_id=None):
+    """Engine for a live session (see resolve_session_id), or None"""
+    session_id = resolve_session_id(session_id)
+    if session_id is None:
+        return None
+    return get_engine(session_id)
+
+
+async def aget_live_engine(session_id=None):
+    """
+    Async version of get_live_engine
+
+    Stays on the event loop when the engine is already loaded; recovery
+    (database work) runs in the sync thread.
+    """
+    session_ids = _live_session_ids
+    if session_ids is not None and time.monotonic() - _live_checked_at < recheck_interval():
+        if session_id is None or session_id == '':
+            session_id = session_ids[0] if session_ids else None
+        engine = _engines.get(_as_int(session_id))
+        if engine is not None and engine.session_id in session_ids:
+            return engine
+    return await sync_to_async(get_live_engine)(session_id)
+
+
+def _as_int(value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def loaded_session_ids():
+    """Sessions whose engine lives in this process"""
+    return list(_engines)
+
+
+def invalidate_engines(session_id=None):
+    """
+    Drop the engines (or one session's); the next access recovers from the database
+
+    Also forgets which sessions are live.
+    """
+    global _live_session_ids
+    with _registry_lock:
+        if session_id is None:
+            _engines.clear()
+        else:
+            _engines.pop(session_id, None)
+        _live_session_ids = None
+
+
+def loaded_engine(session_id):
+    """The session's engine if this process holds it (never recovers)"""
+    return _engines.get(session_id)
+
+
+def _on_write_failure(exc):
+    # Memory is ahead of a failed write: rebuild from the durable record.
+    # A lost compare-and-swap only concerns the session it was for, whose
+    # engine is rebuilt in place (the lock is only held for the swap) so
+    # that its room can be corrected (auction.live announces the bid that
+    # did not stand).
+    if not isinstance(exc, StaleWrite):
+        invalidate_engines()
+        return
+    engine = _engines.get(exc.session_id)
+    if engine is None:
+        return
+    try:
+        engine.rebuild()
+    except Exception:
+        logger.exception('Rebuilding session %s after a lost bid failed', exc.session_id)
+        invalidate_engines(exc.session_id)
+
+
+persister.on_failure(_on_write_failure)
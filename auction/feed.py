@@ -0,0 +1,106 @@
+"""
+Sequenced live auction feed
+
+Every message broadcast to the auction room is stamped here with a
+monotonically increasing `seq` and the feed's `epoch` (which changes when
+the process restarts), and kept in a ring buffer of recent messages.
+A client that notices a gap in `seq` asks /api/auction/state/?since=<seq>
+and gets the missed messages from the buffer, or a full snapshot when
+the gap is older than the buffer.
+
+The feed also remembers the current lot as the room saw it (player card
+and bids), so snapshots of the lot do not need the database.
+
+Every live session is its own room with its own feed (get_feed), so
+concurrent auctions have independent seqs and epochs.
+"""
+
+import threading
+import uuid
+from collections import deque
+
+from django.conf import settings
+
+
+class LiveFeed:
+    def __init__(self, session_id=None, size=None):
+        self.session_id = session_id
+        self.epoch = uuid.uuid4().hex[:12]
+        self.seq = 0
+        self.buffer = deque(maxlen=size or getattr(settings, 'AUCTION_FEED_BUFFER', 256))
+        self.lock = threading.Lock()
+        self.lot_card = None
+        self.lot_bids = []
+
+    def publish(self, event_type, data):
+        """Stamp a message with the next seq and remember it; returns the message"""
+        with self.lock:
+            self.seq += 1
+            message = {
+                'type': event_type,
+                'seq': self.seq,
+                'epoch': self.epoch,
+                'data': data,
+            }
+            self.buffer.append(message)
+            self._track_lot(event_type, data)
+            return message
+
+    def since(self, seq, epoch=None):
+        """
+        Messages after `seq`, oldest first
+
+        Returns None when they cannot be served from the buffer (another
+        epoch, or the gap is older than the oldest buffered message).
+        """
+        with self.lock:
+            if epoch is not None and epoch != self.epoch:
+                return None
+            if seq > self.seq:
+                return None
+            if seq == self.seq:
+                return []
+            if not self.buffer or self.buffer[0]['seq'] > seq + 1:
+                return None
+            return [message for message in self.buffer if message['seq'] > seq]
+
+    def lot_view(self, player_id):
+        """(card, bids) for the lot as broadcast, or None if the feed never saw it"""
+        with self.lock:
+            if self.lot_card is None or self.lot_card['id'] != player_id:
+                return None
+            return dict(self.lot_card), list(self.lot_bids)
+
+    def _track_lot(self, event_type, data):
+        if event_type == 'player_update':
+            self.lot_card = data.get('player')
+            self.lot_bids = []
+        elif event_type == 'bid_update':
+            self.lot_bids.append({
+                'team_id': data['team_id'],
+                'team_name': data['team_name'],
+                'amount': data['amount'],
+                'timestamp': data['timestamp'],
+            })
+        elif event_type == 'bid_rejected':
+            # Another writer moved the lot: the bids this feed broadcast
+            # are not the whole story, so snapshots read the lot from the
+            # database from now on
+            self.lot_card = None
+            self.lot_bids = []
+        elif event_type == 'bidding_end':
+            self.lot_card = None
+            self.lot_bids = []
+
+
+_feeds = {}
+_feeds_lock = threading.Lock()
+
+
+def get_feed(session_id):
+    """The feed of a session's room (created on first use)"""
+    feed = _feeds.get(session_id)
+    if feed is None:
+        with _feeds_lock:
+            feed = _feeds.setdefault(session_id, LiveFeed(session_id))
+    return feed
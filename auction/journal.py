@@ -0,0 +1,119 @@
+"""
+Auction event journal
+
+Every change to live auction state is appended to AuctionEvent (lot
+started, bid, going, sold, unsold, iconic assigned, team reset/updated),
+and the live engine is snapshotted to AuctionSnapshot whenever a lot
+closes. A restarted worker rebuilds its engine from the last snapshot
+plus the events after it - two queries - instead of re-deriving state
+from Bid/Player/Team/AuctionSession.
+
+Sales and team events carry the team's absolute counters rather than a
+change to them, so an event replayed over state that already includes
+it (a snapshot taken while it committed) does no harm.
+
+Usage:
+    from auction import journal
+
+    journal.record('sold', session_id=session.id, player_id=player.id,
+                   team_id=team.id, amount=amount, team=journal.team_state(team.id))
+    journal.record_team('team_reset', team.id)
+"""
+
+import logging
+
+logger = logging.getLogger(__name__)
+
+TEAM_FIELDS = ('name', 'purse_remaining', 'max_players', 'regular_count', 'iconic_count')
+
+
+# ============================================================
+# Appending
+# ============================================================
+
+def record(event_type, session_id=None, player_id=None, team_id=None, amount=0, **data):
+    """Append one event (inside the caller's transaction, if any)"""
+    from .models import AuctionEvent
+
+    return AuctionEvent.objects.create(
+        auction_session_id=session_id,
+        event_type=event_type,
+        player_id=player_id,
+        team_id=team_id,
+        amount=amount,
+        data=data,
+    )
+
+
+def record_team(event_type, team_id):
+    """Append a team event carrying the team's current counters"""
+    state = team_state(team_id)
+    if state is None:
+        return record(event_type, team_id=team_id, deleted=True)
+    return record(event_type, team_id=team_id, **state)
+
+
+def record_teams(team_ids):
+    """Journal teams changed outside the live auction (admin edits, deletions)"""
+    for team_id in sorted(set(team_ids) - {None}):
+        record_team('team_updated', team_id)
+
+
+def team_state(team_id):
+    """A team's current counters (TEAM_FIELDS), None if it is gone"""
+    from .models import Team
+
+    return Team.objects.with_eligibility().filter(id=team_id).values(*TEAM_FIELDS).first()
+
+
+def last_event_id():
+    from .models import AuctionEvent
+
+    return AuctionEvent.objects.order_by('-id').values_list('id', flat=True).first() or 0
+
+
+# ============================================================
+# Snapshots and replay
+# ============================================================
+
+def save_snapshot(engine, last_event_id):
+    """Store the engine state as of journal position `last_event_id`"""
+    from .models import AuctionSnapshot
+
+    AuctionSnapshot.objects.create(
+        auction_session_id=engine.session_id,
+        last_event_id=last_event_id,
+        state=engine.to_state(),
+    )
+    # Only the newest snapshot is ever read
+    AuctionSnapshot.objects.filter(
+        auction_session_id=engine.session_id,
+        last_event_id__lt=last_event_id,
+    ).delete()
+
+
+def restore(engine):
+    """
+    Load the last snapshot into `engine` and replay the events after it
+
+    Returns False when there is no snapshot or the tail cannot be applied
+    to it (e.g. a team the snapshot has never seen); the caller then
+    rebuilds from the tables.
+    """
+    from .models import AuctionEvent, AuctionSnapshot
+
+    snapshot = AuctionSnapshot.objects.filter(auction_session_id=engine.session_id).first()
+    if snapshot is None:
+        return False
+
+    engine.load_state(snapshot.state)
+    replayed = 0
+    for event in AuctionEvent.objects.filter(id__gt=snapshot.last_event_id).order_by('id').iterator():
+        if not engine.apply_event(event):
+            logger.info('Journal replay stopped at event %s; rebuilding', event.id)
+            return False
+        replayed += 1
+
+    logger.debug('Session %s restored from snapshot @%s + %s events',
+                 engine.session_id, snapshot.last_event_id, replayed)
+    return True
@@ -0,0 +1,40 @@
+"""
+Channel layer for auction broadcasts
+
+channels_redis' default RedisChannelLayer stores a group as a sorted set
+of member channels, and group_send pushes the message onto one Redis list
+per member: a broadcast to N sockets is O(N) Redis work, on one Redis.
+
+With CHANNEL_LAYER_MODE=pubsub the auction uses
+channels_redis.pubsub.RedisPubSubChannelLayer instead. Each worker
+subscribes to a group once, however many of its sockets are in it, and a
+group_send is one PUBLISH; the worker fans the message out to its own
+sockets in memory. Groups and channels are spread over the Redis
+instances in REDIS_CHANNEL_URLS by consistent hashing. Messages are not
+stored: a worker that is not subscribed when a broadcast is published
+never sees it, which the seq/epoch resume (auction.feed) already covers.
+
+AuctionPubSubChannelLayer also decodes a group message once per worker
+rather than once per socket. Auction consumers only read broadcasts, so
+every socket in the worker can share the decoded message.
+
+`python manage.py auction_layer_bench` compares the two layers.
+"""
+
+from channels_redis.pubsub import RedisPubSubChannelLayer
+
+
+class AuctionPubSubChannelLayer(RedisPubSubChannelLayer):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._last_raw = None
+        self._last_message = None
+
+    def deserialize(self, message):
+        # A group publication is queued to every local member as the same
+        # bytes object, and the members read it one after another
+        if message is self._last_raw:
+            return self._last_message
+        decoded = super().deserialize(message)
+        self._last_raw, self._last_message = message, decoded
+        return decoded
@@ -0,0 +1,612 @@
+"""
+Live auction commands
+
+Shared by the auctioneer HTTP endpoints (auction.views) and the
+auctioneer command channel on the WebSocket (auction.consumers). Each
+command returns the response dict ({'success': ...}) and, on success,
+broadcasts the result to the auction room.
+
+Every command is for one live session (its room). Commands are
+serialised per session by a per-process lock, so that the order in which
+the engine accepts them is the order in which the room sees them;
+sessions run side by side. A session_id of None means the oldest live
+session (see auction.engine.resolve_session_id).
+"""
+
+import asyncio
+import weakref
+
+from asgiref.sync import sync_to_async
+from django.db import transaction
+from django.db.models import Exists, F, OuterRef
+
+from . import clock, journal, outbox, paddles
+from .engine import (
+    BidRejected, StaleBid, aget_live_engine, get_live_engine, invalidate_engines, loaded_engine,
+)
+from .feed import get_feed
+from .models import AuctionLog, AuctionSession, Bid, Player, Team
+from .persistence import StaleWrite, acknowledge_paddle_raises, persister, write_paddle_raise
+from .utils import (
+    STAFF_TEAM_FIELDS, abroadcast_bid_update, abroadcast_going_update, abroadcast_paddle_queue,
+)
+
+_command_locks = weakref.WeakKeyDictionary()
+
+
+def _command_lock(session_id):
+    # One lock per session per event loop (asyncio locks cannot be shared
+    # across loops)
+    loop = asyncio.get_running_loop()
+    locks = _command_locks.setdefault(loop, {})
+    lock = locks.get(session_id)
+    if lock is None:
+        lock = locks[session_id] = asyncio.Lock()
+    return lock
+
+
+async def place_bid(session_id, team_id, player_id, amount):
+    """Validate a bid against the session's live engine and broadcast it"""
+    try:
+        team_id = int(team_id)
+        player_id = int(player_id)
+        amount = int(amount)
+    except (TypeError, ValueError):
+        return {'success': False, 'message': 'Invalid bid amount'}
+
+    engine = await aget_live_engine(session_id)
+    if not engine:
+        return {'success': False, 'message': 'No active auction session'}
+
+    async with _command_lock(engine.session_id):
+        # Validated and applied in memory by the live engine; the Bid,
+        # Player and AuctionSession rows are written in the background.
+        engine = await aget_live_engine(engine.session_id)
+        if not engine:
+            return {'success': False, 'message': 'No active auction session'}
+
+        try:
+            bid = engine.place_bid(team_id, player_id, amount)
+        except StaleBid as e:
+            return {
+                'success': False,
+                'stale': True,
+                'message': str(e),
+                'next_bid': e.next_bid,
+            }
+        except BidRejected as e:
+            return {'success': False, 'message': str(e)}
+
+        bid_data = {
+            'success': True,
+            **bid,
+            'can_bid_teams': engine.eligible_team_ids(bid['next_bid']),
+            'server_time': clock.server_time(),
+            'next_call_at': clock.restart(engine.session_id, player_id),
+        }
+        await abroadcast_bid_update(engine.session_id, bid_data)
+
+        # The bid answers the team's raised paddle
+        if paddles.queue.acknowledge(engine.session_id, player_id, team_id):
+            persister.submit(acknowledge_paddle_raises, engine.session_id, player_id, team_id)
+            await abroadcast_paddle_queue(
+                engine.session_id, paddles.queue.view(engine.session_id, player_id)
+            )
+        return bid_data
+
+
+def _announce_lost_bid(exc):
+    """
+    Correct a room after a bid it was shown lost the race in the database
+
+    place_bid answers from the engine and the conditional write happens
+    behind it (auction.persistence), so another writer can still win the
+    lot's row. By then the engine has been rebuilt from the database
+    (auction.engine); the room gets a 'bid_rejected' through the outbox,
+    naming the bid that did not stand, and clients reload the lot.
+    """
+    if not isinstance(exc, StaleWrite) or exc.session_id is None:
+        return
+    engine = loaded_engine(exc.session_id)
+    if engine is None:
+        return
+    with engine.lock:
+        lot = engine.lot
+        if lot is None or lot.player_id != exc.player_id:
+            # The lot has closed; its settlement already told the room
+            return
+        team = engine.teams.get(exc.team_id)
+        data = {
+            'success': False,
+            'stale': True,
+            'player_id': exc.player_id,
+            'team_id': exc.team_id,
+            'team_name': team.name if team else '',
+            'amount': exc.amount,
+            'current_bid': lot.current_bid,
+            'last_bid_team_id': lot.last_bid_team_id,
+            'next_bid': lot.next_bid,
+            'message': str(StaleBid(lot.next_bid)),
+        }
+    with transaction.atomic():
+        outbox.enqueue(exc.session_id, 'bid_rejected', data)
+
+
+persister.on_failure(_announce_lost_bid)
+
+
+async def raise_paddle(session_id, team_id, player_id):
+    """
+    Queue a team's paddle raise for the auctioneer (see auction.paddles)
+
+    Not serialised with the auctioneer's commands: a raise only reads the
+    engine, and every push carries the whole queue.
+    """
+    try:
+        player_id = int(player_id)
+    except (TypeError, ValueError):
+        return {'success': False, 'message': 'Invalid player'}
+
+    engine = await aget_live_engine(session_id)
+    if not engine:
+        return {'success': False, 'message': 'No active auction session'}
+
+    try:
+        amount, team_name = engine.paddle_amount(team_id, player_id)
+        paddle = paddles.queue.raise_paddle(engine.session_id, player_id, team_id, team_name, amount)
+    except (BidRejected, paddles.PaddleRejected) as e:
+        return {'success': False, 'message': str(e)}
+
+    persister.submit(write_paddle_raise, engine.session_id, player_id, team_id, amount)
+    await abroadcast_paddle_queue(engine.session_id, paddles.queue.view(engine.session_id, player_id))
+    return {'success': True, 'player_id': player_id, **paddle}
+
+
+async def start_player(session_id, player_id):
+    """Put a player under the hammer in a session and broadcast the new lot"""
+    engine = await aget_live_engine(session_id)
+    if not engine:
+        return {'success': False, 'message': 'No active session'}
+
+    async with _command_lock(engine.session_id):
+        # Reloaded in case the engine was dropped while we waited
+        engine = await aget_live_engine(engine.session_id)
+        if not engine:
+            return {'success': False, 'message': 'No active session'}
+
+        try:
+            player = await Player.objects.select_related('user').aget(id=player_id, status='approved')
+        except (Player.DoesNotExist, ValueError):
+            return {'success': False, 'message': 'Player not found'}
+
+        await sync_to_async(engine.start_lot)(player)
+        next_call_at = clock.restart(engine.session_id, player.id)
+
+        player_data = {
+            'success': True,
+            'player': player_card(player),
+            'server_time': clock.server_time(),
+            'next_call_at': next_call_at,
+        }
+        try:
+            opened = await sync_to_async(open_lot)(engine.session_id, player.id, player_data)
+        except Exception:
+            clock.stop(engine.session_id)
+            invalidate_engines()
+            raise
+        if not opened:
+            # The engine already moved on to the player; forget it
+            clock.stop(engine.session_id)
+            invalidate_engines(engine.session_id)
+            return {'success': False, 'message': 'Player is being auctioned in another session'}
+        await outbox.relay(engine.session_id)
+        return player_data
+
+
+def open_lot(session_id, player_id, player_data):
+    """
+    Claim the player, point the session at it and enqueue the announcement
+
+    The claim is a conditional UPDATE that refuses a player another live
+    session has under the hammer; returns False (nothing written) then.
+    """
+    in_other_session = AuctionSession.objects.filter(
+        status='live', current_player_id=OuterRef('id'),
+    ).exclude(id=session_id)
+    with transaction.atomic():
+        claimed = Player.objects.filter(id=player_id, status='approved').filter(
+            ~Exists(in_other_session)
+        ).update(current_bid=0)
+        if not claimed:
+            return False
+        AuctionSession.objects.filter(id=session_id).update(
+            current_player_id=player_id,
+            last_bid_team=None,
+            bid_call_count=0,
+        )
+        outbox.enqueue(session_id, 'player_update', player_data)
+    return True
+
+
+def player_card(player):
+    """Everything a client needs to render the player under the hammer"""
+    user = player.user
+    player_data = {
+        'id': player.id,
+        'name': user.get_full_name(),
+        'initials': f'{user.first_name[:1]}{user.last_name[:1]}',
+        'category': player.get_category_display(),
+        'category_code': player.category,
+        'base_price': player.base_price,
+        'current_bid': 0,
+        'next_bid': player.base_price,
+        'photo': user.profile_picture.url if user.profile_picture else None,
+        'batting_style': player.batting_style,
+        'bowling_style': player.bowling_style,
+        'previous_team': player.previous_team,
+    }
+
+    if user.player_type == 'student':
+        player_data.update({
+            'player_type': 'Student',
+            'roll_number': user.roll_number or 'N/A',
+            'course': user.get_course_display() if user.course else 'N/A',
+            'branch': user.get_branch_display() if user.branch else 'N/A',
+            'year': user.get_year_of_study_display() if user.year_of_study else 'N/A',
+        })
+    elif user.player_type == 'faculty':
+        player_data.update({
+            'player_type': 'Faculty',
+            'branch': user.get_branch_display() if user.branch else 'N/A',
+        })
+    return player_data
+
+
+async def call_going(session_id, player_id=None, from_clock=False):
+    """
+    Advance a session's going-once/twice counter and broadcast it
+
+    The going clock (auction.clock) calls this on every tick, passing the
+    lot it was started for; a manual call restarts the clock.
+    """
+    engine = await aget_live_engine(session_id)
+    if not engine:
+        return {'success': False, 'message': 'No active session'}
+
+    async with _command_lock(engine.session_id):
+        engine = await aget_live_engine(engine.session_id)
+        if not engine:
+            return {'success': False, 'message': 'No active session'}
+
+        lot = engine.lot
+        if player_id is not None and (lot is None or lot.player_id != player_id):
+            return {'success': False, 'message': 'This player is not currently being auctioned'}
+
+        try:
+            call_count, call_text = engine.call_going()
+        except BidRejected as e:
+            return {'success': False, 'message': str(e)}
+
+        should_complete = call_count >= 3
+        if from_clock:
+            next_call_at = None if should_complete else clock.next_call_at()
+        elif should_complete:
+            clock.stop(engine.session_id)
+            next_call_at = None
+        else:
+            next_call_at = clock.restart(engine.session_id, lot.player_id)
+
+        going_data = {
+            'success': True,
+            'player_id': lot.player_id,
+            'call_count': call_count,
+            'call_text': call_text,
+            'should_complete': should_complete,
+            'server_time': clock.server_time(),
+            'next_call_at': next_call_at,
+        }
+        await abroadcast_going_update(engine.session_id, going_data)
+        return going_data
+
+
+async def complete_sale(session_id, player_id):
+    """
+    Mark a session's current player sold/unsold and broadcast the result
+
+    The settlement is transactional, so it runs in the sync thread; its
+    broadcast is written to the outbox in the same transaction and
+    relayed once it has committed.
+    """
+    engine = await aget_live_engine(session_id)
+    if not engine:
+        return {'success': False, 'message': 'No active session'}
+
+    async with _command_lock(engine.session_id):
+        try:
+            result_data = await sync_to_async(settle_lot)(engine.session_id, player_id)
+        except Player.DoesNotExist:
+            return {'success': False, 'message': 'Player not found'}
+        except Team.DoesNotExist:
+            return {'success': False, 'message': 'Team not found'}
+        except Exception:
+            invalidate_engines()
+            raise
+
+        if result_data['success']:
+            clock.stop(engine.session_id)
+            await outbox.relay(engine.session_id)
+        return result_data
+
+
+def settle_lot(session_id, player_id):
+    """
+    Settle the current lot; returns the response dict
+
+    No rows are locked up front. The transaction is a handful of
+    conditional UPDATEs: the player is claimed only while still
+    'approved', and the purse is debited only while it still covers the
+    amount. Whichever settle loses a race sees zero rows updated and
+    backs out.
+    """
+    engine = get_live_engine(session_id)
+    if not engine:
+        return {'success': False, 'message': 'No active session'}
+    # The sale must see every bid the engine has accepted
+    persister.flush()
+
+    session = AuctionSession.objects.filter(id=engine.session_id, status='live').first()
+    if not session:
+        return {'success': False, 'message': 'No active session'}
+    if not session.current_player_id:
+        return {
+            'success': False,
+            'message': 'No player currently being auctioned. Please select a player first.'
+        }
+    player = Player.objects.select_related('user').get(id=player_id)
+
+    # CRITICAL FIX: Check if player is already sold/unsold
+    if player.status in ['sold', 'unsold']:
+        return _already_processed(player.status)
+
+    # ADDITIONAL CHECK: Verify this is the current player
+    if session.current_player_id != player.id:
+        return {
+            'success': False,
+            'message': 'This player is not currently being auctioned'
+        }
+
+    winning_bid = Bid.objects.filter(
+        player=player,
+        auction_session=session
+    ).order_by('-amount').first()
+
+    if winning_bid:
+        # Player SOLD
+        team = Team.objects.get(id=winning_bid.team_id)
+
+        # Check team can still buy
+        if not team.can_buy_player():
+            return {
+                'success': False,
+                'message': f'{team.name} has reached maximum player limit'
+            }
+
+        with transaction.atomic():
+            # Mark player as SOLD at the winning bid (only if nobody settled it meanwhile)
+            claimed = Player.objects.filter(id=player.id, status='approved').update(
+                status='sold', team=team, current_bid=winning_bid.amount
+            )
+            if not claimed:
+                player.refresh_from_db(fields=['status'])
+                return _already_processed(player.status)
+
+            # Deduct from team purse (only if it still covers the amount)
+            debited = Team.objects.filter(
+                id=team.id, purse_remaining__gte=winning_bid.amount
+            ).update(purse_remaining=F('purse_remaining') - winning_bid.amount)
+            if not debited:
+                transaction.set_rollback(True)
+                return {
+                    'success': False,
+                    'message': f'{team.name} no longer has enough purse (someone else may have bought players)'
+                }
+
+            # Create auction log
+            AuctionLog.objects.create(
+                auction_session=session,
+                player=player,
+                winning_team=team,
+                final_amount=winning_bid.amount,
+                sold=True
+            )
+            event = journal.record(
+                'sold',
+                session_id=session.id,
+                player_id=player.id,
+                team_id=team.id,
+                amount=winning_bid.amount,
+                team=journal.team_state(team.id),
+            )
+
+            # Clear current player from session
+            _clear_current_player(session.id, player.id)
+
+            # The engine moves with the transaction; any failure from here
+            # on drops the engines (see complete_sale)
+            team.refresh_from_db(fields=['purse_remaining'])
+            engine.close_lot(team.id, winning_bid.amount)
+            journal.save_snapshot(engine, event.id)
+            team_state = engine.teams.get(team.id)
+
+            result_data = {
+                'success': True,
+                'sold': True,
+                'team_name': team.name,
+                'team_id': team.id,
+                'amount': winning_bid.amount,
+                'player_name': player.user.get_full_name(),
+                'player_id': player.id,
+                'player_category': player.get_category_display(),
+                'team_purse_remaining': team.purse_remaining,
+                'team_players_count': team_state.regular_count + team_state.iconic_count if team_state else None,
+                'team_slots_remaining': team_state.slots_remaining() if team_state else None,
+            }
+            outbox.enqueue(session.id, 'bidding_end', result_data)
+        return result_data
+    else:
+        with transaction.atomic():
+            # Player UNSOLD
+            claimed = Player.objects.filter(id=player.id, status='approved').update(
+                status='unsold'
+            )
+            if not claimed:
+                player.refresh_from_db(fields=['status'])
+                return _already_processed(player.status)
+
+            # Create auction log
+            AuctionLog.objects.create(
+                auction_session=session,
+                player=player,
+                final_amount=player.base_price,
+                sold=False
+            )
+            event = journal.record('unsold', session_id=session.id, player_id=player.id)
+
+            # Clear current player from session
+            _clear_current_player(session.id, player.id)
+
+            engine.close_lot()
+            journal.save_snapshot(engine, event.id)
+
+            result_data = {
+                'success': True,
+                'sold': False,
+                'player_name': player.user.get_full_name(),
+                'player_id': player.id,
+            }
+            outbox.enqueue(session.id, 'bidding_end', result_data)
+        return result_data
+
+
+def _already_processed(status):
+    return {
+        'success': False,
+        'message': f'Player already {status}! Cannot process again.',
+        'already_processed': True
+    }
+
+
+def _clear_current_player(session_id, player_id):
+    # Only clear the session if it still points at the settled player
+    AuctionSession.objects.filter(id=session_id, current_player_id=player_id).update(
+        current_player=None,
+        last_bid_team=None,
+        bid_call_count=0,
+    )
+
+
+def resume(session_id, since, epoch=None, staff=False, team_id=None):
+    """
+    Catch-up for a client of a session's room that last saw broadcast `since`
+
+    Returns {'epoch', 'seq', 'events'} with the missed broadcasts while the
+    feed still buffers them, else {'epoch', 'seq', 'snapshot'}. `seq` is
+    the position the client is at afterwards. The snapshot is the
+    client's audience view (see auction_state).
+    """
+    # Read the position first: anything broadcast while the snapshot is
+    # being built has a higher seq and will still be applied by the client
+    feed = get_feed(session_id)
+    seq = feed.seq
+    events = feed.since(since, epoch) if since is not None else None
+    if events is not None:
+        return {
+            'epoch': feed.epoch,
+            'seq': events[-1]['seq'] if events else seq,
+            'events': events,
+        }
+
+    return {
+        'epoch': feed.epoch,
+        'seq': seq,
+        'snapshot': auction_state(session_id, staff, team_id),
+    }
+
+
+def auction_state(session_id, staff=False, team_id=None):
+    """
+    Self-contained snapshot of a live session for (re)syncing clients
+
+    Served from the engine and the feed; the database is only read for a
+    lot the feed has not broadcast (e.g. after a restart). Like the public
+    stream, it leaves other teams' purse, slots and eligibility out unless
+    it is for `staff`; `team_id` keeps them for the owner's own team.
+    """
+    engine = get_live_engine(session_id) if session_id is not None else None
+    if engine is None:
+        return {'live': False, 'player': None, 'bids': [], 'teams': []}
+
+    with engine.lock:
+        lot = engine.lot
+        lot_state = None
+        if lot:
+            lot_state = {
+                'player_id': lot.player_id,
+                'current_bid': lot.current_bid,
+                'next_bid': lot.next_bid,
+                'last_bid_team_id': lot.last_bid_team_id,
+                'going_count': lot.going_count,
+            }
+        next_bid = lot.next_bid if lot else 0
+        teams = [
+            {
+                'id': team.id,
+                'name': team.name,
+                'purse_remaining': team.purse_remaining,
+                'players_count': team.regular_count + team.iconic_count,
+                'max_players': team.max_players,
+                'slots_remaining': team.slots_remaining(),
+                'can_bid': bool(lot) and team.can_bid(next_bid),
+            }
+            for team in engine.teams.values()
+        ]
+    if not staff:
+        teams = [
+            team if team['id'] == team_id else {
+                key: value for key, value in team.items() if key not in STAFF_TEAM_FIELDS
+            }
+            for team in teams
+        ]
+
+    card, bids = None, []
+    if lot_state:
+        view = get_feed(engine.session_id).lot_view(lot_state['player_id'])
+        if view is not None:
+            card, bids = view
+        else:
+            player = Player.objects.select_related('user').get(id=lot_state['player_id'])
+            card = player_card(player)
+            bids = [
+                {
+                    'team_id': bid['team_id'],
+                    'team_name': bid['team__name'],
+                    'amount': bid['amount'],
+                    'timestamp': bid['timestamp'].isoformat(),
+                }
+                for bid in Bid.objects.filter(
+                    auction_session_id=engine.session_id,
+                    player_id=player.id,
+                ).order_by('amount').values('team_id', 'team__name', 'amount', 'timestamp')
+            ]
+        card['current_bid'] = lot_state['current_bid']
+        card['next_bid'] = lot_state['next_bid']
+
+    return {
+        'live': True,
+        'session_id': engine.session_id,
+        'player': card,
+        'last_bid_team_id': lot_state['last_bid_team_id'] if lot_state else None,
+        'going_count': lot_state['going_count'] if lot_state else 0,
+        'bids': bids,
+        'teams': teams,
+    }
@@ -0,0 +1,94 @@
+"""
+Benchmark the auction broadcast path
+
+Fans a realistic bid_update out to N AuctionConsumer handlers the way
+channels_redis delivers it to one worker: the layer message is msgpack
+encoded once per worker, decoded once, and the same dict is handed to
+every local channel. Compares the old path (every socket json.dumps the
+event) with the serialize-once path (auction.utils encodes once,
+handlers forward the text).
+
+    python manage.py auction_broadcast_bench --connections 10 100 1000
+"""
+
+import asyncio
+import json
+import time
+
+import msgpack
+from django.core.management.base import BaseCommand
+
+from auction import wire
+from auction.consumers import AuctionConsumer
+
+
+def sample_bid(seq):
+    return {
+        'type': 'bid_update',
+        'seq': seq,
+        'epoch': 'bench',
+        'data': {
+            'success': True,
+            'team_name': 'Thunder Strikers',
+            'team_id': 3,
+            'player_id': 42,
+            'player_name': 'Rahul Sharma',
+            'amount': 750,
+            'next_bid': 850,
+            'purse_remaining': 8250,
+            'team_slots_remaining': 9,
+            'timestamp': '2026-01-01T10:00:00+00:00',
+            'can_bid_teams': list(range(1, 11)),
+            'server_time': 1767261600000,
+            'next_call_at': 1767261605000,
+        },
+    }
+
+
+class Command(BaseCommand):
+    help = 'Measure CPU per broadcast for per-socket vs serialize-once encoding'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--connections', type=int, nargs='+', default=[10, 100, 1000])
+        parser.add_argument('--broadcasts', type=int, default=50)
+
+    def handle(self, *args, **options):
+        sample = sample_bid(1)
+        self.stdout.write(
+            f'bid_update frame: {len(json.dumps(sample))} bytes JSON, '
+            f'{len(wire.encode(sample))} bytes {wire.SUBPROTOCOL}'
+        )
+        self.stdout.write(f"{'sockets':>8} {'path':>15} {'us/broadcast':>14} {'us/socket':>10}")
+        for connections in options['connections']:
+            for path in ('per-socket', 'serialize-once'):
+                cpu = asyncio.run(self.run(path, connections, options['broadcasts']))
+                per_broadcast = cpu / options['broadcasts'] * 1e6
+                self.stdout.write(
+                    f'{connections:>8} {path:>15} {per_broadcast:>14.0f} '
+                    f'{per_broadcast / connections:>10.2f}'
+                )
+
+    async def run(self, path, connections, broadcasts):
+        consumers = []
+        for _ in range(connections):
+            consumer = AuctionConsumer()
+            consumer.base_send = self.discard
+            consumers.append(consumer)
+
+        started = time.process_time()
+        for seq in range(1, broadcasts + 1):
+            message = sample_bid(seq)
+            if path == 'per-socket':
+                event = msgpack.unpackb(msgpack.packb(message))
+                for consumer in consumers:
+                    await consumer.send(text_data=json.dumps(event))
+            else:
+                layer_message = {'type': 'bid_update', 'text': json.dumps(message)}
+                event = msgpack.unpackb(msgpack.packb(layer_message))
+                for consumer in consumers:
+                    await consumer.forward(event)
+        return time.process_time() - started
+
+    @staticmethod
+    async def discard(message):
+        pass
@@ -0,0 +1,141 @@
+"""
+Benchmark channel layer broadcast cost
+
+Puts N channels of this process in one group on each layer, the way a
+worker's auction sockets sit in the public group, and times group_send
+of a bid_update until every channel has received it:
+
+- lists:  channels_redis.core.RedisChannelLayer (one list push per member)
+- pubsub: auction.layers.AuctionPubSubChannelLayer (one PUBLISH, fanned
+  out in the worker)
+
+Redis work is read from INFO commandstats on every host in
+REDIS_CHANNEL_URLS, so it includes the commands run inside the lists
+layer's Lua script and the receivers' pops. Needs the Redis instances to
+be reachable; keys are written under a throwaway prefix and flushed.
+
+    python manage.py auction_layer_bench --connections 100 1000 10000
+"""
+
+import asyncio
+import time
+import uuid
+
+from channels_redis.core import RedisChannelLayer
+from channels_redis.utils import decode_hosts
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from redis import asyncio as aioredis
+
+from auction.layers import AuctionPubSubChannelLayer
+from auction.management.commands.auction_broadcast_bench import sample_bid
+
+LAYERS = {
+    'lists': RedisChannelLayer,
+    'pubsub': AuctionPubSubChannelLayer,
+}
+
+GROUP = 'auction_public'
+
+
+def percentile(ordered, pct):
+    if not ordered:
+        return 0.0
+    return ordered[min(len(ordered) - 1, round(pct / 100 * (len(ordered) - 1)))]
+
+
+class Command(BaseCommand):
+    help = 'Compare group_send cost of the Redis list and pub/sub channel layers'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--connections', type=int, nargs='+', default=[100, 1000, 10000])
+        parser.add_argument('--broadcasts', type=int, default=50)
+        parser.add_argument('--layers', nargs='+', choices=list(LAYERS), default=list(LAYERS))
+
+    def handle(self, *args, **options):
+        hosts = settings.REDIS_CHANNEL_URLS
+        self.stdout.write(f"{len(hosts)} Redis host(s): {', '.join(hosts)}")
+        self.stdout.write(
+            f"{'sockets':>8} {'layer':>7} {'send ms':>8} {'p50 ms':>8} {'max ms':>8} "
+            f"{'redis cmds':>11} {'cpu ms':>8}"
+        )
+        for connections in options['connections']:
+            for name in options['layers']:
+                result = asyncio.run(self.run(name, hosts, connections, options['broadcasts']))
+                self.stdout.write(
+                    f"{connections:>8} {name:>7} {result['send']:>8.2f} {result['p50']:>8.1f} "
+                    f"{result['max']:>8.1f} {result['commands']:>11.0f} {result['cpu']:>8.2f}"
+                )
+        self.stdout.write('(per broadcast: group_send time, delivery to all sockets, Redis commands, process CPU)')
+
+    async def run(self, name, hosts, connections, broadcasts):
+        layer = LAYERS[name](hosts=hosts, prefix=f'bench{uuid.uuid4().hex[:8]}')
+        channels = [await layer.new_channel() for _ in range(connections)]
+        for channel in channels:
+            await layer.group_add(GROUP, channel)
+
+        pending = {}
+        readers = [
+            asyncio.create_task(self.read(layer, channel, pending))
+            for channel in channels
+        ]
+        # Let every receiver subscribe / start popping
+        await asyncio.sleep(0.5)
+
+        commands_before = await self.command_count(hosts)
+        cpu_started = time.process_time()
+        send_times = []
+        delivery_times = []
+        for seq in range(1, broadcasts + 1):
+            done = asyncio.get_running_loop().create_future()
+            pending[seq] = [connections, done]
+            started = time.perf_counter()
+            await layer.group_send(GROUP, {'type': 'bid_update', **sample_bid(seq)})
+            send_times.append(time.perf_counter() - started)
+            try:
+                await asyncio.wait_for(done, 30)
+            except asyncio.TimeoutError:
+                self.stderr.write(f'{name}: broadcast {seq} reached {connections - pending[seq][0]} sockets')
+            delivery_times.append(time.perf_counter() - started)
+        cpu = time.process_time() - cpu_started
+        commands = await self.command_count(hosts) - commands_before
+
+        for reader in readers:
+            reader.cancel()
+        await asyncio.gather(*readers, return_exceptions=True)
+        for channel in channels:
+            await layer.group_discard(GROUP, channel)
+        await layer.flush()
+
+        delivery_times.sort()
+        return {
+            'send': sum(send_times) / broadcasts * 1000,
+            'p50': percentile(delivery_times, 50) * 1000,
+            'max': percentile(delivery_times, 100) * 1000,
+            'commands': commands / broadcasts,
+            'cpu': cpu / broadcasts * 1000,
+        }
+
+    @staticmethod
+    async def read(layer, channel, pending):
+        while True:
+            message = await layer.receive(channel)
+            entry = pending.get(message['seq'])
+            if entry is None:
+                continue
+            entry[0] -= 1
+            if entry[0] == 0:
+                entry[1].set_result(None)
+
+    @staticmethod
+    async def command_count(hosts):
+        """Commands executed so far, summed over the hosts"""
+        total = 0
+        for host in decode_hosts(hosts):
+            client = aioredis.Redis.from_url(host['address'])
+            try:
+                stats = await client.info('commandstats')
+            finally:
+                await client.aclose()
+            total += sum(entry['calls'] for entry in stats.values())
+        return total
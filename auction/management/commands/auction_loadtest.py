@@ -0,0 +1,291 @@
+"""
+Load-test the live auction WebSocket fan-out
+
+Builds a throwaway auction in a test database (teams, owners, players and
+a live session), connects simulated owner and spectator clients to
+the session's room, ws/auction/<session_id>/, and drives bids through the real auctioneer_quick_bid view.
+Every client times each bid_update it receives against the moment the
+bid was posted, so the report covers the whole path: view, live engine,
+feed, channel layer, consumer and send queue.
+
+    python manage.py auction_loadtest --owners 200 --spectators 1000 --bids 300 --rate 20
+    python manage.py auction_loadtest --layer redis      # the configured CHANNEL_LAYERS
+
+Clients run in this process through channels' WebsocketCommunicator (no
+sockets, no auth middleware), so they share the worker's CPU, as they
+would share a daphne worker's. Spectators get coalesced bids (see
+auction.utils), so they see fewer bid_updates than owners. The going
+clock is switched off for the run.
+"""
+
+import asyncio
+import json
+import os
+import resource
+import time
+
+from channels.routing import URLRouter
+from channels.testing import WebsocketCommunicator
+from django.contrib.auth.models import AnonymousUser
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test import AsyncClient
+from django.test.utils import override_settings, setup_test_environment, teardown_test_environment
+
+from auction import clock, routing, sendqueue, wire
+from auction.engine import invalidate_engines
+
+
+def rss_mb():
+    """Resident memory of this process (peak RSS where /proc is missing)"""
+    try:
+        with open('/proc/self/statm') as statm:
+            return int(statm.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / 2 ** 20
+    except OSError:
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def percentile(ordered, pct):
+    if not ordered:
+        return 0.0
+    return ordered[min(len(ordered) - 1, round(pct / 100 * (len(ordered) - 1)))]
+
+
+class Client:
+    """One simulated browser: reads frames and times bid_updates"""
+
+    def __init__(self, audience, user, binary, sent_at, session_id):
+        self.audience = audience
+        self.binary = binary
+        self.sent_at = sent_at
+        self.communicator = WebsocketCommunicator(
+            URLRouter(routing.websocket_urlpatterns), f'/ws/auction/{session_id}/',
+            subprotocols=[wire.SUBPROTOCOL] if binary else None,
+        )
+        self.communicator.scope['user'] = user
+        self.frames = 0
+        self.latencies = []
+        self.last_amount = 0
+        self.task = None
+
+    async def connect(self):
+        connected, _ = await self.communicator.connect()
+        if not connected:
+            raise RuntimeError(f'{self.audience} client was refused')
+        self.task = asyncio.get_running_loop().create_task(self.read())
+
+    async def read(self):
+        while True:
+            output = await self.communicator.receive_output(timeout=3600)
+            if output['type'] != 'websocket.send':
+                return
+            received = time.perf_counter()
+            self.frames += 1
+            if output.get('bytes') is not None:
+                message = wire.decode(output['bytes'])
+            else:
+                message = json.loads(output['text'])
+            if message.get('type') != 'bid_update':
+                continue
+            amount = message['data']['amount']
+            self.last_amount = max(self.last_amount, amount)
+            if amount in self.sent_at:
+                self.latencies.append((received - self.sent_at[amount]) * 1000)
+
+    async def close(self):
+        if self.task is not None:
+            self.task.cancel()
+        await self.communicator.disconnect()
+
+
+class Command(BaseCommand):
+    help = 'Measure broadcast latency, throughput and memory for simulated auction clients'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--owners', type=int, default=100, help='Team owner clients')
+        parser.add_argument('--spectators', type=int, default=500, help='Anonymous clients')
+        parser.add_argument('--teams', type=int, default=8)
+        parser.add_argument('--bids', type=int, default=200)
+        parser.add_argument('--rate', type=float, default=20, help='Bids per second (0 = as fast as possible)')
+        parser.add_argument('--binary', action='store_true', help=f'Clients use {wire.SUBPROTOCOL}')
+        parser.add_argument('--layer', choices=['memory', 'redis'], default='memory',
+                            help='In-memory channel layer, or the configured CHANNEL_LAYERS')
+        parser.add_argument('--keepdb', action='store_true', help='Keep the test database')
+
+    def handle(self, *args, **options):
+        overrides = {'DEBUG': False, 'AUCTION_GOING_INTERVAL': 0}
+        if options['layer'] == 'memory':
+            overrides['CHANNEL_LAYERS'] = {
+                'default': {'BACKEND': 'channels.layers.InMemoryChannelLayer'},
+            }
+
+        setup_test_environment()
+        old_name = connection.settings_dict['NAME']
+        connection.creation.create_test_db(verbosity=0, autoclobber=True, keepdb=options['keepdb'])
+        try:
+            with override_settings(**overrides):
+                invalidate_engines()
+                fixtures = self.build_auction(options['teams'], options['bids'])
+                asyncio.run(self.run(fixtures, options))
+        finally:
+            invalidate_engines()
+            connection.creation.destroy_test_db(old_name, verbosity=0, keepdb=options['keepdb'])
+            teardown_test_environment()
+
+    def build_auction(self, team_count, bids):
+        from auction.models import AuctionSession, Player, Team, User
+
+        def user(username, user_type, **fields):
+            return User.objects.create_user(
+                username=username, password=None, user_type=user_type,
+                first_name=username, last_name='Load', **fields
+            )
+
+        # Purses deep enough that no team drops out over the run
+        teams = [
+            Team.objects.create(
+                name=f'Load Team {i}', owner=user(f'load_owner_{i}', 'team_owner'),
+                purse_remaining=bids * 1000, total_purse=bids * 1000, max_players=15,
+            )
+            for i in range(team_count)
+        ]
+        player = Player.objects.create(
+            user=user('load_player', 'player', player_type='student'),
+            category='batsman', base_price=100, status='approved',
+        )
+        session = AuctionSession.objects.create(name='Load test', status='live')
+        return {
+            'auctioneer': user('load_auctioneer', 'auctioneer'),
+            'teams': teams,
+            'owners': [team.owner for team in teams],
+            'player': player,
+            'session': session,
+        }
+
+    async def run(self, fixtures, options):
+        sent_at = {}
+        session_id = fixtures['session'].id
+        auctioneer = AsyncClient()
+        await auctioneer.aforce_login(fixtures['auctioneer'])
+        started = await auctioneer.post(
+            '/auctioneer/start-player/',
+            {'session_id': session_id, 'player_id': fixtures['player'].id}, secure=True
+        )
+        if not started.json().get('success'):
+            raise RuntimeError(f"Could not start the lot: {started.json().get('message')}")
+
+        # Connect
+        baseline = rss_mb()
+        owners = fixtures['owners']
+        clients = [
+            Client('owner', owners[i % len(owners)], options['binary'], sent_at, session_id)
+            for i in range(options['owners'])
+        ] + [
+            Client('spectator', AnonymousUser(), options['binary'], sent_at, session_id)
+            for _ in range(options['spectators'])
+        ]
+        connect_started = time.perf_counter()
+        for client in clients:
+            await client.connect()
+        connect_time = time.perf_counter() - connect_started
+        connected = rss_mb()
+        for client in clients:
+            client.frames = 0
+
+        # Bid
+        teams = fixtures['teams']
+        player_id = fixtures['player'].id
+        next_bid = fixtures['player'].base_price
+        interval = 1 / options['rate'] if options['rate'] > 0 else 0
+        rejected = 0
+        bid_started = time.perf_counter()
+        for i in range(options['bids']):
+            due = bid_started + i * interval
+            delay = due - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            sent_at[next_bid] = time.perf_counter()
+            response = await auctioneer.post('/auctioneer/quick-bid/', {
+                'session_id': session_id,
+                'team_id': teams[i % len(teams)].id,
+                'player_id': player_id,
+                'amount': next_bid,
+            }, secure=True)
+            result = response.json()
+            if result.get('success'):
+                next_bid = result['next_bid']
+            else:
+                rejected += 1
+                next_bid = result.get('next_bid', next_bid)
+        bidding_time = time.perf_counter() - bid_started
+
+        # Wait for the owners to see the last bid (spectators get it coalesced)
+        last_amount = max(sent_at)
+        drain_deadline = time.perf_counter() + 10
+        while time.perf_counter() < drain_deadline:
+            if all(c.last_amount >= last_amount for c in clients if c.audience == 'owner'):
+                break
+            await asyncio.sleep(0.05)
+        await asyncio.sleep(0.2)
+        elapsed = time.perf_counter() - bid_started
+        peak = rss_mb()
+
+        queues = [queue.stats() for queue in sendqueue.connections]
+        for client in clients:
+            await client.close()
+        clock.stop(session_id)
+
+        self.report(clients, queues, options, {
+            'baseline': baseline,
+            'connected': connected,
+            'peak': peak,
+            'connect_time': connect_time,
+            'bidding_time': bidding_time,
+            'elapsed': elapsed,
+            'rejected': rejected,
+        })
+
+    def report(self, clients, queues, options, run):
+        sockets = len(clients)
+        frames = sum(client.frames for client in clients)
+        accepted = options['bids'] - run['rejected']
+
+        self.stdout.write(
+            f"{options['owners']} owners + {options['spectators']} spectators, "
+            f"{options['layer']} layer, {'msgpack' if options['binary'] else 'JSON'} frames"
+        )
+        self.stdout.write(
+            f"connect: {run['connect_time']:.2f}s ({run['connect_time'] / max(sockets, 1) * 1000:.2f} ms/socket)"
+        )
+        self.stdout.write(
+            f"bids: {accepted} accepted, {run['rejected']} rejected, "
+            f"{accepted / run['bidding_time']:.1f} bids/s"
+        )
+        self.stdout.write(
+            f"delivered: {frames} frames in {run['elapsed']:.2f}s, {frames / run['elapsed']:.0f} msgs/s"
+        )
+
+        self.stdout.write(f"{'audience':>10} {'clients':>8} {'bid frames':>11} "
+                          f"{'p50 ms':>8} {'p90 ms':>8} {'p99 ms':>8} {'max ms':>8}")
+        for audience in ('owner', 'spectator'):
+            group = [client for client in clients if client.audience == audience]
+            if not group:
+                continue
+            latencies = sorted(latency for client in group for latency in client.latencies)
+            self.stdout.write(
+                f'{audience:>10} {len(group):>8} {len(latencies):>11} '
+                f'{percentile(latencies, 50):>8.1f} {percentile(latencies, 90):>8.1f} '
+                f'{percentile(latencies, 99):>8.1f} {percentile(latencies, 100):>8.1f}'
+            )
+
+        self.stdout.write(
+            f"send queues: max depth {max((q['max_depth'] for q in queues), default=0)}, "
+            f"superseded {sum(q['superseded'] for q in queues)}, "
+            f"dropped {sum(q['dropped'] for q in queues)}, "
+            f"resyncs {sum(q['resyncs'] for q in queues)}"
+        )
+        per_socket = (run['connected'] - run['baseline']) * 1024 / max(sockets, 1)
+        self.stdout.write(
+            f"memory: {run['baseline']:.0f} MB before, {run['connected']:.0f} MB connected "
+            f"({per_socket:.1f} KB/socket), {run['peak']:.0f} MB after bidding"
+        )
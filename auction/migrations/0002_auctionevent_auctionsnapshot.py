@@ -0,0 +1,44 @@
+# Generated by Django 5.2.8 on 2026-10-17 10:12
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auction', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AuctionEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('event_type', models.CharField(choices=[('lot_started', 'Lot Started'), ('bid', 'Bid'), ('going', 'Going'), ('sold', 'Sold'), ('unsold', 'Unsold'), ('iconic_assigned', 'Iconic Assigned'), ('team_reset', 'Team Reset'), ('team_updated', 'Team Updated')], max_length=20)),
+                ('player_id', models.IntegerField(blank=True, null=True)),
+                ('team_id', models.IntegerField(blank=True, null=True)),
+                ('amount', models.IntegerField(default=0)),
+                ('data', models.JSONField(blank=True, default=dict)),
+                ('timestamp', models.DateTimeField(auto_now_add=True)),
+                ('auction_session', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='events', to='auction.auctionsession')),
+            ],
+            options={
+                'ordering': ['id'],
+                'indexes': [models.Index(fields=['auction_session', 'id'], name='auction_auc_auction_b54ba3_idx')],
+            },
+        ),
+        migrations.CreateModel(
+            name='AuctionSnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('last_event_id', models.BigIntegerField(default=0)),
+                ('state', models.JSONField(default=dict)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('auction_session', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='snapshots', to='auction.auctionsession')),
+            ],
+            options={
+                'ordering': ['-last_event_id'],
+            },
+        ),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 5.2.8 on 2026-10-17 18:05
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def drop_pending(apps, schema_editor):
+    # Unsent broadcasts predate rooms and cannot be routed to one; clients
+    # catch up through the resync endpoint instead
+    apps.get_model('auction', 'OutboxMessage').objects.all().delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auction', '0003_outboxmessage'),
+    ]
+
+    operations = [
+        migrations.RunPython(drop_pending, migrations.RunPython.noop),
+        migrations.AddField(
+            model_name='outboxmessage',
+            name='session',
+            field=models.ForeignKey(default=0, on_delete=django.db.models.deletion.CASCADE, related_name='outbox_messages', to='auction.auctionsession'),
+            preserve_default=False,
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 5.2.8 on 2026-10-17 01:16
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auction', '0004_outboxmessage_session'),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name='player',
+            name='assigned_at',
+        ),
+        migrations.RemoveField(
+            model_name='player',
+            name='is_iconic',
+        ),
+        migrations.RemoveField(
+            model_name='team',
+            name='iconic_players_count',
+        ),
+    ]
@@ -0,0 +1,20 @@
+# Generated by Django 5.2.8 on 2026-10-17 01:39
+
+import auction.models
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auction', '0005_remove_iconic_columns'),
+    ]
+
+    operations = [
+        migrations.AlterModelManagers(
+            name='user',
+            managers=[
+                ('objects', auction.models.UserManager()),
+            ],
+        ),
+    ]
@@ -1,7 +1,35 @@
 from django.db import models
-from django.contrib.auth.models import AbstractUser
+from django.db.models import Count, F, Q
+from django.contrib.auth.models import AbstractUser, UserManager as BaseUserManager
 from django.core.validators import MinValueValidator, MaxValueValidator
 from cloudinary.models import CloudinaryField
+
+
+class UserQuerySet(models.QuerySet):
+    # Columns a cached socket identity depends on (auction.wsauth)
+    WSAUTH_FIELDS = {'password', 'is_active', 'user_type', 'suspended'}
+
+    def update(self, **kwargs):
+        """
+        Bulk update that also drops the cached socket auth of the users
+
+        Only when a column in WSAUTH_FIELDS moves; save() covers single
+        users, this the writes that bypass it (admin actions, scripts).
+        """
+        if not self.WSAUTH_FIELDS & kwargs.keys():
+            return super().update(**kwargs)
+        user_ids = list(self.values_list('id', flat=True))
+        updated = super().update(**kwargs)
+        from .wsauth import invalidate_user
+        for user_id in user_ids:
+            invalidate_user(user_id)
+        return updated
+
+
+class UserManager(BaseUserManager.from_queryset(UserQuerySet)):
+    pass
+
+
 class User(AbstractUser):
     USER_TYPES = (
         ('player', 'Player'),
@@ -62,9 +90,22 @@ class User(AbstractUser):
         blank=True, 
         related_name='suspended_users'
     )
+    
+    objects = UserManager()
+    
     class Meta:
         db_table = 'auth_user'
     
+    def save(self, *args, **kwargs):
+        # set_password() leaves the raw password in _password until saved
+        password_changed = self._password is not None and not self._state.adding
+        super().save(*args, **kwargs)
+        if password_changed:
+            # Sockets must not keep authenticating with the old password's
+            # sessions (channels' session hash check is skipped on a cache hit)
+            from .wsauth import invalidate_user
+            invalidate_user(self.id)
+    
     def suspend_user(self, admin_user, reason=""):
         """Suspend this user"""
         self.suspended = True
@@ -74,6 +115,8 @@ class User(AbstractUser):
         from django.utils import timezone
         self.suspended_at = timezone.now()
         self.save()
+        from .wsauth import invalidate_user
+        invalidate_user(self.id)
     
     def unsuspend_user(self):
         """Restore user access"""
@@ -83,6 +126,33 @@ class User(AbstractUser):
         self.suspended_by = None
         self.suspended_at = None
         self.save()
+        from .wsauth import invalidate_user
+        invalidate_user(self.id)
+
+class TeamQuerySet(models.QuerySet):
+    def with_eligibility(self):
+        """
+        Annotate squad size and iconic-adjusted slots for every team in one query
+        
+        Iconic (faculty) players reduce the squad limit, so
+        slots_left = (max_players - iconic_count) - regular_count.
+        """
+        return self.annotate(
+            player_count=Count('players'),
+            iconic_count=Count('players', filter=Q(players__user__player_type='faculty')),
+        ).annotate(
+            regular_count=F('player_count') - F('iconic_count'),
+            slots_left=F('max_players') - F('player_count'),
+        )
+    
+    def eligible_for(self, amount):
+        """Teams with a free slot and at least `amount` in the purse"""
+        return self.with_eligibility().filter(slots_left__gt=0, purse_remaining__gte=amount)
+
+    def of_users(self, users):
+        """Teams owned by these users or with one of them in the squad"""
+        return self.filter(Q(owner__in=users) | Q(players__user__in=users)).distinct()
+
 
 class Team(models.Model):
     name = models.CharField(max_length=100, unique=True)
@@ -95,6 +165,8 @@ class Team(models.Model):
     max_players = models.IntegerField(default=16)
     created_at = models.DateTimeField(auto_now_add=True)
     
+    objects = TeamQuerySet.as_manager()
+    
     def __str__(self):
         return self.name
     
@@ -233,7 +305,79 @@ class AuctionLog(models.Model):
         if self.sold:
             return f"{self.player.user.get_full_name()} sold to {self.winning_team.name} for {self.final_amount}"
         return f"{self.player.user.get_full_name()} unsold at {self.final_amount}"
-    
+
+
+class AuctionEvent(models.Model):
+    """
+    Append-only journal of everything that moves live auction state
+
+    The id is the journal position. Team events carry the team's absolute
+    counters in `data`, so replaying one twice is harmless. Events that
+    are not tied to a session (iconic assignment, team reset) have no
+    auction_session and are replayed into every session.
+    """
+    EVENT_TYPES = (
+        ('lot_started', 'Lot Started'),
+        ('bid', 'Bid'),
+        ('going', 'Going'),
+        ('sold', 'Sold'),
+        ('unsold', 'Unsold'),
+        ('iconic_assigned', 'Iconic Assigned'),
+        ('team_reset', 'Team Reset'),
+        ('team_updated', 'Team Updated'),
+    )
+
+    auction_session = models.ForeignKey(AuctionSession, on_delete=models.CASCADE, null=True, blank=True, related_name='events')
+    event_type = models.CharField(max_length=20, choices=EVENT_TYPES)
+    # Plain ids: the journal outlives deleted players/teams
+    player_id = models.IntegerField(null=True, blank=True)
+    team_id = models.IntegerField(null=True, blank=True)
+    amount = models.IntegerField(default=0)
+    data = models.JSONField(default=dict, blank=True)
+    timestamp = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['id']
+        indexes = [
+            models.Index(fields=['auction_session', 'id']),
+        ]
+
+    def __str__(self):
+        return f"#{self.id} {self.event_type}"
+
+
+class AuctionSnapshot(models.Model):
+    """Live engine state as of a journal position"""
+    auction_session = models.ForeignKey(AuctionSession, on_delete=models.CASCADE, related_name='snapshots')
+    last_event_id = models.BigIntegerField(default=0)
+    state = models.JSONField(default=dict)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['-last_event_id']
+
+    def __str__(self):
+        return f"{self.auction_session.name} @ {self.last_event_id}"
+
+
+class OutboxMessage(models.Model):
+    """
+    A broadcast written in the transaction whose result it announces
+
+    Relayed to the session's room in id order once committed, then
+    deleted (see auction.outbox).
+    """
+    session = models.ForeignKey(AuctionSession, on_delete=models.CASCADE, related_name='outbox_messages')
+    event_type = models.CharField(max_length=20)
+    data = models.JSONField(default=dict)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['id']
+
+    def __str__(self):
+        return f"#{self.id} {self.event_type}"
+
 # Add to auction/models.py
 
 class TournamentBanner(models.Model):
@@ -0,0 +1,175 @@
+"""
+Transactional outbox for auction broadcasts
+
+Commands that settle state in a transaction (a lot opened, sold or
+unsold) do not broadcast from inside it. They enqueue() the broadcast as
+an OutboxMessage row in the same transaction, so it exists exactly when
+the rows it describes committed: a rolled-back sale is never announced,
+and no channel-layer round trip happens while the transaction is open.
+
+After the commit the command awaits relay(session_id), which sends the
+session's pending rows in id order, a batch at a time. A batch is
+claimed with SELECT ... FOR UPDATE NOWAIT and deleted before it is sent,
+in a transaction that commits after the sends: only one worker relays a
+session at a time, so the order holds across workers, and a relay that
+dies part-way rolls back and its batch is sent again (at least once).
+Sessions never wait on each other's rows. Each worker also runs a
+dispatcher that relays rows committed elsewhere or left behind, for the
+sessions whose engine it holds (so a room's broadcasts are stamped by
+the feed of the worker running it): it is woken on commit and polls
+every AUCTION_OUTBOX_POLL seconds.
+
+Bids do not go through the outbox: the live engine accepts them in
+memory and their rows are written behind (auction.persistence). Only a
+bid whose write then loses the race is withdrawn through it
+('bid_rejected', see auction.live).
+
+Usage:
+    from auction import outbox
+
+    with transaction.atomic():
+        ...
+        outbox.enqueue(session.id, 'bidding_end', result)
+    await outbox.relay(session.id)
+"""
+
+import asyncio
+import logging
+import weakref
+
+from asgiref.sync import async_to_sync
+from channels.db import database_sync_to_async
+from django.conf import settings
+from django.db import OperationalError, transaction
+
+from .engine import loaded_session_ids
+from .utils import _asend
+
+logger = logging.getLogger(__name__)
+
+BATCH = 50
+BUSY_RETRIES = 50
+BUSY_WAIT = 0.02   # seconds
+
+_relay_locks = weakref.WeakKeyDictionary()
+_dispatchers = weakref.WeakKeyDictionary()
+
+
+def poll_interval():
+    return getattr(settings, 'AUCTION_OUTBOX_POLL', 1)
+
+
+def enqueue(session_id, event_type, data):
+    """Write a broadcast to a session's room in the caller's transaction"""
+    from .models import OutboxMessage
+
+    OutboxMessage.objects.create(session_id=session_id, event_type=event_type, data=data)
+    transaction.on_commit(_wake_dispatchers)
+
+
+def _relay_batch(session_id):
+    """Send and delete a session's oldest pending batch; returns how many were sent (None if busy)"""
+    from .models import OutboxMessage
+
+    try:
+        with transaction.atomic():
+            # Claim the batch first, so a conflict is hit before anything
+            # is sent; the delete only commits once every send has gone out
+            messages = list(
+                OutboxMessage.objects.select_for_update(nowait=True)
+                .filter(session_id=session_id).order_by('id')[:BATCH]
+            )
+            OutboxMessage.objects.filter(id__in=[message.id for message in messages]).delete()
+            for message in messages:
+                # Runs on the server's event loop, like any other broadcast
+                async_to_sync(_asend)(session_id, message.event_type, message.data)
+    except OperationalError:
+        # Another worker holds the batch (or the database is busy)
+        return None
+    return len(messages)
+
+
+async def relay(session_id):
+    """
+    Send everything committed to a session's outbox so far, in order
+
+    A busy outbox is retried for up to a second, so a command's broadcast
+    has gone out before the next command runs; past that the dispatcher
+    gets to it.
+    """
+    _dispatcher().start()
+    async with _relay_lock(session_id):
+        # Its own thread: the sends wait on the event loop, which the
+        # shared database thread may be needed to unblock
+        relay_batch = database_sync_to_async(_relay_batch, thread_sensitive=False)
+        retries = 0
+        while True:
+            sent = await relay_batch(session_id)
+            if sent is None and retries < BUSY_RETRIES:
+                retries += 1
+                await asyncio.sleep(BUSY_WAIT)
+            elif sent != BATCH:
+                return
+
+
+def _relay_lock(session_id):
+    # One per session per event loop, like the command locks in auction.live
+    loop = asyncio.get_running_loop()
+    locks = _relay_locks.setdefault(loop, {})
+    lock = locks.get(session_id)
+    if lock is None:
+        lock = locks[session_id] = asyncio.Lock()
+    return lock
+
+
+# ============================================================
+# Dispatcher
+# ============================================================
+
+class Dispatcher:
+    def __init__(self, loop):
+        self.loop = loop
+        self.wakeup = asyncio.Event()
+        self.task = None
+
+    def start(self):
+        if self.task is None or self.task.done():
+            self.task = self.loop.create_task(self._run())
+
+    def wake(self):
+        # Called from whichever thread committed
+        try:
+            self.loop.call_soon_threadsafe(self.wakeup.set)
+        except RuntimeError:
+            pass  # loop closed
+
+    async def _run(self):
+        while True:
+            try:
+                await asyncio.wait_for(self.wakeup.wait(), poll_interval())
+            except asyncio.TimeoutError:
+                pass
+            self.wakeup.clear()
+            for session_id in loaded_session_ids():
+                try:
+                    await relay(session_id)
+                except Exception:
+                    logger.exception('Outbox relay for session %s failed', session_id)
+
+
+def _dispatcher():
+    loop = asyncio.get_running_loop()
+    dispatcher = _dispatchers.get(loop)
+    if dispatcher is None:
+        dispatcher = _dispatchers[loop] = Dispatcher(loop)
+    return dispatcher
+
+
+def start():
+    """Start this worker's dispatcher (idempotent)"""
+    _dispatcher().start()
+
+
+def _wake_dispatchers():
+    for dispatcher in list(_dispatchers.values()):
+        dispatcher.wake()
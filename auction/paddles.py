@@ -0,0 +1,144 @@
+"""
+Paddle raises for the lot under the hammer
+
+Team owners raise their paddle over the auction socket (the consumer's
+'raise_paddle' action) and the auctioneer sees the teams waiting to bid
+as an ordered queue, pushed to the staff group on every change. The
+queue lives in this worker's memory, next to the live engines, one per
+live session:
+
+- a raise stands for the lot's next bid at the time it was raised;
+- a team is queued once per lot - raising again keeps its place and only
+  moves its amount up; the same amount again is a duplicate;
+- a team may raise at most once per AUCTION_PADDLE_INTERVAL_MS per lot;
+- a team leaves the queue when the auctioneer enters a bid for it.
+
+PaddleRaise rows are written by the persister in batches; the bid that
+answers a raise acknowledges the team's rows for the lot in one UPDATE.
+A worker that does not hold a lot's queue (the socket that raised is on
+another worker, or this one restarted) reads it back from the
+unacknowledged rows (pending()).
+"""
+
+import threading
+import time
+
+from django.conf import settings
+from django.utils import timezone
+
+
+class PaddleRejected(Exception):
+    pass
+
+
+def interval():
+    return getattr(settings, 'AUCTION_PADDLE_INTERVAL_MS', 1000) / 1000
+
+
+class PaddleQueue:
+    """
+    Teams waiting to bid on each session's current lot, in the order they raised
+
+    Every live session keeps its own lot, raises and rate limit; a new lot
+    in one session leaves the others' queues alone.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.lots = {}
+        self.version = 0
+
+    def _for_lot(self, session_id, player_id):
+        lot = self.lots.get(session_id)
+        if lot is None or lot['player_id'] != player_id:
+            lot = self.lots[session_id] = {'player_id': player_id, 'raises': {}, 'last_raised': {}}
+        return lot
+
+    def _raises(self, session_id, player_id):
+        lot = self.lots.get(session_id)
+        if lot is None or lot['player_id'] != player_id:
+            return {}
+        return lot['raises']
+
+    def raise_paddle(self, session_id, player_id, team_id, team_name, amount):
+        """Queue a team's raise; returns the raise, raises PaddleRejected"""
+        now = time.monotonic()
+        with self.lock:
+            lot = self._for_lot(session_id, player_id)
+            raises, last_raised = lot['raises'], lot['last_raised']
+
+            queued = raises.get(team_id)
+            if queued and queued['amount'] >= amount:
+                raise PaddleRejected('Your paddle is already raised')
+            last = last_raised.get(team_id)
+            if last is not None and now - last < interval():
+                raise PaddleRejected('Please wait before raising your paddle again')
+
+            last_raised[team_id] = now
+            # Re-raising keeps the team's place in the queue
+            raises[team_id] = {
+                'team_id': team_id,
+                'team_name': team_name,
+                'amount': amount,
+                'raised_at': queued['raised_at'] if queued else timezone.now().isoformat(),
+            }
+            self.version += 1
+            return raises[team_id]
+
+    def acknowledge(self, session_id, player_id, team_id):
+        """Take a team out of the queue; returns whether it was queued"""
+        with self.lock:
+            raises = self._raises(session_id, player_id)
+            if team_id not in raises:
+                return False
+            del raises[team_id]
+            self.version += 1
+            return True
+
+    def view(self, session_id, player_id):
+        """The queue as sent to staff; `version` orders concurrent pushes"""
+        with self.lock:
+            raises = list(self._raises(session_id, player_id).values())
+            return {
+                'player_id': player_id,
+                'version': self.version,
+                'raises': [dict(paddle, position=i + 1) for i, paddle in enumerate(raises)],
+            }
+
+
+queue = PaddleQueue()
+
+
+def pending(session_id, player_id):
+    """
+    The raises waiting on a lot, in queue order, as sent to staff
+
+    From this worker's queue when it holds any for the lot, else from the
+    unacknowledged PaddleRaise rows: each team once, at its first raise,
+    for its highest amount.
+    """
+    raises = queue.view(session_id, player_id)['raises']
+    if raises:
+        return raises
+
+    from django.db.models import Max, Min
+    from .models import PaddleRaise
+
+    rows = PaddleRaise.objects.filter(
+        auction_session_id=session_id,
+        player_id=player_id,
+        acknowledged=False,
+    ).values('team_id', 'team__name').annotate(
+        first_raised=Min('raised_at'),
+        top_amount=Max('amount'),
+    ).order_by('first_raised')
+    return [
+        {
+            'team_id': row['team_id'],
+            'team_name': row['team__name'],
+            'amount': row['top_amount'],
+            'raised_at': row['first_raised'].isoformat(),
+            'position': i + 1,
+        }
+        for i, row in enumerate(rows)
+    ]
@@ -0,0 +1,290 @@
+"""
+Background persistence for the live auction engine
+
+The engine answers bids from memory; the durable Bid/Player/AuctionSession
+rows and their journal events are written here, off the request path, by a single writer thread.
+
+Writes are behind by a few milliseconds: the writer collects whatever is
+queued within AUCTION_WRITE_BEHIND_MS and writes a run of bids as one
+bulk INSERT plus one UPDATE per lot carrying only the final values.
+"""
+
+import logging
+import queue
+import threading
+import time
+from itertools import groupby
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+
+class StaleWrite(Exception):
+    """Raised when a conditional write finds the row already moved on"""
+
+    def __init__(self, message, session_id=None, player_id=None, team_id=None, amount=None):
+        super().__init__(message)
+        self.session_id = session_id
+        self.player_id = player_id
+        self.team_id = team_id
+        self.amount = amount
+
+
+class AuctionPersister:
+    """
+    Single background thread that applies queued write jobs in order
+
+    Usage:
+        from auction.persistence import persister
+
+        persister.submit(write_bid, session_id, player_id, team_id, amount, expected_bid, 0)
+        persister.flush()  # block until everything queued so far is written
+    """
+
+    def __init__(self):
+        self._queue = queue.Queue()
+        self._thread = None
+        self._start_lock = threading.Lock()
+        self._failure_handlers = []
+        self._batch_writers = {}
+
+    def on_failure(self, handler):
+        """Register a callback invoked (with the exception) when a write fails"""
+        self._failure_handlers.append(handler)
+
+    def register_batch(self, func, batch_func):
+        """
+        Coalesce consecutive `func` jobs into one `batch_func` call
+
+        batch_func receives the list of positional-argument tuples of the
+        run, in submission order.
+        """
+        self._batch_writers[func] = batch_func
+
+    def submit(self, func, *args, **kwargs):
+        """Queue a write job; returns immediately"""
+        self._ensure_started()
+        self._queue.put((func, args, kwargs))
+
+    def flush(self, timeout=None):
+        """Wait until all jobs queued before this call have been written"""
+        if self._thread is None:
+            return True
+        done = threading.Event()
+        self._queue.put((_flush_marker, (done,), {}))
+        return done.wait(timeout)
+
+    def _ensure_started(self):
+        if self._thread is not None:
+            return
+        with self._start_lock:
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run, name='auction-persister', daemon=True
+                )
+                self._thread.start()
+
+    def _run(self):
+        interval = getattr(settings, 'AUCTION_WRITE_BEHIND_MS', 5) / 1000
+        while True:
+            batch = self._collect(interval)
+            try:
+                self._apply(batch)
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    def _collect(self, interval):
+        # Block for the first job, then keep collecting until the window
+        # closes or someone is waiting on a flush.
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + interval
+        while batch[-1][0] is not _flush_marker:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _apply(self, batch):
+        i = 0
+        while i < len(batch):
+            func, args, kwargs = batch[i]
+            batch_func = self._batch_writers.get(func)
+            if batch_func is None:
+                self._call(func, *args, **kwargs)
+                i += 1
+                continue
+            j = i
+            while j < len(batch) and batch[j][0] is func:
+                j += 1
+            self._call(batch_func, [job[1] for job in batch[i:j]])
+            i = j
+
+    def _call(self, func, *args, **kwargs):
+        try:
+            close_old_connections()
+            func(*args, **kwargs)
+        except StaleWrite as e:
+            self.report(e)
+        except Exception as e:
+            logger.exception('Auction write failed: %s', e)
+            for handler in self._failure_handlers:
+                handler(e)
+
+    def report(self, exc):
+        """Hand a lost conditional write to the failure handlers (from a write job)"""
+        logger.warning('Auction write lost the race: %s', exc)
+        for handler in self._failure_handlers:
+            handler(exc)
+
+
+def _flush_marker(done):
+    done.set()
+
+
+persister = AuctionPersister()
+
+
+# ============================================================
+# Write jobs
+# ============================================================
+
+def write_bid(session_id, player_id, team_id, amount, expected_bid, going_count):
+    """Persist one accepted bid (queued bids are written by write_bids)"""
+    write_bids([(session_id, player_id, team_id, amount, expected_bid, going_count)])
+
+
+def write_bids(bids):
+    """
+    Persist a run of accepted bids and the Player/AuctionSession columns they move
+
+    Each bid is (session_id, player_id, team_id, amount, expected_bid,
+    going_count). All Bid rows go in with one bulk_create; Player and
+    AuctionSession get a single UPDATE per lot with the final values.
+
+    The lot is committed with a compare-and-swap instead of row locks: the
+    Player row only moves if its current_bid is still the bid the run
+    started from and the final bidder can still afford the final amount.
+    If another writer got there first, nothing of that lot is written
+    (its own savepoint rolls back) and a StaleWrite for it is reported
+    once the other lots, of this session or others, have committed.
+    """
+    from django.db.models import Exists
+    from .models import AuctionEvent, Bid, Player, AuctionSession, Team
+
+    conflicts = []
+    with transaction.atomic():
+        rows = []
+        events = []
+        for (session_id, player_id), lot_bids in groupby(bids, key=lambda b: (b[0], b[1])):
+            lot_bids = list(lot_bids)
+            expected_bid = lot_bids[0][4]
+            _, _, team_id, amount, _, going_count = lot_bids[-1]
+
+            try:
+                with transaction.atomic():
+                    won = Player.objects.filter(
+                        id=player_id,
+                        status='approved',
+                        current_bid=expected_bid,
+                    ).filter(
+                        Exists(Team.objects.filter(id=team_id, purse_remaining__gte=amount))
+                    ).update(current_bid=amount)
+                    if not won:
+                        raise StaleWrite(
+                            f'bid of {amount} on player {player_id} expected current bid {expected_bid}',
+                            session_id=session_id,
+                            player_id=player_id,
+                            team_id=lot_bids[0][2],
+                            amount=lot_bids[0][3],
+                        )
+
+                    AuctionSession.objects.filter(id=session_id).update(
+                        last_bid_team_id=team_id,
+                        bid_call_count=going_count,
+                    )
+            except StaleWrite as e:
+                conflicts.append(e)
+                continue
+
+            rows.extend(
+                Bid(
+                    auction_session_id=bid[0],
+                    player_id=bid[1],
+                    team_id=bid[2],
+                    amount=bid[3],
+                )
+                for bid in lot_bids
+            )
+            events.extend(
+                AuctionEvent(
+                    auction_session_id=bid[0],
+                    event_type='bid',
+                    player_id=bid[1],
+                    team_id=bid[2],
+                    amount=bid[3],
+                )
+                for bid in lot_bids
+            )
+
+        Bid.objects.bulk_create(rows)
+        AuctionEvent.objects.bulk_create(events)
+
+    for conflict in conflicts:
+        persister.report(conflict)
+
+
+def write_going_count(session_id, going_count):
+    """Persist the going-once/twice counter"""
+    from .models import AuctionEvent, AuctionSession
+
+    with transaction.atomic():
+        AuctionSession.objects.filter(id=session_id).update(bid_call_count=going_count)
+        AuctionEvent.objects.create(
+            auction_session_id=session_id,
+            event_type='going',
+            data={'count': going_count},
+        )
+
+
+def write_paddle_raise(session_id, player_id, team_id, amount):
+    """Persist one paddle raise (queued raises are written by write_paddle_raises)"""
+    write_paddle_raises([(session_id, player_id, team_id, amount)])
+
+
+def write_paddle_raises(raises):
+    """Persist a run of paddle raises with one bulk_create"""
+    from .models import PaddleRaise
+
+    PaddleRaise.objects.bulk_create(
+        PaddleRaise(
+            auction_session_id=session_id,
+            player_id=player_id,
+            team_id=team_id,
+            amount=amount,
+        )
+        for session_id, player_id, team_id, amount in raises
+    )
+
+
+def acknowledge_paddle_raises(session_id, player_id, team_id):
+    """Acknowledge all of a team's raises on a lot (the auctioneer took its bid)"""
+    from .models import PaddleRaise
+
+    PaddleRaise.objects.filter(
+        auction_session_id=session_id,
+        player_id=player_id,
+        team_id=team_id,
+        acknowledged=False,
+    ).update(acknowledged=True, acknowledged_at=timezone.now())
+
+
+persister.register_batch(write_bid, write_bids)
+persister.register_batch(write_paddle_raise, write_paddle_raises)
@@ -0,0 +1,184 @@
+"""
+Who is connected to the live auction
+
+Each worker tracks its own sockets in memory (role, team, last client
+heartbeat); connect, disconnect and heartbeats only touch that dict. A
+background task per worker publishes the worker's view to the cache
+every AUCTION_PRESENCE_INTERVAL seconds, with a TTL of three intervals:
+
+    auction:presence:team:<team_id>     last time any worker saw the team online
+    auction:presence:worker:<worker>    {'roles': {role: count}, 'teams': [...]}
+    auction:presence:workers            {worker: last publish time}
+
+A team drops out of the online set by expiry once its last socket goes
+away (or its worker dies), so teams_online() is a single get_many. The
+same task closes sockets whose heartbeats stopped and prunes dead
+workers from the registry - nothing is cleaned up on the hot path.
+
+Usage:
+    from auction import presence
+
+    online = presence.teams_online(team_ids)   # {team_id, ...}
+    presence.counts()                          # {'roles': {...}, 'teams': [...]}
+"""
+
+import asyncio
+import logging
+import os
+import socket
+import time
+import weakref
+
+from django.conf import settings
+from django.core.cache import cache
+
+logger = logging.getLogger(__name__)
+
+WORKER_ID = f'{socket.gethostname()}:{os.getpid()}'
+WORKERS_KEY = 'auction:presence:workers'
+
+_sockets = {}
+_publishers = weakref.WeakKeyDictionary()
+
+
+def interval():
+    return getattr(settings, 'AUCTION_PRESENCE_INTERVAL', 10)
+
+
+def ttl():
+    return interval() * 3
+
+
+def team_key(team_id):
+    return f'auction:presence:team:{team_id}'
+
+
+def worker_key(worker_id):
+    return f'auction:presence:worker:{worker_id}'
+
+
+# ============================================================
+# Hot path: in-memory only
+# ============================================================
+
+def join(consumer, role, team_id=None):
+    _sockets[consumer.channel_name] = {
+        'consumer': consumer,
+        'role': role,
+        'team_id': team_id,
+        'last_seen': time.monotonic(),
+        'heartbeats': 0,
+    }
+    publisher = _publisher()
+    publisher.start()
+    if team_id and team_id not in publisher.published_teams:
+        # A newly online team should not wait a full interval to show
+        publisher.wakeup.set()
+
+
+def leave(consumer):
+    _sockets.pop(consumer.channel_name, None)
+
+
+def heartbeat(consumer):
+    entry = _sockets.get(consumer.channel_name)
+    if entry is not None:
+        entry['last_seen'] = time.monotonic()
+        entry['heartbeats'] += 1
+
+
+def local_counts():
+    roles = {}
+    teams = set()
+    for entry in _sockets.values():
+        roles[entry['role']] = roles.get(entry['role'], 0) + 1
+        if entry['team_id']:
+            teams.add(entry['team_id'])
+    return roles, teams
+
+
+# ============================================================
+# Lookups (any process)
+# ============================================================
+
+def teams_online(team_ids):
+    """Ids of the teams with an owner connected to any worker"""
+    found = cache.get_many([team_key(team_id) for team_id in team_ids])
+    return {team_id for team_id in team_ids if team_key(team_id) in found}
+
+
+def counts():
+    """Connections per role and online teams, summed over live workers"""
+    workers = cache.get(WORKERS_KEY) or {}
+    roles = {}
+    teams = set()
+    for view in cache.get_many([worker_key(worker) for worker in workers]).values():
+        for role, count in view['roles'].items():
+            roles[role] = roles.get(role, 0) + count
+        teams.update(view['teams'])
+    return {'roles': roles, 'teams': sorted(teams), 'workers': len(workers)}
+
+
+# ============================================================
+# Background publisher
+# ============================================================
+
+class Publisher:
+    def __init__(self):
+        self.task = None
+        self.wakeup = asyncio.Event()
+        self.published_teams = set()
+
+    def start(self):
+        if self.task is None or self.task.done():
+            self.task = asyncio.get_running_loop().create_task(self._run())
+
+    async def _run(self):
+        while True:
+            try:
+                await self.close_stale()
+                await self.publish()
+            except Exception:
+                logger.exception('Presence publish failed')
+            try:
+                await asyncio.wait_for(self.wakeup.wait(), interval())
+            except asyncio.TimeoutError:
+                pass
+            self.wakeup.clear()
+
+    async def close_stale(self):
+        # Only sockets that have heartbeated are expected to keep doing so
+        cutoff = time.monotonic() - ttl()
+        stale = [
+            entry['consumer'] for entry in list(_sockets.values())
+            if entry['heartbeats'] and entry['last_seen'] < cutoff
+        ]
+        for consumer in stale:
+            leave(consumer)
+            await consumer.close()
+        if stale:
+            logger.info('Closed %s sockets with no heartbeat', len(stale))
+
+    async def publish(self):
+        roles, teams = local_counts()
+        now = time.time()
+        values = {team_key(team_id): now for team_id in teams}
+        values[worker_key(WORKER_ID)] = {'roles': roles, 'teams': sorted(teams)}
+        await cache.aset_many(values, timeout=ttl())
+        self.published_teams = teams
+
+        # Read-modify-write of the registry; a worker lost to a race
+        # comes back on its next publish
+        workers = await cache.aget(WORKERS_KEY) or {}
+        workers = {worker: seen for worker, seen in workers.items() if seen > now - ttl()}
+        workers[WORKER_ID] = now
+        await cache.aset(WORKERS_KEY, workers, timeout=None)
+
+
+def _publisher():
+    # One per event loop, like the spectator stream's broadcaster
+    loop = asyncio.get_running_loop()
+    publisher = _publishers.get(loop)
+    if publisher is None:
+        publisher = _publishers[loop] = Publisher()
+    return publisher
@@ -3,5 +3,7 @@ from django.urls import re_path
 from . import consumers
 
 websocket_urlpatterns = [
+    re_path(r'ws/auction/(?P<session_id>\d+)/$', consumers.AuctionConsumer.as_asgi()),
+    # The oldest live session, for clients that predate rooms
     re_path(r'ws/auction/$', consumers.AuctionConsumer.as_asgi()),
 ]
\ No newline at end of file
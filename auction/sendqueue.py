@@ -0,0 +1,132 @@
+"""
+Bounded outbound queues for auction sockets
+
+Every AuctionConsumer pushes broadcasts into its own SendQueue and a
+writer task sends them, so a socket that cannot keep up backs up here,
+in bounded memory, instead of in the channel layer:
+
+- a bid_update (or team_update, paddle_queue) still queued is
+  superseded by the next one; the client gets a 'superseded' control
+  frame with the last skipped seq so it does not mistake the gap for
+  lost messages;
+- a queue that reaches AUCTION_SEND_QUEUE_LIMIT is dropped whole and the
+  socket switches to snapshot mode: the client gets 'resync_required',
+  deltas are discarded until the writer catches up, and then one fresh
+  snapshot frame is sent and deltas resume.
+
+When the worker drains (auction.drain), migrate() queues a 'migrate'
+frame behind everything pending; the writer sends it and closes.
+
+`connections` holds this worker's queues; stats() feeds the staff
+connections endpoint, so lagging sockets can be seen per worker.
+"""
+
+import asyncio
+import weakref
+from collections import deque
+
+from django.conf import settings
+
+SUPERSEDABLE = ('bid_update', 'team_update', 'paddle_queue')
+
+connections = weakref.WeakSet()
+
+
+class SendQueue:
+    def __init__(self, consumer, limit=None):
+        self.consumer = consumer
+        self.limit = limit or getattr(settings, 'AUCTION_SEND_QUEUE_LIMIT', 64)
+        self.items = deque()
+        self.wakeup = asyncio.Event()
+        self.snapshot_mode = False
+        self.task = None
+        self.sent = 0
+        self.dropped = 0
+        self.superseded = 0
+        self.resyncs = 0
+        self.max_depth = 0
+
+    def start(self):
+        self.task = asyncio.get_running_loop().create_task(self._run())
+        connections.add(self)
+
+    def stop(self):
+        connections.discard(self)
+        if self.task is not None:
+            self.task.cancel()
+
+    def put(self, event):
+        """Queue a layer message ({'type', 'seq', 'epoch', 'text', 'bytes'})"""
+        if self.snapshot_mode:
+            self.dropped += 1
+            return
+
+        if self.items and event['type'] in SUPERSEDABLE:
+            last, skipped = self.items[-1]
+            if last['type'] == event['type']:
+                self.items[-1] = (event, last.get('seq') or skipped)
+                self.superseded += 1
+                return
+
+        if len(self.items) >= self.limit:
+            self.dropped += len(self.items) + 1
+            self.items.clear()
+            self.snapshot_mode = True
+            self.resyncs += 1
+            self.items.append(({'type': 'resync_required'}, None))
+        else:
+            self.items.append((event, None))
+        self.max_depth = max(self.max_depth, len(self.items))
+        self.wakeup.set()
+
+    def migrate(self, frame):
+        """Send `frame` once the queue is flushed, then close the socket"""
+        self.items.append((frame, None))
+        self.wakeup.set()
+
+    async def _run(self):
+        while True:
+            if not self.items:
+                self.wakeup.clear()
+                if self.snapshot_mode:
+                    # Deltas published from here on queue up behind the
+                    # snapshot; the client drops those it already has
+                    self.snapshot_mode = False
+                    await self.consumer.send_snapshot()
+                    continue
+                await self.wakeup.wait()
+                continue
+
+            event, skipped = self.items.popleft()
+            if skipped:
+                await self.consumer.send_frame({
+                    'type': 'superseded',
+                    'seq': skipped,
+                    'epoch': event['epoch'],
+                })
+            if event['type'] == 'resync_required':
+                await self.consumer.send_frame(event)
+            elif event['type'] == 'migrate':
+                await self.consumer.send_frame(event)
+                # 1012: Service Restart
+                await self.consumer.close(code=1012, reason=str(event['retry_after']))
+                connections.discard(self)
+                return
+            else:
+                await self.consumer.forward(event)
+            self.sent += 1
+
+    def stats(self):
+        user = self.consumer.scope.get('user')
+        authenticated = bool(user and user.is_authenticated)
+        return {
+            'user': user.username if authenticated else None,
+            'role': user.user_type if authenticated else 'anonymous',
+            'depth': len(self.items),
+            'max_depth': self.max_depth,
+            'sent': self.sent,
+            'dropped': self.dropped,
+            'superseded': self.superseded,
+            'resyncs': self.resyncs,
+            'snapshot_mode': self.snapshot_mode,
+        }
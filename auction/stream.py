@@ -0,0 +1,131 @@
+"""
+Server-Sent Events stream for spectators
+
+/live/stream/?session=<id> serves a session's public auction feed to
+read-only viewers without a WebSocket consumer each. One Broadcaster per
+session per worker holds a single channel-layer subscription to the
+session's spectator group (bids coalesced, see auction.utils) and copies
+every message into the local clients' in-memory queues, so a worker's
+spectators cost one group membership per room however many there are.
+
+Each event id is "<epoch>:<seq>". A reconnecting EventSource sends it
+back as Last-Event-ID and is caught up from the feed first (see
+auction.live.resume).
+"""
+
+import asyncio
+import json
+import logging
+import weakref
+
+from asgiref.sync import sync_to_async
+from channels.layers import get_channel_layer
+
+from . import live
+from .utils import spectator_group
+
+logger = logging.getLogger(__name__)
+
+HEARTBEAT = 15         # seconds between keep-alive comments on an idle stream
+GROUP_REFRESH = 3600   # re-join the group well within the layer's group_expiry
+RETRY_MS = 3000        # EventSource reconnect delay
+
+_broadcasters = weakref.WeakKeyDictionary()
+
+
+def event_frame(text, epoch, seq):
+    return f'id: {epoch}:{seq}\ndata: {text}\n\n'
+
+
+class Broadcaster:
+    """The worker's one subscription to a session's spectator group, fanned out to local queues"""
+
+    def __init__(self, session_id):
+        self.session_id = session_id
+        self.clients = set()
+        self.task = None
+
+    def subscribe(self):
+        queue = asyncio.Queue()
+        self.clients.add(queue)
+        if self.task is None or self.task.done():
+            self.task = asyncio.get_running_loop().create_task(self._run())
+        return queue
+
+    def unsubscribe(self, queue):
+        self.clients.discard(queue)
+
+    async def _run(self):
+        layer = get_channel_layer()
+        channel = await layer.new_channel()
+        loop = asyncio.get_running_loop()
+        joined_at = None
+        while True:
+            try:
+                if joined_at is None or loop.time() - joined_at > GROUP_REFRESH:
+                    await layer.group_add(spectator_group(self.session_id), channel)
+                    joined_at = loop.time()
+                message = await asyncio.wait_for(layer.receive(channel), GROUP_REFRESH)
+            except asyncio.TimeoutError:
+                continue
+            except Exception:
+                logger.exception('Spectator stream subscription failed; retrying')
+                joined_at = None
+                await asyncio.sleep(1)
+                continue
+
+            if 'text' not in message or message.get('seq') is None:
+                continue
+            frame = event_frame(message['text'], message['epoch'], message['seq'])
+            for queue in self.clients:
+                queue.put_nowait(frame)
+
+
+def get_broadcaster(session_id):
+    # One per session per event loop, like the command locks in auction.live
+    loop = asyncio.get_running_loop()
+    broadcasters = _broadcasters.setdefault(loop, {})
+    broadcaster = broadcasters.get(session_id)
+    if broadcaster is None:
+        broadcaster = broadcasters[session_id] = Broadcaster(session_id)
+    return broadcaster
+
+
+async def events(session_id, last_event_id=None):
+    """The SSE body for a session: catch-up (if resuming), then live frames and heartbeats"""
+    broadcaster = get_broadcaster(session_id)
+    # Subscribe before catching up so nothing in between is missed;
+    # clients drop what they see twice by seq
+    queue = broadcaster.subscribe()
+    try:
+        yield f'retry: {RETRY_MS}\n\n'
+        for frame in await catch_up(session_id, last_event_id):
+            yield frame
+
+        while True:
+            try:
+                yield await asyncio.wait_for(queue.get(), HEARTBEAT)
+            except asyncio.TimeoutError:
+                yield ': ping\n\n'
+    finally:
+        broadcaster.unsubscribe(queue)
+
+
+async def catch_up(session_id, last_event_id):
+    epoch, _, seq = (last_event_id or '').partition(':')
+    if not seq.isdigit():
+        return []
+
+    resumed = await sync_to_async(live.resume)(session_id, int(seq), epoch)
+    if 'events' in resumed:
+        return [
+            event_frame(json.dumps(message), message['epoch'], message['seq'])
+            for message in resumed['events']
+        ]
+    snapshot = {
+        'type': 'snapshot',
+        'seq': resumed['seq'],
+        'epoch': resumed['epoch'],
+        'data': resumed['snapshot'],
+    }
+    return [event_frame(json.dumps(snapshot), resumed['epoch'], resumed['seq'])]
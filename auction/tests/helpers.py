@@ -0,0 +1,58 @@
+"""Shared set-up for the auction tests"""
+
+from django.core.cache import cache
+from django.test import override_settings
+
+from auction import engine, feed, paddles
+from auction.persistence import persister
+
+# The cache and channel layer in memory, so no Redis is needed; the
+# going clock off, so no lot is called while a test runs; a fast password
+# hasher for the many users the fixtures create
+in_process = override_settings(
+    CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}},
+    CHANNEL_LAYERS={'default': {'BACKEND': 'channels.layers.InMemoryChannelLayer'}},
+    AUCTION_GOING_INTERVAL=0,
+    AUCTION_LIVE_SESSIONS_RECHECK=0,
+    PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'],
+)
+
+
+def reset_live_state():
+    """Forget every process-wide piece of live auction state"""
+    persister.flush()
+    engine.invalidate_engines()
+    feed._feeds.clear()
+    paddles.queue.lots.clear()
+    cache.clear()
+
+
+def make_user(username, user_type, **fields):
+    from auction.models import User
+
+    return User.objects.create_user(
+        username=username, password='pw', user_type=user_type,
+        first_name=username, **fields
+    )
+
+
+def make_auction(teams=3, players=3, purse=1000, session_name='Session'):
+    """Teams with owners, approved players and a live session"""
+    from auction.models import AuctionSession, Player, Team
+
+    made_teams = [
+        Team.objects.create(
+            name=f'Team {i}', owner=make_user(f'{session_name}_owner_{i}', 'team_owner'),
+            purse_remaining=purse, total_purse=purse, max_players=5,
+        )
+        for i in range(teams)
+    ]
+    made_players = [
+        Player.objects.create(
+            user=make_user(f'{session_name}_player_{i}', 'player', player_type='student'),
+            category='batsman', base_price=300, status='approved',
+        )
+        for i in range(players)
+    ]
+    session = AuctionSession.objects.create(name=session_name, status='live')
+    return made_teams, made_players, session
@@ -0,0 +1,88 @@
+from unittest import mock
+
+from channels.generic.websocket import AsyncWebsocketConsumer
+from channels.testing import WebsocketCommunicator
+from django.test import SimpleTestCase, override_settings
+
+from auction import admission
+
+
+@override_settings(
+    AUCTION_MAX_HANDSHAKES=2,
+    AUCTION_RECONNECT_BASE_MS=100,
+    AUCTION_RECONNECT_JITTER_MS=50,
+    AUCTION_RECONNECT_MAX_MS=1000,
+)
+class AdmissionTests(SimpleTestCase):
+    def test_limiter_admits_up_to_the_limit(self):
+        limiter = admission.AdmissionLimiter()
+        self.assertTrue(limiter.try_acquire())
+        self.assertTrue(limiter.try_acquire())
+        self.assertFalse(limiter.try_acquire())
+        limiter.release()
+        self.assertTrue(limiter.try_acquire())
+        self.assertEqual(limiter.stats(), {'in_flight': 2, 'limit': 2, 'admitted': 3, 'rejected': 1})
+
+    def test_retry_after_is_base_plus_jitter(self):
+        for _ in range(20):
+            self.assertTrue(100 <= admission.retry_after() <= 150)
+
+    def test_policy_comes_from_settings(self):
+        self.assertEqual(admission.policy(), {'base': 100, 'jitter': 50, 'max': 1000})
+
+
+class Inner(AsyncWebsocketConsumer):
+    """Accepts (or refuses), and releases its handshake when told to"""
+
+    async def connect(self):
+        if 'refuse' in self.scope['path']:
+            await self.close()
+            return
+        await self.accept()
+        if 'release' in self.scope['path']:
+            self.scope['admission'].release()
+
+
+@override_settings(AUCTION_MAX_HANDSHAKES=1)
+class AdmissionMiddlewareTests(SimpleTestCase):
+    def setUp(self):
+        patcher = mock.patch.object(admission, 'limiter', admission.AdmissionLimiter())
+        self.limiter = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def socket(self, path='/ws/'):
+        return WebsocketCommunicator(admission.AdmissionMiddleware(Inner.as_asgi()), path)
+
+    async def test_a_handshake_holds_its_token_until_disconnect(self):
+        ws = self.socket()
+        self.assertTrue((await ws.connect())[0])
+        self.assertEqual(self.limiter.in_flight, 1)
+        await ws.disconnect()
+        self.assertEqual(self.limiter.in_flight, 0)
+
+    async def test_the_consumer_releases_once_caught_up(self):
+        ws = self.socket('/ws/release/')
+        await ws.connect()
+        self.assertEqual(self.limiter.in_flight, 0)
+        await ws.disconnect()
+        self.assertEqual(self.limiter.stats()['admitted'], 1)
+        self.assertEqual(self.limiter.in_flight, 0)
+
+    async def test_a_rejected_connect_releases(self):
+        ws = self.socket('/ws/refuse/')
+        self.assertFalse((await ws.connect())[0])
+        self.assertEqual(self.limiter.in_flight, 0)
+
+    async def test_over_the_limit_is_turned_away_before_the_consumer(self):
+        first = self.socket()
+        await first.connect()
+        with mock.patch.object(Inner, 'connect') as connect:
+            second = self.socket()
+            self.assertTrue((await second.connect())[0])
+            frame = await second.receive_json_from()
+            closed = await second.receive_output()
+        connect.assert_not_called()
+        self.assertEqual(frame['type'], 'retry')
+        self.assertEqual((closed['code'], closed['reason']), (1013, str(frame['retry_after'])))
+        self.assertEqual(self.limiter.stats()['rejected'], 1)
+        await first.disconnect()
@@ -0,0 +1,68 @@
+import asyncio
+import time
+from unittest import mock
+
+from django.test import SimpleTestCase, override_settings
+
+from auction import drain, sendqueue
+from auction.feed import get_feed
+from auction.persistence import persister
+
+
+class Socket:
+    """Stands in for an AuctionConsumer behind a SendQueue"""
+
+    def __init__(self, session_id):
+        self.session_id = session_id
+        self.frames = []
+        self.closed = None
+
+    async def send_frame(self, frame):
+        self.frames.append(frame)
+
+    async def forward(self, event):
+        self.frames.append(event)
+
+    async def close(self, code=None, reason=None):
+        self.closed = code
+
+
+@override_settings(AUCTION_DRAIN_WINDOW=0.2, AUCTION_DRAIN_BATCHES=2)
+class DrainTests(SimpleTestCase):
+    def tearDown(self):
+        drain.draining = False
+
+    async def test_every_socket_is_migrated_after_its_queue(self):
+        feed = get_feed(801)
+        feed.publish('going_update', {})
+        sockets = [Socket(801) for _ in range(3)]
+        queues = [sendqueue.SendQueue(socket) for socket in sockets]
+        for queue in queues:
+            queue.start()
+        queues[0].put({'type': 'going_update', 'seq': 1, 'epoch': feed.epoch})
+
+        await drain.drain()
+        await asyncio.gather(*(queue.task for queue in queues))
+
+        self.assertTrue(drain.draining)
+        self.assertFalse(set(queues) & set(sendqueue.connections))
+        self.assertEqual([f['type'] for f in sockets[0].frames], ['going_update', 'migrate'])
+        for socket in sockets:
+            migrate = socket.frames[-1]
+            self.assertEqual((migrate['seq'], migrate['epoch']), (feed.seq, feed.epoch))
+            self.assertEqual(socket.closed, drain.SERVICE_RESTART)
+
+    async def test_queued_writes_are_flushed_before_the_worker_stops(self):
+        written = []
+
+        def slow_write():
+            time.sleep(0.2)
+            written.append(True)
+
+        def shutdown():
+            self.assertEqual(written, [True])
+
+        persister.submit(slow_write)
+        with mock.patch.object(drain, '_shutdown', side_effect=shutdown) as stopped:
+            await drain._drain_then_shutdown()
+        stopped.assert_called_once()
@@ -0,0 +1,96 @@
+from django.test import TransactionTestCase
+
+from auction import engine
+from auction.engine import BidRejected, StaleBid, get_engine
+from auction.models import AuctionSession, Player
+from auction.persistence import persister
+
+from .helpers import in_process, make_auction, reset_live_state
+
+
+@in_process
+class LiveAuctionEngineTests(TransactionTestCase):
+    def setUp(self):
+        reset_live_state()
+        self.teams, self.players, self.session = make_auction()
+        self.engine = get_engine(self.session.id)
+        self.player = Player.objects.select_related('user').get(id=self.players[0].id)
+        self.engine.start_lot(self.player)
+
+    def tearDown(self):
+        reset_live_state()
+
+    def test_first_bid_must_be_the_base_price(self):
+        with self.assertRaises(BidRejected):
+            self.engine.place_bid(self.teams[0].id, self.player.id, 350)
+        bid = self.engine.place_bid(self.teams[0].id, self.player.id, 300)
+        self.assertEqual((bid['amount'], bid['next_bid']), (300, 350))
+
+    def test_a_bid_for_a_price_already_bid_is_stale(self):
+        self.engine.place_bid(self.teams[0].id, self.player.id, 300)
+        with self.assertRaises(StaleBid) as caught:
+            self.engine.place_bid(self.teams[1].id, self.player.id, 300)
+        self.assertEqual(caught.exception.next_bid, 350)
+
+    def test_a_team_cannot_bid_past_its_purse(self):
+        self.engine.teams[self.teams[0].id].purse_remaining = 200
+        with self.assertRaises(BidRejected):
+            self.engine.place_bid(self.teams[0].id, self.player.id, 300)
+
+    def test_bids_are_written_behind(self):
+        self.engine.place_bid(self.teams[0].id, self.player.id, 300)
+        self.engine.place_bid(self.teams[1].id, self.player.id, 350)
+        persister.flush()
+        self.player.refresh_from_db()
+        self.session.refresh_from_db()
+        self.assertEqual(self.player.current_bid, 350)
+        self.assertEqual(self.session.last_bid_team_id, self.teams[1].id)
+
+    def test_rebuild_matches_the_written_rows(self):
+        AuctionSession.objects.filter(id=self.session.id).update(current_player=self.player)
+        self.engine.place_bid(self.teams[0].id, self.player.id, 300)
+        persister.flush()
+        rebuilt = engine.LiveAuctionEngine(self.session.id).rebuild()
+        self.assertEqual(rebuilt.lot.current_bid, 300)
+        self.assertEqual(rebuilt.lot.last_bid_team_id, self.teams[0].id)
+
+    def test_a_sale_is_charged_in_every_loaded_session(self):
+        other = AuctionSession.objects.create(name='Other', status='live')
+        other_engine = get_engine(other.id)
+        self.engine.close_lot(self.teams[0].id, 300)
+        self.assertEqual(other_engine.teams[self.teams[0].id].purse_remaining, 700)
+        self.assertEqual(self.engine.teams[self.teams[0].id].purse_remaining, 700)
+        self.assertIsNone(self.engine.lot)
+
+
+@in_process
+class LiveSessionsTests(TransactionTestCase):
+    def setUp(self):
+        reset_live_state()
+
+    def tearDown(self):
+        reset_live_state()
+
+    def test_sessions_are_re_read_when_the_version_moves(self):
+        first = AuctionSession.objects.create(name='First', status='live')
+        self.assertEqual(engine.live_session_ids(), [first.id])
+        first_engine = get_engine(first.id)
+
+        second = AuctionSession.objects.create(name='Second', status='live')
+        engine.live_sessions_changed()
+        self.assertEqual(engine.live_session_ids(), [first.id, second.id])
+        # Sessions whose liveness did not change keep their engine
+        self.assertIs(engine.loaded_engine(first.id), first_engine)
+
+        AuctionSession.objects.filter(id=first.id).update(status='completed')
+        engine.live_sessions_changed()
+        self.assertEqual(engine.live_session_ids(), [second.id])
+        self.assertIsNone(engine.loaded_engine(first.id))
+
+    def test_resolve_session_id(self):
+        first = AuctionSession.objects.create(name='First', status='live')
+        AuctionSession.objects.create(name='Ended', status='completed')
+        self.assertEqual(engine.resolve_session_id(), first.id)
+        self.assertEqual(engine.resolve_session_id(str(first.id)), first.id)
+        self.assertIsNone(engine.resolve_session_id(first.id + 1))
+        self.assertIsNone(engine.resolve_session_id('nope'))
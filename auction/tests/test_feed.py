@@ -0,0 +1,55 @@
+from django.test import SimpleTestCase
+
+from auction.feed import LiveFeed, get_feed
+
+
+def bid(team_id, amount):
+    return {'team_id': team_id, 'team_name': f'T{team_id}', 'amount': amount, 'timestamp': 't'}
+
+
+class LiveFeedTests(SimpleTestCase):
+    def test_publish_stamps_consecutive_seqs(self):
+        feed = LiveFeed(size=4)
+        first = feed.publish('going_update', {})
+        second = feed.publish('going_update', {})
+        self.assertEqual((first['seq'], second['seq']), (1, 2))
+        self.assertEqual(first['epoch'], feed.epoch)
+
+    def test_since_serves_the_gap_from_the_buffer(self):
+        feed = LiveFeed(size=4)
+        for _ in range(3):
+            feed.publish('going_update', {})
+        self.assertEqual([m['seq'] for m in feed.since(1)], [2, 3])
+        self.assertEqual(feed.since(3), [])
+
+    def test_since_gives_up_on_another_epoch_or_an_evicted_gap(self):
+        feed = LiveFeed(size=2)
+        for _ in range(4):
+            feed.publish('going_update', {})
+        self.assertIsNone(feed.since(3, epoch='other'))
+        self.assertIsNone(feed.since(1))
+        self.assertIsNone(feed.since(9))
+
+    def test_lot_view_follows_the_lot(self):
+        feed = LiveFeed()
+        feed.publish('player_update', {'player': {'id': 7}})
+        feed.publish('bid_update', dict(bid(1, 300), player_id=7))
+        card, bids = feed.lot_view(7)
+        self.assertEqual(card['id'], 7)
+        self.assertEqual([b['amount'] for b in bids], [300])
+        self.assertIsNone(feed.lot_view(8))
+
+        feed.publish('bidding_end', {'player_id': 7})
+        self.assertIsNone(feed.lot_view(7))
+
+    def test_a_rejected_bid_drops_the_lot_view(self):
+        feed = LiveFeed()
+        feed.publish('player_update', {'player': {'id': 7}})
+        feed.publish('bid_update', dict(bid(1, 300), player_id=7))
+        feed.publish('bid_rejected', {'team_id': 1, 'amount': 300, 'player_id': 7})
+        self.assertIsNone(feed.lot_view(7))
+
+    def test_every_session_has_its_own_feed(self):
+        self.assertIs(get_feed(901), get_feed(901))
+        self.assertIsNot(get_feed(901), get_feed(902))
+        self.assertNotEqual(get_feed(901).epoch, get_feed(902).epoch)
@@ -0,0 +1,106 @@
+from django.test import Client, TransactionTestCase
+
+from auction import journal
+from auction.engine import LiveAuctionEngine
+from auction.models import AuctionEvent, AuctionSnapshot, Player, Team
+
+from .helpers import in_process, make_auction, make_user, reset_live_state
+
+
+@in_process
+class JournalTests(TransactionTestCase):
+    def setUp(self):
+        reset_live_state()
+        self.teams, self.players, self.session = make_auction()
+
+    def tearDown(self):
+        reset_live_state()
+
+    def recovered(self):
+        return LiveAuctionEngine(self.session.id).recover()
+
+    def test_without_a_snapshot_recovery_rebuilds_and_snapshots(self):
+        self.assertFalse(journal.restore(LiveAuctionEngine(self.session.id)))
+        engine = self.recovered()
+        self.assertEqual(set(engine.teams), {team.id for team in self.teams})
+        self.assertTrue(AuctionSnapshot.objects.filter(auction_session=self.session).exists())
+
+    def test_the_events_after_the_snapshot_are_replayed(self):
+        self.recovered()
+        player = self.players[0]
+        journal.record('lot_started', session_id=self.session.id, player_id=player.id,
+                       player_name='P', base_price=300)
+        journal.record('bid', session_id=self.session.id, player_id=player.id,
+                       team_id=self.teams[0].id, amount=300)
+
+        engine = LiveAuctionEngine(self.session.id)
+        self.assertTrue(journal.restore(engine))
+        self.assertEqual(engine.lot.player_id, player.id)
+        self.assertEqual((engine.lot.current_bid, engine.lot.last_bid_team_id), (300, self.teams[0].id))
+
+    def test_team_events_carry_absolute_counters(self):
+        self.recovered()
+        Team.objects.filter(id=self.teams[0].id).update(purse_remaining=123)
+        journal.record_team('team_updated', self.teams[0].id)
+
+        engine = LiveAuctionEngine(self.session.id)
+        self.assertTrue(journal.restore(engine))
+        self.assertEqual(engine.teams[self.teams[0].id].purse_remaining, 123)
+
+    def test_a_sale_replayed_over_a_snapshot_that_has_it_charges_once(self):
+        team = self.teams[0]
+        Player.objects.filter(id=self.players[0].id).update(status='sold', team=team)
+        Team.objects.filter(id=team.id).update(purse_remaining=700)
+        journal.record('sold', session_id=self.session.id, player_id=self.players[0].id,
+                       team_id=team.id, amount=300, team=journal.team_state(team.id))
+        # Snapshotted at a position before the sale, with the sale in it
+        engine = LiveAuctionEngine(self.session.id)
+        engine.teams = engine._read_teams(Team)
+        journal.save_snapshot(engine, 0)
+
+        engine = LiveAuctionEngine(self.session.id)
+        self.assertTrue(journal.restore(engine))
+        state = engine.teams[team.id]
+        self.assertEqual((state.purse_remaining, state.regular_count), (700, 1))
+
+    def test_an_unknown_team_falls_back_to_a_rebuild(self):
+        self.recovered()
+        AuctionEvent.objects.create(event_type='sold', team_id=None, amount=10)
+        self.assertFalse(journal.restore(LiveAuctionEngine(self.session.id)))
+
+    def test_only_the_newest_snapshot_is_kept(self):
+        engine = self.recovered()
+        journal.save_snapshot(engine, journal.record('unsold', session_id=self.session.id).id)
+        self.assertEqual(AuctionSnapshot.objects.filter(auction_session=self.session).count(), 1)
+
+
+@in_process
+class AdminJournalTests(TransactionTestCase):
+    def setUp(self):
+        reset_live_state()
+        self.teams, self.players, _ = make_auction(teams=2)
+        admin = make_user('admin', 'team_manager', is_staff=True, is_superuser=True)
+        self.client = Client()
+        self.client.force_login(admin)
+
+    def tearDown(self):
+        reset_live_state()
+
+    def team_events(self):
+        return list(
+            AuctionEvent.objects.filter(event_type='team_updated').values_list('team_id', 'data')
+        )
+
+    def test_resetting_players_journals_their_teams(self):
+        Player.objects.filter(id=self.players[0].id).update(status='sold', team=self.teams[0])
+        self.client.post('/admin/auction/player/', {
+            'action': 'reset_players', '_selected_action': [self.players[0].id],
+        })
+        [(team_id, data)] = self.team_events()
+        self.assertEqual((team_id, data['regular_count']), (self.teams[0].id, 0))
+
+    def test_deleting_an_owner_journals_the_team_as_gone(self):
+        owner = self.teams[1].owner
+        self.client.post(f'/admin/auction/user/{owner.id}/delete/', {'post': 'yes'})
+        [(team_id, data)] = self.team_events()
+        self.assertEqual((team_id, data), (self.teams[1].id, {'deleted': True}))
@@ -0,0 +1,100 @@
+import json
+
+from django.test import TransactionTestCase
+
+from auction import live
+from auction.engine import get_engine
+from auction.models import AuctionSession, OutboxMessage, Player
+from auction.utils import _messages, spectator_group, staff_group
+
+from .helpers import in_process, make_auction, reset_live_state
+
+
+@in_process
+class LotTests(TransactionTestCase):
+    def setUp(self):
+        reset_live_state()
+        self.teams, self.players, self.session = make_auction()
+        self.player = Player.objects.select_related('user').get(id=self.players[0].id)
+
+    def tearDown(self):
+        reset_live_state()
+
+    def open(self, session, player):
+        get_engine(session.id).start_lot(player)
+        return live.open_lot(session.id, player.id, {'player': {'id': player.id}})
+
+    def test_a_player_under_the_hammer_elsewhere_cannot_be_claimed(self):
+        other = AuctionSession.objects.create(name='Other', status='live')
+        self.assertTrue(self.open(self.session, self.player))
+        self.assertFalse(self.open(other, self.player))
+
+        other.refresh_from_db()
+        self.assertIsNone(other.current_player_id)
+        self.assertEqual(OutboxMessage.objects.filter(session_id=other.id).count(), 0)
+        # Its own session may open it again
+        self.assertTrue(self.open(self.session, self.player))
+
+    def test_a_player_left_on_an_ended_session_can_be_claimed(self):
+        ended = AuctionSession.objects.create(name='Ended', status='completed',
+                                              current_player=self.player)
+        self.assertTrue(self.open(self.session, self.player))
+        self.assertEqual(ended.current_player_id, self.player.id)
+
+    def test_a_sale_records_the_winning_bid_on_the_player(self):
+        self.open(self.session, self.player)
+        engine = get_engine(self.session.id)
+        engine.place_bid(self.teams[0].id, self.player.id, 300)
+        engine.place_bid(self.teams[1].id, self.player.id, 350)
+
+        result = live.settle_lot(self.session.id, self.player.id)
+
+        self.assertTrue(result['sold'])
+        self.player.refresh_from_db()
+        self.assertEqual(
+            (self.player.status, self.player.team_id, self.player.current_bid),
+            ('sold', self.teams[1].id, 350),
+        )
+
+
+@in_process
+class AudienceTests(TransactionTestCase):
+    def setUp(self):
+        reset_live_state()
+        self.teams, self.players, self.session = make_auction()
+        player = Player.objects.select_related('user').get(id=self.players[0].id)
+        get_engine(self.session.id).start_lot(player)
+
+    def tearDown(self):
+        reset_live_state()
+
+    def test_a_spectator_snapshot_has_no_purse_fields(self):
+        teams = live.auction_state(self.session.id)['teams']
+        self.assertEqual({team['id'] for team in teams}, {team.id for team in self.teams})
+        for team in teams:
+            self.assertNotIn('purse_remaining', team)
+            self.assertNotIn('slots_remaining', team)
+            self.assertNotIn('can_bid', team)
+            self.assertIn('players_count', team)
+
+    def test_an_owner_snapshot_has_only_its_own_purse(self):
+        own = self.teams[0].id
+        teams = live.auction_state(self.session.id, team_id=own)['teams']
+        self.assertEqual([t['id'] for t in teams if 'purse_remaining' in t], [own])
+
+    def test_a_staff_snapshot_has_every_purse(self):
+        teams = live.auction_state(self.session.id, staff=True)['teams']
+        self.assertTrue(all('purse_remaining' in team for team in teams))
+
+    def test_a_spectator_sale_broadcast_has_no_purse_fields(self):
+        sale = {
+            'success': True, 'sold': True, 'team_id': self.teams[0].id, 'team_name': 'Team 0',
+            'amount': 300, 'player_id': self.players[0].id, 'player_name': 'P',
+            'team_purse_remaining': 700, 'team_players_count': 1, 'team_slots_remaining': 4,
+        }
+        messages = dict(_messages(self.session.id, 'bidding_end', sale))
+        public = json.loads(messages[spectator_group(self.session.id)]['text'])['data']
+        staff = json.loads(messages[staff_group(self.session.id)]['text'])['data']
+        self.assertNotIn('team_purse_remaining', public)
+        self.assertNotIn('team_slots_remaining', public)
+        self.assertEqual(staff['team_purse_remaining'], 700)
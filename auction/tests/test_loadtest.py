@@ -0,0 +1,31 @@
+import subprocess
+import sys
+from pathlib import Path
+
+from django.conf import settings
+from django.test import SimpleTestCase
+
+
+class LoadTestCommandTests(SimpleTestCase):
+    """
+    auction_loadtest at a tiny size
+
+    Run as its own process, as it is used: the command creates (and
+    drops) a test database from the migrations, which cannot be nested
+    in the test runner's.
+    """
+
+    def test_runs_at_tiny_size(self):
+        result = subprocess.run(
+            [
+                sys.executable, 'manage.py', 'auction_loadtest',
+                '--owners', '2', '--spectators', '2', '--teams', '2',
+                '--bids', '3', '--rate', '0',
+            ],
+            cwd=Path(settings.BASE_DIR),
+            capture_output=True,
+            text=True,
+            timeout=300,
+        )
+        self.assertEqual(result.returncode, 0, result.stderr)
+        self.assertIn('bids: 3 accepted, 0 rejected', result.stdout)
@@ -0,0 +1,59 @@
+import asyncio
+
+from asgiref.sync import sync_to_async
+from channels.layers import get_channel_layer
+from django.db import transaction
+from django.test import TransactionTestCase
+
+from auction import outbox
+from auction.models import AuctionSession, OutboxMessage
+from auction.utils import public_group
+
+from .helpers import in_process, reset_live_state
+
+
+@in_process
+class OutboxTests(TransactionTestCase):
+    def setUp(self):
+        reset_live_state()
+        self.session = AuctionSession.objects.create(name='Room', status='live')
+        self.other = AuctionSession.objects.create(name='Other room', status='live')
+
+    def tearDown(self):
+        reset_live_state()
+
+    def test_a_rolled_back_broadcast_is_never_written(self):
+        with self.assertRaises(RuntimeError):
+            with transaction.atomic():
+                outbox.enqueue(self.session.id, 'bidding_end', {'success': True})
+                raise RuntimeError
+        self.assertFalse(OutboxMessage.objects.exists())
+
+    async def test_relay_sends_a_sessions_rows_in_order_to_its_room_only(self):
+        layer = get_channel_layer()
+        channel = await layer.new_channel()
+        other_channel = await layer.new_channel()
+        await layer.group_add(public_group(self.session.id), channel)
+        await layer.group_add(public_group(self.other.id), other_channel)
+
+        def enqueue():
+            with transaction.atomic():
+                for player_id in (1, 2):
+                    outbox.enqueue(self.session.id, 'bidding_end', {'player_id': player_id})
+                outbox.enqueue(self.other.id, 'bidding_end', {'player_id': 3})
+        await sync_to_async(enqueue)()
+
+        try:
+            await outbox.relay(self.session.id)
+        finally:
+            outbox._dispatcher().task.cancel()
+
+        received = [await layer.receive(channel) for _ in range(2)]
+        self.assertEqual([m['seq'] for m in received], [1, 2])
+        self.assertEqual(
+            await OutboxMessage.objects.filter(session_id=self.session.id).acount(), 0
+        )
+        # The other room's row waits for its own relay
+        self.assertEqual(await OutboxMessage.objects.filter(session_id=self.other.id).acount(), 1)
+        with self.assertRaises(asyncio.TimeoutError):
+            await asyncio.wait_for(layer.receive(other_channel), 0.1)
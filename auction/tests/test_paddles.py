@@ -0,0 +1,90 @@
+from datetime import timedelta
+
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.utils import timezone
+
+from auction.models import PaddleRaise
+from auction.paddles import PaddleQueue, PaddleRejected, pending, queue
+
+from .helpers import in_process, make_auction
+
+
+@override_settings(AUCTION_PADDLE_INTERVAL_MS=0)
+class PaddleQueueTests(SimpleTestCase):
+    def setUp(self):
+        self.queue = PaddleQueue()
+
+    def teams(self, session_id, player_id):
+        return [r['team_id'] for r in self.queue.view(session_id, player_id)['raises']]
+
+    def test_teams_queue_in_raise_order(self):
+        self.queue.raise_paddle(1, 10, 2, 'T2', 300)
+        self.queue.raise_paddle(1, 10, 1, 'T1', 300)
+        self.assertEqual(self.teams(1, 10), [2, 1])
+
+    def test_re_raising_keeps_the_place_and_duplicates_are_rejected(self):
+        self.queue.raise_paddle(1, 10, 2, 'T2', 300)
+        self.queue.raise_paddle(1, 10, 1, 'T1', 300)
+        with self.assertRaises(PaddleRejected):
+            self.queue.raise_paddle(1, 10, 2, 'T2', 300)
+        self.queue.raise_paddle(1, 10, 2, 'T2', 350)
+        self.assertEqual(self.teams(1, 10), [2, 1])
+
+    def test_acknowledge_takes_the_team_out(self):
+        self.queue.raise_paddle(1, 10, 2, 'T2', 300)
+        self.assertTrue(self.queue.acknowledge(1, 10, 2))
+        self.assertFalse(self.queue.acknowledge(1, 10, 2))
+        self.assertEqual(self.teams(1, 10), [])
+
+    def test_sessions_keep_their_own_queues(self):
+        self.queue.raise_paddle(1, 10, 2, 'T2', 300)
+        self.queue.raise_paddle(2, 20, 3, 'T3', 300)
+        self.queue.raise_paddle(2, 21, 3, 'T3', 300)
+        self.assertEqual(self.teams(1, 10), [2])
+        self.assertEqual(self.teams(2, 20), [])
+        self.assertEqual(self.teams(2, 21), [3])
+
+    @override_settings(AUCTION_PADDLE_INTERVAL_MS=60000)
+    def test_raises_are_rate_limited_per_lot(self):
+        self.queue.raise_paddle(1, 10, 2, 'T2', 300)
+        with self.assertRaises(PaddleRejected):
+            self.queue.raise_paddle(1, 10, 2, 'T2', 350)
+        # Another room's lot does not reset it
+        self.queue.raise_paddle(2, 20, 2, 'T2', 300)
+        with self.assertRaises(PaddleRejected):
+            self.queue.raise_paddle(1, 10, 2, 'T2', 350)
+
+
+@in_process
+class PendingTests(TestCase):
+    def setUp(self):
+        self.teams, self.players, self.session = make_auction()
+        self.player = self.players[0]
+        self.addCleanup(queue.lots.clear)
+
+    def raise_row(self, team, amount, **fields):
+        row = PaddleRaise.objects.create(
+            auction_session=self.session, player=self.player, team=team, amount=amount, **fields
+        )
+        # One second apart, in the order raised
+        raised_at = timezone.now() + timedelta(seconds=PaddleRaise.objects.count())
+        PaddleRaise.objects.filter(id=row.id).update(raised_at=raised_at)
+
+    def test_without_the_live_queue_the_unacknowledged_rows_are_read(self):
+        self.raise_row(self.teams[1], 300)
+        self.raise_row(self.teams[0], 300)
+        self.raise_row(self.teams[1], 350)
+        self.raise_row(self.teams[2], 300, acknowledged=True)
+
+        raises = pending(self.session.id, self.player.id)
+        self.assertEqual(
+            [(r['team_id'], r['amount'], r['position']) for r in raises],
+            [(self.teams[1].id, 350, 1), (self.teams[0].id, 300, 2)],
+        )
+
+    def test_the_live_queue_comes_first(self):
+        self.raise_row(self.teams[1], 300)
+        queue.raise_paddle(self.session.id, self.player.id, self.teams[0].id, 'Team 0', 300)
+        self.assertEqual(
+            [r['team_id'] for r in pending(self.session.id, self.player.id)], [self.teams[0].id]
+        )
@@ -0,0 +1,63 @@
+from unittest import mock
+
+from django.test import TransactionTestCase
+
+from auction.models import Bid, Player, Team
+from auction.persistence import StaleWrite, persister, write_bids
+
+from .helpers import in_process, make_auction, reset_live_state
+
+
+@in_process
+class WriteBidsTests(TransactionTestCase):
+    def setUp(self):
+        reset_live_state()
+        self.teams, self.players, self.session = make_auction()
+        Player.objects.update(current_bid=0)
+
+    def tearDown(self):
+        reset_live_state()
+
+    def bid(self, player, team, amount, expected):
+        return (self.session.id, player.id, team.id, amount, expected, 0)
+
+    def test_a_run_of_bids_moves_the_lot_once(self):
+        player = self.players[0]
+        with mock.patch.object(persister, 'report') as report:
+            write_bids([
+                self.bid(player, self.teams[0], 300, 0),
+                self.bid(player, self.teams[1], 350, 300),
+            ])
+        report.assert_not_called()
+        player.refresh_from_db()
+        self.assertEqual(player.current_bid, 350)
+        self.assertEqual(
+            list(Bid.objects.order_by('amount').values_list('amount', flat=True)), [300, 350]
+        )
+
+    def test_a_stale_lot_is_skipped_and_the_others_commit(self):
+        stale, fresh = self.players[:2]
+        Player.objects.filter(id=stale.id).update(current_bid=400)
+        with mock.patch.object(persister, 'report') as report:
+            write_bids([
+                self.bid(stale, self.teams[0], 300, 0),
+                self.bid(fresh, self.teams[1], 300, 0),
+            ])
+
+        (conflict,), _ = report.call_args
+        self.assertIsInstance(conflict, StaleWrite)
+        self.assertEqual(
+            (conflict.session_id, conflict.player_id, conflict.team_id, conflict.amount),
+            (self.session.id, stale.id, self.teams[0].id, 300),
+        )
+        stale.refresh_from_db()
+        fresh.refresh_from_db()
+        self.assertEqual((stale.current_bid, fresh.current_bid), (400, 300))
+        self.assertEqual(list(Bid.objects.values_list('player_id', flat=True)), [fresh.id])
+
+    def test_a_bid_the_team_can_no_longer_afford_is_stale(self):
+        Team.objects.filter(id=self.teams[0].id).update(purse_remaining=100)
+        with mock.patch.object(persister, 'report') as report:
+            write_bids([self.bid(self.players[0], self.teams[0], 300, 0)])
+        report.assert_called_once()
+        self.assertFalse(Bid.objects.exists())
@@ -0,0 +1,34 @@
+from django.test import SimpleTestCase
+
+from auction import wire
+
+
+class WireTests(SimpleTestCase):
+    def test_schema_messages_round_trip(self):
+        message = {
+            'type': 'bid_update', 'seq': 4, 'epoch': 'abc',
+            'data': {'success': True, 'team_id': 2, 'amount': 350, 'next_bid': 400},
+        }
+        self.assertEqual(wire.decode(wire.encode(message)), message)
+
+    def test_keys_outside_the_schema_travel_as_extras(self):
+        message = {
+            'type': 'going_update', 'seq': 1, 'epoch': 'abc',
+            'data': {'call_count': 1, 'unexpected': 'kept'},
+        }
+        self.assertEqual(wire.decode(wire.encode(message))['data']['unexpected'], 'kept')
+
+    def test_types_without_a_schema_are_plain_maps(self):
+        message = {'type': 'paddle_queue', 'seq': None, 'epoch': None, 'data': {'raises': []}}
+        self.assertEqual(wire.decode(wire.encode(message)), message)
+
+    def test_schemas_are_smaller_than_the_keys(self):
+        message = {
+            'type': 'bid_update', 'seq': 4, 'epoch': 'abc',
+            'data': {'team_slots_remaining': 3, 'purse_remaining': 900},
+        }
+        self.assertNotIn(b'team_slots_remaining', wire.encode(message))
+
+    def test_client_schemas_follow_the_type_codes(self):
+        schemas = wire.client_schemas()
+        self.assertEqual([s['type'] for s in schemas], list(wire.TYPES))
@@ -0,0 +1,84 @@
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.sessions.backends.db import SessionStore
+from django.core.cache import cache
+from django.test import Client, TransactionTestCase
+
+from auction import wsauth
+from auction.models import User
+
+from .helpers import in_process, make_auction, reset_live_state
+
+
+@in_process
+class CachedAuthTests(TransactionTestCase):
+    def setUp(self):
+        reset_live_state()
+        self.teams, _, _ = make_auction(teams=1, players=0)
+        self.owner = self.teams[0].owner
+        client = Client()
+        client.force_login(self.owner)
+        self.session_key = client.session.session_key
+
+    def tearDown(self):
+        reset_live_state()
+
+    def scope(self):
+        return {
+            'cookies': {settings.SESSION_COOKIE_NAME: self.session_key},
+            'session': SessionStore(self.session_key),
+        }
+
+    async def test_a_connect_is_resolved_once_then_served_from_the_cache(self):
+        user, team_id = await wsauth.resolve(self.scope())
+        self.assertEqual((user.id, team_id), (self.owner.id, self.teams[0].id))
+        entry = await cache.aget(wsauth.session_key_for(self.session_key))
+        self.assertEqual(entry['team_id'], self.teams[0].id)
+        self.assertEqual(await cache.aget(wsauth.user_key(self.owner.id)), [self.session_key])
+
+    async def test_no_cookie_is_anonymous(self):
+        user, team_id = await wsauth.resolve({'cookies': {}})
+        self.assertFalse(user.is_authenticated)
+        self.assertIsNone(team_id)
+
+    async def test_invalidate_user_drops_every_session(self):
+        await wsauth.resolve(self.scope())
+        await sync_to_async(wsauth.invalidate_user)(self.owner.id)
+        self.assertIsNone(await cache.aget(wsauth.session_key_for(self.session_key)))
+
+    async def test_a_password_change_drops_the_cached_sessions(self):
+        await wsauth.resolve(self.scope())
+
+        def change_password():
+            self.owner.set_password('new')
+            self.owner.save()
+        await sync_to_async(change_password)()
+
+        self.assertIsNone(await cache.aget(wsauth.session_key_for(self.session_key)))
+        user, _ = await wsauth.resolve(self.scope())
+        self.assertFalse(user.is_authenticated)
+
+    async def test_a_bulk_password_update_drops_the_cached_sessions(self):
+        await wsauth.resolve(self.scope())
+        await sync_to_async(
+            lambda: User.objects.filter(id=self.owner.id).update(password='!')
+        )()
+        self.assertIsNone(await cache.aget(wsauth.session_key_for(self.session_key)))
+
+    async def test_an_unrelated_bulk_update_keeps_them(self):
+        await wsauth.resolve(self.scope())
+        await sync_to_async(lambda: User.objects.filter(id=self.owner.id).update(phone='1'))()
+        self.assertIsNotNone(await cache.aget(wsauth.session_key_for(self.session_key)))
+
+    async def test_deleting_the_user_drops_the_cached_sessions(self):
+        await wsauth.resolve(self.scope())
+        await sync_to_async(lambda: User.objects.filter(id=self.owner.id).delete())()
+        self.assertIsNone(await cache.aget(wsauth.session_key_for(self.session_key)))
+
+    async def test_logging_out_drops_the_cached_session(self):
+        client = Client()
+        await sync_to_async(client.force_login)(self.owner)
+        self.session_key = client.session.session_key
+        await wsauth.resolve(self.scope())
+        await sync_to_async(client.logout)()
+        self.assertIsNone(await cache.aget(wsauth.session_key_for(self.session_key)))
@@ -93,6 +93,10 @@ urlpatterns = [
     path('admin/players/<int:player_id>/detail/', views.player_detail_view, name='player_detail_view'),
     path('admin/players/sold-unsold/export/', views.export_sold_unsold_report, name='export_sold_unsold_report'),
     path('api/quick-stats/', views.quick_stats_api, name='quick_stats_api'),
+    path('api/auction/state/', views.auction_state_api, name='auction_state_api'),
+    path('live/stream/', views.live_stream, name='live_stream'),
+    path('api/auction/connections/', views.auction_connections_api, name='auction_connections_api'),
+    path('api/auction/presence/', views.auction_presence_api, name='auction_presence_api'),
     # Team Owner URLs
     path('owner/dashboard/', views.owner_dashboard, name='owner_dashboard'),
     path('owner/auction/', views.live_auction, name='live_auction'),
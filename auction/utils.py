@@ -1,21 +1,216 @@
 
 
+
 """
 Utility functions for broadcasting auction events via WebSocket
+
+Each broadcast has a sync form for regular views and an awaitable
+``a``-prefixed form for async views and consumers, which sends on the
+event loop without the async_to_sync thread hop.
+
+Every message is stamped with a sequence number by auction.feed and
+must be self-contained: clients patch their page from it and never
+reload to find out what changed.
+
+Messages are encoded once here - as JSON text and as a binary frame for
+`sepl.msgpack.v1` clients (auction.wire) - and travel through the channel
+layer ready to send; consumers forward them without re-encoding, so a
+broadcast costs the same however many sockets are in the room.
+
+Every live session is a room of its own: its broadcasts are sequenced
+by the session's feed and go to that session's groups only
+(auction_<session_id>_<audience>), so concurrent auctions never see each
+other's traffic.
+
+Sockets are grouped by audience (see AuctionConsumer.connect). The
+auctioneer console and admins get full payloads; owners, players and
+spectators get the public stream, which leaves out other teams' purse,
+slots and bid eligibility (bids, sales and snapshots alike); each owner
+also gets their own team's numbers on a team channel as unsequenced
+'team_update' messages.
+
+Spectators (players, anonymous sockets, the SSE stream) are not bidding,
+so their bid_updates are coalesced: at most one per lot every
+AUCTION_SPECTATOR_COALESCE_MS, latest bid wins, and their stream may skip
+bid_update seqs. Anything else flushes the pending bid and goes straight
+out, so spectators never see a bid after the sale.
 """
 
+import asyncio
+import json
+import weakref
+
 from channels.layers import get_channel_layer
 from asgiref.sync import async_to_sync
+from django.conf import settings
+
+from . import wire
+from .feed import get_feed
+
+# Fields only staff get; the team they describe gets them as a team_update
+STAFF_FIELDS = {
+    'bid_update': ('can_bid_teams', 'purse_remaining', 'team_slots_remaining'),
+    'bidding_end': ('team_purse_remaining', 'team_slots_remaining'),
+}
+
+# Per-team fields of a snapshot (auction.live.auction_state) only staff,
+# and the team itself, get
+STAFF_TEAM_FIELDS = ('purse_remaining', 'slots_remaining', 'can_bid')
+
+
+def staff_group(session_id):
+    return f'auction_{session_id}_staff'
+
+
+def public_group(session_id):
+    return f'auction_{session_id}_public'
+
+
+def spectator_group(session_id):
+    return f'auction_{session_id}_spectators'
+
+
+def team_group(session_id, team_id):
+    return f'auction_{session_id}_team_{team_id}'
+
+
+def _encode(message):
+    # The socket frame is {'type', 'seq', 'epoch', 'data'}; the layer
+    # message only carries it pre-encoded, 'type' naming the handler
+    return {
+        'type': message['type'],
+        'seq': message.get('seq'),
+        'epoch': message.get('epoch'),
+        'text': json.dumps(message),
+        'bytes': wire.encode(message),
+    }
+
+
+def _messages(session_id, event_type, data):
+    """
+    (group, layer message) pairs for one broadcast to a session's room
+
+    The session's feed sequences and buffers the public view; staff get
+    the same seq with the full payload.
+    """
+    hidden = STAFF_FIELDS.get(event_type, ())
+    message = get_feed(session_id).publish(event_type, {
+        key: value for key, value in data.items() if key not in hidden
+    })
+    public = _encode(message)
+    staff = _encode(dict(message, data=data)) if hidden else public
+    messages = [
+        (public_group(session_id), public),
+        (spectator_group(session_id), public),
+        (staff_group(session_id), staff),
+    ]
+
+    team_update = _team_update(event_type, data)
+    if team_update:
+        messages.append((
+            team_group(session_id, team_update['team_id']),
+            _encode({'type': 'team_update', 'data': team_update}),
+        ))
+    return messages
+
+
+def _team_update(event_type, data):
+    # The bidding/buying team's own numbers, for its owner's channel
+    if not data.get('team_id'):
+        return None
+    if event_type == 'bid_update':
+        fields = {'purse_remaining': 'purse_remaining', 'team_slots_remaining': 'slots_remaining'}
+    elif event_type == 'bidding_end' and data.get('sold'):
+        fields = {
+            'team_purse_remaining': 'purse_remaining',
+            'team_players_count': 'players_count',
+            'team_slots_remaining': 'slots_remaining',
+        }
+    else:
+        return None
+
+    update = {'team_id': data['team_id']}
+    update.update({name: data[key] for key, name in fields.items() if data.get(key) is not None})
+    return update
+
+
+async def _asend(session_id, event_type, data, coalesce=True):
+    channel_layer = get_channel_layer()
+    spectators = spectator_group(session_id)
+    for group, message in _messages(session_id, event_type, data):
+        if group == spectators:
+            lot = data.get('player_id') if coalesce and event_type == 'bid_update' else None
+            await _spectators(session_id).send(message, lot)
+        else:
+            await channel_layer.group_send(group, message)
+
+
+class SpectatorCoalescer:
+    """
+    Latest-wins throttle for spectator bid_updates
+
+    The first bid after a quiet window goes out at once; bids within the
+    window replace each other per lot and the latest is sent when it
+    ends. send(message) without a lot flushes the pending bids first.
+    """
+
+    def __init__(self, group, window):
+        self.group = group
+        self.window = window
+        self.pending = {}
+        self.timer = None
+        self.last_flush = 0.0
+
+    async def send(self, message, lot=None):
+        if lot is None:
+            await self.flush()
+            await get_channel_layer().group_send(self.group, message)
+            return
 
+        self.pending[lot] = message
+        if self.timer is None:
+            loop = asyncio.get_running_loop()
+            delay = self.last_flush + self.window - loop.time()
+            if delay <= 0:
+                await self.flush()
+            else:
+                self.timer = loop.call_later(delay, lambda: loop.create_task(self.flush()))
 
-def broadcast_bid_update(bid_data):
+    async def flush(self):
+        if self.timer is not None:
+            self.timer.cancel()
+            self.timer = None
+        pending, self.pending = self.pending, {}
+        if not pending:
+            return
+        self.last_flush = asyncio.get_running_loop().time()
+        channel_layer = get_channel_layer()
+        for message in pending.values():
+            await channel_layer.group_send(self.group, message)
+
+
+_coalescers = weakref.WeakKeyDictionary()
+
+
+def _spectators(session_id):
+    # One per session per event loop; timers cannot cross loops
+    loop = asyncio.get_running_loop()
+    coalescers = _coalescers.setdefault(loop, {})
+    coalescer = coalescers.get(session_id)
+    if coalescer is None:
+        window = getattr(settings, 'AUCTION_SPECTATOR_COALESCE_MS', 100) / 1000
+        coalescer = coalescers[session_id] = SpectatorCoalescer(spectator_group(session_id), window)
+    return coalescer
+
+
+def broadcast_bid_update(session_id, bid_data):
     """
-    Broadcast bid update to all connected WebSocket clients
-    
+    Broadcast bid update to all clients in a session's room
+
     Usage:
         from auction.utils import broadcast_bid_update
-        
-        broadcast_bid_update({
+
+        broadcast_bid_update(session.id, {
             'team_name': team.name,
             'team_id': team.id,
             'player_id': player.id,
@@ -24,24 +219,18 @@ def broadcast_bid_update(bid_data):
             'timestamp': bid.timestamp.isoformat(),
         })
     """
-    channel_layer = get_channel_layer()
-    async_to_sync(channel_layer.group_send)(
-        'auction_room_group',
-        {
-            'type': 'bid_update',
-            'data': bid_data
-        }
-    )
+    # Outside the server's event loop there is no timer to flush later
+    async_to_sync(_asend)(session_id, 'bid_update', bid_data, coalesce=False)
 
 
-def broadcast_player_update(player_data):
+def broadcast_player_update(session_id, player_data):
     """
-    Broadcast player change to all connected WebSocket clients
-    
+    Broadcast player change to all clients in a session's room
+
     Usage:
         from auction.utils import broadcast_player_update
-        
-        broadcast_player_update({
+
+        broadcast_player_update(session.id, {
             'player': {
                 'id': player.id,
                 'name': player.user.get_full_name(),
@@ -51,35 +240,66 @@ def broadcast_player_update(player_data):
             }
         })
     """
-    channel_layer = get_channel_layer()
-    async_to_sync(channel_layer.group_send)(
-        'auction_room_group',
-        {
-            'type': 'player_update',
-            'data': player_data
-        }
-    )
+    async_to_sync(_asend)(session_id, 'player_update', player_data)
 
 
-def broadcast_bidding_end(result_data):
+def broadcast_bidding_end(session_id, result_data):
     """
-    Broadcast bidding completion to all connected WebSocket clients
-    
+    Broadcast bidding completion to all clients in a session's room
+
     Usage:
         from auction.utils import broadcast_bidding_end
-        
-        broadcast_bidding_end({
+
+        broadcast_bidding_end(session.id, {
             'sold': True,
             'team_name': team.name,
             'player_name': player.user.get_full_name(),
             'amount': final_amount,
         })
     """
-    channel_layer = get_channel_layer()
-    async_to_sync(channel_layer.group_send)(
-        'auction_room_group',
-        {
-            'type': 'bidding_end',
-            'data': result_data
-        }
-    )
\ No newline at end of file
+    async_to_sync(_asend)(session_id, 'bidding_end', result_data)
+
+
+async def abroadcast_going_update(session_id, going_data):
+    """
+    Broadcast a going-once/twice/SOLD call to all clients in a session's room
+
+    Usage:
+        from auction.utils import abroadcast_going_update
+
+        await abroadcast_going_update(session.id, {
+            'player_id': player.id,
+            'call_count': 1,
+            'call_text': 'Going once...',
+            'server_time': clock.server_time(),
+            'next_call_at': clock.next_call_at(),
+        })
+    """
+    await _asend(session_id, 'going_update', going_data)
+
+
+async def abroadcast_bid_update(session_id, bid_data):
+    """Async version of broadcast_bid_update"""
+    await _asend(session_id, 'bid_update', bid_data)
+
+
+async def abroadcast_player_update(session_id, player_data):
+    """Async version of broadcast_player_update"""
+    await _asend(session_id, 'player_update', player_data)
+
+
+async def abroadcast_bidding_end(session_id, result_data):
+    """Async version of broadcast_bidding_end"""
+    await _asend(session_id, 'bidding_end', result_data)
+
+
+async def abroadcast_paddle_queue(session_id, queue_data):
+    """
+    Push the paddle queue (auction.paddles) to the auctioneer and admins
+
+    Staff-only and not part of the feed: every push carries the whole
+    queue, so there is nothing to replay.
+    """
+    await get_channel_layer().group_send(
+        staff_group(session_id), _encode({'type': 'paddle_queue', 'data': queue_data})
+    )
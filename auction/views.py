@@ -4,13 +4,17 @@ from django.contrib.auth import login, authenticate, logout
 from django.contrib.auth.decorators import login_required, user_passes_test
 from django.contrib import messages
 from django.db.models import Sum, Count, Q
-from django.http import JsonResponse, HttpResponse
+from django.http import JsonResponse, HttpResponse, StreamingHttpResponse, Http404
+from django.urls import reverse
 from django.utils import timezone
-from .models import User, Team, Player, AuctionSession, Bid, AuctionLog, TournamentBanner, TournamentContent, TournamentStats, SocialMediaLink, PaddleRaise
+from asgiref.sync import sync_to_async
+from .models import User, Team, Player, AuctionSession, Bid, AuctionLog, TournamentBanner, TournamentContent, TournamentStats, SocialMediaLink
 from .forms import UserRegistrationForm, PlayerRegistrationForm, TeamCreationForm, AuctionSessionForm, UserProfileEditForm, PlayerProfileEditForm, PlayerDetailsEditForm
 from django.contrib.auth.forms import PasswordChangeForm
 from django.contrib.auth import update_session_auth_hash
-from .utils import broadcast_bid_update, broadcast_player_update, broadcast_bidding_end
+from .engine import invalidate_engines, live_sessions_changed, resolve_session_id
+from .feed import get_feed
+from . import admission, drain, journal, live, paddles, presence, sendqueue, stream, wire, wsauth
 import json
 from django.db import transaction
 import csv
@@ -29,6 +33,13 @@ def is_player(user):
 def is_auctioneer(user):
     return user.user_type == 'auctioneer'
 
+async def ais_auctioneer(user):
+    return user.is_authenticated and user.user_type == 'auctioneer'
+
+def live_sessions():
+    """Every live session, for the room switcher on live pages"""
+    return AuctionSession.objects.filter(status='live').order_by('id')
+
 def home(request):
     """Homepage for Satpuda Engineering Premier League with dynamic banners"""
     teams = Team.objects.all()
@@ -234,6 +245,7 @@ def manage_teams(request):
         form = TeamCreationForm(request.POST, request.FILES)
         if form.is_valid():
             team = form.save()
+            journal.record_team('team_updated', team.id)
             messages.success(request, f'Team {team.name} created successfully!')
             return redirect('manage_teams')
     else:
@@ -293,13 +305,12 @@ def manage_auction(request):
         form = AuctionSessionForm()
     
     sessions = AuctionSession.objects.all().order_by('-created_at')
-    active_session = sessions.filter(status='live').first()
     available_players = Player.objects.filter(status='approved')
     
     context = {
         'form': form,
         'sessions': sessions,
-        'active_session': active_session,
+        'live_sessions': live_sessions(),
         'available_players': available_players,
     }
     return render(request, 'admin/manage_auction.html', context)
@@ -307,18 +318,17 @@ def manage_auction(request):
 @login_required
 @user_passes_test(is_admin)
 def start_auction_session(request, session_id):
-    """Start an auction session"""
+    """Start an auction session (alongside any others already live)"""
     session = get_object_or_404(AuctionSession, id=session_id)
     
-    # End any other active sessions
-    AuctionSession.objects.filter(status='live').update(status='paused')
-    
     session.status = 'live'
     session.started_at = timezone.now()
     session.save()
+    invalidate_engines(session.id)
+    live_sessions_changed()
     
     messages.success(request, f'Auction session "{session.name}" started!')
-    return redirect('auction_control')
+    return redirect(f"{reverse('auction_control')}?session={session.id}")
 
 @login_required
 @user_passes_test(is_admin)
@@ -328,6 +338,8 @@ def end_auction_session(request, session_id):
     session.status = 'completed'
     session.ended_at = timezone.now()
     session.save()
+    invalidate_engines(session.id)
+    live_sessions_changed()
     
     messages.success(request, f'Auction session "{session.name}" ended!')
     return redirect('manage_auction')
@@ -336,11 +348,17 @@ def end_auction_session(request, session_id):
 @user_passes_test(is_admin)
 def auction_control(request):
     """Live auction control room with search functionality"""
-    active_session = AuctionSession.objects.filter(status='live').first()
+    # ?session=<id>, else the oldest live session
+    session_id = resolve_session_id(request.GET.get('session'))
     
-    if not active_session:
+    if session_id is None:
         messages.warning(request, 'No active auction session!')
         return redirect('manage_auction')
+
+    # Feed position first: later broadcasts patch this render
+    feed = get_feed(session_id)
+    feed_seq = feed.seq
+    active_session = AuctionSession.objects.get(id=session_id)
     
     available_players = Player.objects.filter(status='approved').select_related('user')
     teams = Team.objects.all()
@@ -358,6 +376,9 @@ def auction_control(request):
         'teams': teams,
         'current_player': active_session.current_player,
         'current_bids': current_bids,
+        'feed_seq': feed_seq,
+        'feed_epoch': feed.epoch,
+        'live_sessions': live_sessions(),
     }
     return render(request, 'admin/auction_control.html', context)
 
@@ -441,18 +462,28 @@ def live_auction(request):
     except Team.DoesNotExist:
         return redirect('owner_dashboard')
     
-    active_session = AuctionSession.objects.filter(status='live').first()
+    # ?session=<id>, else the oldest live session
+    session_id = resolve_session_id(request.GET.get('session'))
     
-    if not active_session:
+    if session_id is None:
         return render(request, 'owner/no_auction.html')
+
+    # Feed position first: later broadcasts patch this render
+    feed = get_feed(session_id)
+    feed_seq = feed.seq
+    active_session = AuctionSession.objects.get(id=session_id)
     
-    all_teams = Team.objects.exclude(id=team.id)
+    all_teams = Team.objects.with_eligibility().exclude(id=team.id)
     
     context = {
         'team': team,
         'session': active_session,
         'current_player': active_session.current_player,
         'all_teams': all_teams,
+        'feed_seq': feed_seq,
+        'feed_epoch': feed.epoch,
+        'wire_schemas': wire.client_schemas(),
+        'live_sessions': live_sessions(),
     }
     return render(request, 'owner/live_auction.html', context)
 
@@ -641,7 +672,11 @@ def delete_user(request, user_id):
             return redirect('manage_users')
         
         username = user.username
+        # Their team (owned, or the one they play for) changes with them
+        team_ids = list(Team.objects.of_users([user]).values_list('id', flat=True))
         user.delete()
+        journal.record_teams(team_ids)
+        invalidate_engines()
         
         messages.success(request, f'User {username} has been permanently deleted!')
         return redirect('manage_users')
@@ -661,6 +696,7 @@ def revoke_permissions(request, user_id):
             old_type = user.get_user_type_display()
             user.user_type = new_user_type
             user.save()
+            wsauth.invalidate_user(user.id)
             
             messages.success(
                 request, 
@@ -715,7 +751,9 @@ def user_detail(request, user_id):
 @user_passes_test(is_auctioneer)
 def auctioneer_dashboard(request):
     """Auctioneer control center - UPDATED to exclude iconic players from auction"""
-    active_session = AuctionSession.objects.filter(status='live').first()
+    # ?session=<id>, else the oldest live session
+    session_id = resolve_session_id(request.GET.get('session'))
+    active_session = AuctionSession.objects.filter(id=session_id).first() if session_id else None
     
     if not active_session:
         sessions = AuctionSession.objects.filter(
@@ -735,41 +773,39 @@ def auctioneer_dashboard(request):
             auction_session=active_session
         ).select_related('team').order_by('-amount')
         current_bids = list(current_bids_qs[:5])
-        
-        paddle_raises = PaddleRaise.objects.filter(
-            player=current_player,
-            auction_session=active_session,
-            acknowledged=False
-        ).select_related('team').order_by('raised_at')
+
+        # The live queue as the socket pushes it, or its unacknowledged rows
+        paddle_raises = paddles.pending(active_session.id, current_player.id)
     else:
         current_bids = []
 
-    # Team Stats
+    # Team Stats - squad counts and iconic-adjusted slots in one query
     team_stats = []
-    teams = Team.objects.annotate(
-        player_count=Count('players')
-    ).select_related('owner').order_by('name')
+    teams = Team.objects.with_eligibility().select_related('owner').order_by('name')
+    
+    # Highest bid per team on the current player, from a single query
+    last_bids = {}
+    for bid in current_bids_qs:
+        last_bids.setdefault(bid.team_id, bid)
+    
+    next_bid_increment = 50 if (current_player and current_player.current_bid < 700) else 100
+    next_bid_val = current_player.current_bid + next_bid_increment if current_player else 0
 
-    for team in teams:
-        last_bid = current_bids_qs.filter(team=team).first() if current_player else None
-        next_bid_increment = 50 if (current_player and current_player.current_bid < 700) else 100
-        next_bid_val = current_player.current_bid + next_bid_increment if current_player else 0
-        
-        # Calculate effective slots considering iconic players
-        iconic_count = team.players.filter(user__player_type='faculty').count()
-        effective_max = team.max_players - iconic_count
-        regular_count = team.players.exclude(user__player_type='faculty').count()
-        slots_left = effective_max - regular_count
+    # Teams with an owner connected right now (one cache lookup)
+    teams = list(teams)
+    online_teams = presence.teams_online([team.id for team in teams])
 
+    for team in teams:
         stats = {
             'team': team,
             'purse_remaining': team.purse_remaining,
             'purse_percentage': (team.purse_remaining / team.total_purse * 100) if team.total_purse else 0,
-            'players_count': regular_count,
-            'iconic_count': iconic_count,
-            'slots_remaining': slots_left,
-            'can_bid': current_player and slots_left > 0 and team.purse_remaining >= next_bid_val,
-            'last_bid': last_bid,
+            'players_count': team.regular_count,
+            'iconic_count': team.iconic_count,
+            'slots_remaining': team.slots_left,
+            'can_bid': current_player and team.slots_left > 0 and team.purse_remaining >= next_bid_val,
+            'last_bid': last_bids.get(team.id),
+            'online': team.id in online_teams,
         }
         team_stats.append(stats)
         
@@ -804,20 +840,27 @@ def auctioneer_dashboard(request):
         'current_bids': current_bids,
         'paddle_raises': paddle_raises,
         'team_stats': team_stats,
+        'online_teams_count': len(online_teams),
         'available_players': available_players,
         'recent_sales': recent_sales,
-        'total_teams': teams.count(),
+        'total_teams': len(team_stats),
         'search_query': search_query,
+        'live_sessions': live_sessions(),
     })
 
-@login_required
-@user_passes_test(is_auctioneer)
-def auctioneer_quick_bid(request):
+# The live auction endpoints below are native async views. They use an
+# async user test (ais_auctioneer also covers login_required) so the
+# request never leaves the event loop unless it has to touch the database.
+
+@user_passes_test(ais_auctioneer)
+async def auctioneer_quick_bid(request):
     """
     Quick bid entry via AJAX - for when team owner paddles
     
     This is now the ONLY way to place bids in the system.
-    Team owners cannot bid directly anymore.
+    Team owners cannot bid directly anymore. The auctioneer dashboard
+    normally sends the same command over its WebSocket (see
+    AuctionConsumer); this endpoint is the fallback.
     """
     if request.method != 'POST':
         return JsonResponse({'success': False, 'message': 'Invalid request method'})
@@ -830,162 +873,27 @@ def auctioneer_quick_bid(request):
         return JsonResponse({'success': False, 'message': 'Missing required fields'})
     
     try:
-        from django.db import transaction
-        
-        with transaction.atomic():
-            team = Team.objects.select_for_update().get(id=team_id)
-            player = Player.objects.select_for_update().get(id=player_id)
-            session = AuctionSession.objects.select_for_update().filter(status='live').first()
-            
-            if not session:
-                return JsonResponse({'success': False, 'message': 'No active auction session'})
-            
-            if not session.current_player or session.current_player_id != int(player_id):
-                return JsonResponse({'success': False, 'message': 'This player is not currently being auctioned'})
-            
-            amount = int(amount)
-            
-            # Validation
-            if not team.can_buy_player():
-                return JsonResponse({
-                    'success': False, 
-                    'message': f'{team.name} has reached maximum player limit'
-                })
-            
-            if team.purse_remaining < amount:
-                return JsonResponse({
-                    'success': False, 
-                    'message': f'{team.name} has insufficient purse (₹{team.purse_remaining} remaining)'
-                })
-            
-            # Check bid increment
-            if player.current_bid == 0:
-                if amount != player.base_price:
-                    return JsonResponse({
-                        'success': False, 
-                        'message': f'First bid must be base price: ₹{player.base_price}'
-                    })
-            else:
-                increment = 50 if player.current_bid < 700 else 100
-                expected_bid = player.current_bid + increment
-                
-                if amount != expected_bid:
-                    return JsonResponse({
-                        'success': False, 
-                        'message': f'Next bid must be: ₹{expected_bid}'
-                    })
-            
-            # Create bid
-            bid = Bid.objects.create(
-                auction_session=session,
-                player=player,
-                team=team,
-                amount=amount
-            )
-            
-            # Update player and session
-            player.current_bid = amount
-            player.save()
-            
-            session.last_bid_team = team
-            session.bid_call_count = 0  # Reset going count
-            session.save()
-            
-            # Calculate next bid
-            next_increment = 50 if amount < 700 else 100
-            next_bid = amount + next_increment
-            
-            # Check which teams can still bid
-            can_bid_teams = []
-            for t in Team.objects.all():
-                if t.can_buy_player() and t.purse_remaining >= next_bid:
-                    can_bid_teams.append(t.id)
-            
-            bid_data = {
-                'success': True,
-                'bid_id': bid.id,
-                'team_name': team.name,
-                'team_id': team.id,
-                'player_id': player.id,
-                'player_name': player.user.get_full_name(),
-                'amount': amount,
-                'next_bid': next_bid,
-                'purse_remaining': team.purse_remaining,
-                'team_slots_remaining': team.slots_remaining(),
-                'can_bid_teams': can_bid_teams,
-                'timestamp': bid.timestamp.isoformat(),
-            }
-            
-            # IMPORTANT: Broadcast to all WebSocket clients
-            broadcast_bid_update(bid_data)
-            
-            return JsonResponse(bid_data)
-            
-    except Team.DoesNotExist:
-        return JsonResponse({'success': False, 'message': 'Team not found'})
-    except Player.DoesNotExist:
-        return JsonResponse({'success': False, 'message': 'Player not found'})
-    except ValueError:
-        return JsonResponse({'success': False, 'message': 'Invalid bid amount'})
+        return JsonResponse(await live.place_bid(request.POST.get('session_id'), team_id, player_id, amount))
     except Exception as e:
         return JsonResponse({'success': False, 'message': f'Error: {str(e)}'})
 
 
-@login_required
-@user_passes_test(is_auctioneer)
-def auctioneer_start_player(request):
+@user_passes_test(ais_auctioneer)
+async def auctioneer_start_player(request):
     """Start bidding for a player - broadcasts to all clients"""
     if request.method != 'POST':
         return JsonResponse({'success': False, 'message': 'Invalid request'})
     
-    player_id = request.POST.get('player_id')
-    
     try:
-        from django.db import transaction
-        
-        with transaction.atomic():
-            session = AuctionSession.objects.select_for_update().filter(status='live').first()
-            if not session:
-                return JsonResponse({'success': False, 'message': 'No active session'})
-            
-            player = Player.objects.select_for_update().get(id=player_id, status='approved')
-            
-            # Reset player
-            player.current_bid = 0
-            player.save()
-            
-            session.current_player = player
-            session.last_bid_team = None
-            session.bid_call_count = 0
-            session.save()
-            
-            player_data = {
-                'success': True,
-                'player': {
-                    'id': player.id,
-                    'name': player.user.get_full_name(),
-                    'category': player.get_category_display(),
-                    'base_price': player.base_price,
-                    'current_bid': 0,
-                    'next_bid': player.base_price,
-                    'photo': player.user.profile_picture.url if player.user.profile_picture else None,
-                }
-            }
-            
-            # Broadcast to all WebSocket clients
-            broadcast_player_update(player_data)
-            
-            return JsonResponse(player_data)
-            
-    except Player.DoesNotExist:
-        return JsonResponse({'success': False, 'message': 'Player not found'})
+        return JsonResponse(await live.start_player(
+            request.POST.get('session_id'), request.POST.get('player_id')
+        ))
     except Exception as e:
         return JsonResponse({'success': False, 'message': str(e)})
 
 
-@login_required
-@user_passes_test(is_auctioneer)
-def auctioneer_complete_sale(request):
+@user_passes_test(ais_auctioneer)
+async def auctioneer_complete_sale(request):
     """
     Mark player as sold/unsold - broadcasts to all clients
     
@@ -993,165 +901,25 @@ def auctioneer_complete_sale(request):
     if request.method != 'POST':
         return JsonResponse({'success': False, 'message': 'Invalid request'})
     
-    player_id = request.POST.get('player_id')
-    
     try:
-        from django.db import transaction
-        from .models import AuctionLog
-        
-        with transaction.atomic():
-            session = AuctionSession.objects.select_for_update().filter(status='live').first()
-            if not session:
-                return JsonResponse({'success': False, 'message': 'No active session'})
-            if not session.current_player:
-                return JsonResponse({
-                    'success': False,
-                    'message': 'No player currently being auctioned. Please select a player first.'
-                })
-            player = Player.objects.select_for_update().get(id=player_id)
-            
-            # CRITICAL FIX: Check if player is already sold/unsold
-            if player.status in ['sold', 'unsold']:
-                return JsonResponse({
-                    'success': False, 
-                    'message': f'Player already {player.status}! Cannot process again.',
-                    'already_processed': True
-                })
-            
-            # ADDITIONAL CHECK: Verify this is the current player
-            if not session.current_player or session.current_player.id != player.id:
-                return JsonResponse({
-                    'success': False,
-                    'message': 'This player is not currently being auctioned'
-                })
-            
-            winning_bid = Bid.objects.filter(
-                player=player,
-                auction_session=session
-            ).order_by('-amount').first()
-            
-            if winning_bid:
-                # Player SOLD
-                team = Team.objects.select_for_update().get(id=winning_bid.team_id)
-                
-                # Check team can still buy
-                if not team.can_buy_player():
-                    return JsonResponse({
-                        'success': False,
-                        'message': f'{team.name} has reached maximum player limit'
-                    })
-                
-                # Check team still has enough purse
-                if team.purse_remaining < winning_bid.amount:
-                    return JsonResponse({
-                        'success': False,
-                        'message': f'{team.name} no longer has enough purse (someone else may have bought players)'
-                    })
-                
-                # Mark player as SOLD
-                player.status = 'sold'
-                player.team = team
-                player.save()
-                
-                # Deduct from team purse
-                team.purse_remaining -= winning_bid.amount
-                team.save()
-                
-                # Create auction log
-                AuctionLog.objects.create(
-                    auction_session=session,
-                    player=player,
-                    winning_team=team,
-                    final_amount=winning_bid.amount,
-                    sold=True
-                )
-                
-                # Clear current player from session
-                session.current_player = None
-                session.last_bid_team = None
-                session.bid_call_count = 0
-                session.save()
-                
-                result_data = {
-                    'success': True,
-                    'sold': True,
-                    'team_name': team.name,
-                    'team_id': team.id,
-                    'amount': winning_bid.amount,
-                    'player_name': player.user.get_full_name(),
-                    'player_id': player.id,
-                    'team_purse_remaining': team.purse_remaining,
-                }
-                
-                # Broadcast to all WebSocket clients
-                broadcast_bidding_end(result_data)
-                
-                return JsonResponse(result_data)
-            else:
-                # Player UNSOLD
-                player.status = 'unsold'
-                player.save()
-                
-                # Create auction log
-                AuctionLog.objects.create(
-                    auction_session=session,
-                    player=player,
-                    final_amount=player.base_price,
-                    sold=False
-                )
-                
-                # Clear current player from session
-                session.current_player = None
-                session.last_bid_team = None
-                session.bid_call_count = 0
-                session.save()
-                
-                result_data = {
-                    'success': True,
-                    'sold': False,
-                    'player_name': player.user.get_full_name(),
-                    'player_id': player.id,
-                }
-                
-                # Broadcast to all WebSocket clients
-                broadcast_bidding_end(result_data)
-                
-                return JsonResponse(result_data)
-                
-    except Player.DoesNotExist:
-        return JsonResponse({'success': False, 'message': 'Player not found'})
-    except Team.DoesNotExist:
-        return JsonResponse({'success': False, 'message': 'Team not found'})
+        return JsonResponse(await live.complete_sale(
+            request.POST.get('session_id'), request.POST.get('player_id')
+        ))
     except Exception as e:
         import traceback
         print(f"Error in complete_sale: {str(e)}")
         print(traceback.format_exc())
         return JsonResponse({'success': False, 'message': f'Error: {str(e)}'})
 
-@login_required
-@user_passes_test(is_auctioneer)
-def auctioneer_call_going(request):
+
+@user_passes_test(ais_auctioneer)
+async def auctioneer_call_going(request):
     """Increment 'Going once, twice, sold' counter"""
     if request.method != 'POST':
         return JsonResponse({'success': False, 'message': 'Invalid request'})
     
     try:
-        session = AuctionSession.objects.filter(status='live').first()
-        if not session:
-            return JsonResponse({'success': False, 'message': 'No active session'})
-        
-        session.bid_call_count += 1
-        session.save()
-        
-        call_text = ['Going once...', 'Going twice...', 'SOLD!'][min(session.bid_call_count - 1, 2)]
-        
-        return JsonResponse({
-            'success': True,
-            'call_count': session.bid_call_count,
-            'call_text': call_text,
-            'should_complete': session.bid_call_count >= 3
-        })
-        
+        return JsonResponse(await live.call_going(request.POST.get('session_id')))
     except Exception as e:
         return JsonResponse({'success': False, 'message': str(e)})
 
@@ -1645,6 +1413,8 @@ def admin_edit_team(request, team_id):
             team.logo = request.FILES.get('logo')
         
         team.save()
+        journal.record_team('team_updated', team.id)
+        invalidate_engines()
         messages.success(request, f'Team "{team.name}" updated successfully!')
         return redirect('admin_team_detail', team_id=team.id)
     
@@ -1673,6 +1443,8 @@ def admin_delete_team(request, team_id):
         
         # Delete team
         team.delete()
+        journal.record_team('team_updated', team_id)
+        invalidate_engines()
         
         messages.success(request, f'Team "{team_name}" deleted successfully! All players have been reset.')
         return redirect('admin_team_overview')
@@ -1710,6 +1482,8 @@ def admin_reset_team(request, team_id):
             # Reset purse
             team.purse_remaining = team.total_purse
             team.save()
+            journal.record_team('team_reset', team.id)
+        invalidate_engines()
         
         messages.success(request, f'Team "{team.name}" reset! {player_count} players released (set to approved/unsold) and purse restored to ₹{team.total_purse}.')
         return redirect('admin_team_detail', team_id=team.id)
@@ -1736,6 +1510,8 @@ def admin_remove_player_from_team(request, team_id, player_id):
         player.status = 'approved'
         player.current_bid = 0
         player.save()
+        journal.record_team('team_updated', team.id)
+        invalidate_engines()
         
         messages.success(request, f'Player "{player_name}" removed from "{team.name}". ₹{refund_amount} refunded to team purse.')
         return redirect('admin_team_detail', team_id=team.id)
@@ -1838,6 +1614,8 @@ def assign_iconic_player(request):
             player.status = 'sold'
             player.current_bid = 0  # Iconic players are free
             player.save()
+            journal.record_team('iconic_assigned', team.id)
+            transaction.on_commit(invalidate_engines)
             
             # Create audit log (not in auction context, but track the assignment)
             active_session = AuctionSession.objects.filter(status='live').first()
@@ -1886,6 +1664,7 @@ def remove_iconic_player(request):
                 })
             
             team_name = player.team.name if player.team else 'N/A'
+            team_id = player.team_id
             player_name = player.user.get_full_name()
             
             # Remove from team
@@ -1893,6 +1672,9 @@ def remove_iconic_player(request):
             player.status = 'approved'
             player.current_bid = 0
             player.save()
+            if team_id:
+                journal.record_team('team_updated', team_id)
+            transaction.on_commit(invalidate_engines)
             
             return JsonResponse({
                 'success': True,
@@ -2287,6 +2069,53 @@ def export_sold_unsold_report(request):
     return response
 
 
+async def live_stream(request):
+    """
+    Read-only Server-Sent Events stream of a live session's public feed
+
+    For spectators: no WebSocket, no login. ?session=<id> (default: the
+    oldest live session). Resumes from Last-Event-ID.
+    """
+    session_id = await sync_to_async(resolve_session_id)(request.GET.get('session'))
+    if session_id is None:
+        raise Http404('No live auction session')
+
+    response = StreamingHttpResponse(
+        stream.events(session_id, request.headers.get('Last-Event-ID')),
+        content_type='text/event-stream',
+    )
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
+
+@login_required
+def auction_state_api(request):
+    """
+    Resync endpoint for live auction pages
+
+    ?session=<id>&since=<seq>&epoch=<epoch> returns the broadcasts of the
+    session's room missed after `seq` when they are still buffered,
+    otherwise a full snapshot of the session's live state. The response
+    `seq` is the position the client is now at.
+    """
+    since = request.GET.get('since', '')
+    epoch = request.GET.get('epoch') or None
+    session_id = resolve_session_id(request.GET.get('session'))
+
+    # The same audience view the user's socket gets (auction.utils)
+    user = request.user
+    staff = user.user_type in ('admin', 'auctioneer')
+    team_id = None
+    if user.user_type == 'team_owner':
+        team_id = Team.objects.filter(owner_id=user.id).values_list('id', flat=True).first()
+
+    catch_up = live.resume(
+        session_id, int(since) if since.isdigit() else None, epoch, staff, team_id
+    )
+    return JsonResponse({'success': True, **catch_up})
+
+
 @login_required
 @user_passes_test(lambda u: u.user_type in ['admin', 'auctioneer'])
 def quick_stats_api(request):
@@ -2317,6 +2146,35 @@ def quick_stats_api(request):
     
     return JsonResponse(stats)
 
+@login_required
+@user_passes_test(lambda u: u.user_type in ['admin', 'auctioneer'])
+async def auction_connections_api(request):
+    """
+    This worker's auction sockets and their send queues, most lagging first
+    """
+    sockets = [queue.stats() for queue in list(sendqueue.connections)]
+    sockets.sort(key=lambda s: (s['depth'], s['dropped']), reverse=True)
+
+    return JsonResponse({
+        'success': True,
+        'connections': len(sockets),
+        'lagging': sum(1 for s in sockets if s['depth'] or s['snapshot_mode']),
+        'dropped': sum(s['dropped'] for s in sockets),
+        'superseded': sum(s['superseded'] for s in sockets),
+        'resyncs': sum(s['resyncs'] for s in sockets),
+        'handshakes': admission.limiter.stats(),
+        'draining': drain.draining,
+        'sockets': sockets[:100],
+    })
+
+@login_required
+@user_passes_test(lambda u: u.user_type in ['admin', 'auctioneer'])
+def auction_presence_api(request):
+    """
+    Who is connected to the live auction: teams online and sockets per role
+    """
+    return JsonResponse({'success': True, **presence.counts()})
+
 def robots_txt(request):
     """Serve robots.txt for search engines"""
     lines = [
@@ -0,0 +1,82 @@
+"""
+Compact binary frames for live auction sockets
+
+Clients that offer the `sepl.msgpack.v1` WebSocket subprotocol get
+broadcasts as MessagePack arrays with a fixed field order per message
+type instead of JSON objects, so keys like `team_slots_remaining` are
+never sent:
+
+    [type_code, seq, epoch, [value, ...], {extra: value}?]
+
+`type_code` indexes SCHEMAS, values follow the schema's field order
+(None for a missing field) and keys outside the schema travel in the
+optional trailing map. Message types without a schema are sent as a
+plain MessagePack map. Everything else on the socket (acks, errors)
+stays JSON text, which the client tells apart by frame type.
+
+The browser gets the same table from `client_schemas()`, rendered into
+the page, so the field order is defined once, here.
+"""
+
+import msgpack
+
+SUBPROTOCOL = 'sepl.msgpack.v1'
+
+SCHEMAS = {
+    'bid_update': (
+        'success', 'team_name', 'team_id', 'player_id', 'player_name',
+        'amount', 'next_bid', 'purse_remaining', 'team_slots_remaining',
+        'timestamp', 'can_bid_teams', 'server_time', 'next_call_at',
+    ),
+    'going_update': (
+        'success', 'player_id', 'call_count', 'call_text', 'should_complete',
+        'server_time', 'next_call_at',
+    ),
+    'bidding_end': (
+        'success', 'sold', 'team_name', 'team_id', 'amount', 'player_name',
+        'player_id', 'player_category', 'team_purse_remaining',
+        'team_players_count', 'team_slots_remaining',
+    ),
+    'player_update': (
+        'success', 'player', 'server_time', 'next_call_at',
+    ),
+}
+
+TYPES = tuple(SCHEMAS)
+
+
+def encode(message):
+    """Binary frame for a stamped {'type', 'seq', 'epoch', 'data'} message"""
+    fields = SCHEMAS.get(message['type'])
+    if fields is None:
+        return msgpack.packb(message)
+
+    data = message['data']
+    frame = [
+        TYPES.index(message['type']),
+        message['seq'],
+        message['epoch'],
+        [data.get(field) for field in fields],
+    ]
+    extras = {key: value for key, value in data.items() if key not in fields}
+    if extras:
+        frame.append(extras)
+    return msgpack.packb(frame)
+
+
+def decode(frame):
+    """Inverse of encode() (the browser has its own copy)"""
+    frame = msgpack.unpackb(frame)
+    if not isinstance(frame, list):
+        return frame
+
+    code, seq, epoch, values = frame[:4]
+    data = dict(frame[4]) if len(frame) > 4 else {}
+    for field, value in zip(SCHEMAS[TYPES[code]], values):
+        if value is not None:
+            data[field] = value
+    return {'type': TYPES[code], 'seq': seq, 'epoch': epoch, 'data': data}
+
+
+def client_schemas():
+    return [{'type': event_type, 'fields': list(SCHEMAS[event_type])} for event_type in TYPES]
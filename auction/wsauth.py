@@ -0,0 +1,131 @@
+"""
+Cached session/user resolution for auction WebSockets
+
+channels' AuthMiddlewareStack loads the session and then the user row on
+every connect, which after a restart means every owner and spectator
+reconnecting at once hits the database. CachedAuthMiddlewareStack
+resolves the session cookie through the shared cache instead:
+
+    auction:wsauth:session:<session_key>   {'user': User, 'team_id': id}
+    auction:wsauth:user:<user_id>          [session_key, ...]
+
+so a connect is one cache get. A miss resolves the way channels does
+(session, auth hash, active user), adds the owner's team id for
+AuctionConsumer and stores the entry for AUCTION_WS_AUTH_TTL seconds.
+A hit skips channels' auth hash check, so entries must be dropped
+whenever that check would fail:
+
+- on any logout, the session's (user_logged_out);
+- when an account is suspended, restored, deleted or has its password
+  or user type changed, every session of the user, through the per-user
+  index: from User.save(), from bulk updates of those columns
+  (auction.models.UserQuerySet) and on any deletion (post_delete).
+
+The receivers are connected by AuctionConfig.ready().
+
+Usage:
+    from auction import wsauth
+
+    wsauth.invalidate_session(request.session.session_key)
+    wsauth.invalidate_user(user.id)
+"""
+
+from channels.auth import get_user
+from channels.db import database_sync_to_async
+from channels.middleware import BaseMiddleware
+from channels.sessions import CookieMiddleware, SessionMiddleware
+from django.conf import settings
+from django.contrib.auth import SESSION_KEY, get_user_model
+from django.contrib.auth.models import AnonymousUser
+from django.contrib.auth.signals import user_logged_out
+from django.core.cache import cache
+from django.db.models.signals import post_delete
+
+
+def ttl():
+    return getattr(settings, 'AUCTION_WS_AUTH_TTL', 300)
+
+
+def session_key_for(session_key):
+    return f'auction:wsauth:session:{session_key}'
+
+
+def user_key(user_id):
+    return f'auction:wsauth:user:{user_id}'
+
+
+async def resolve(scope):
+    """(user, team_id) for the connecting socket"""
+    session_key = scope.get('cookies', {}).get(settings.SESSION_COOKIE_NAME)
+    if not session_key:
+        return AnonymousUser(), None
+
+    entry = await cache.aget(session_key_for(session_key))
+    if entry is None:
+        user = await get_user(scope)
+        entry = {'user': user, 'team_id': await _team_id(user)}
+        await cache.aset(session_key_for(session_key), entry, ttl())
+        await database_sync_to_async(_index)(scope['session'], session_key)
+    return entry['user'], entry['team_id']
+
+
+@database_sync_to_async
+def _team_id(user):
+    from .models import Team
+
+    if not user.is_authenticated or user.user_type != 'team_owner':
+        return None
+    return Team.objects.filter(owner_id=user.id).values_list('id', flat=True).first()
+
+
+def _index(session, session_key):
+    # By the session's user even when it resolved anonymous (a suspended
+    # user), so restoring the user drops the entry too. Read-modify-write;
+    # a key lost to a race expires with its entry
+    user_id = session.get(SESSION_KEY)
+    if user_id is None:
+        return
+    session_keys = cache.get(user_key(user_id)) or []
+    if session_key not in session_keys:
+        cache.set(user_key(user_id), session_keys + [session_key], ttl())
+
+
+def invalidate_session(session_key):
+    if session_key:
+        cache.delete(session_key_for(session_key))
+
+
+def invalidate_user(user_id):
+    """Drop every cached session of a user (suspended, restored, re-typed, new password, deleted)"""
+    session_keys = cache.get(user_key(user_id)) or []
+    cache.delete_many([session_key_for(key) for key in session_keys] + [user_key(user_id)])
+
+
+def _on_logged_out(sender, request, user, **kwargs):
+    invalidate_session(request.session.session_key)
+
+
+def _on_user_deleted(sender, instance, **kwargs):
+    invalidate_user(instance.pk)
+
+
+def connect_signals():
+    user_logged_out.connect(_on_logged_out, dispatch_uid='auction.wsauth.logged_out')
+    post_delete.connect(
+        _on_user_deleted, sender=get_user_model(), dispatch_uid='auction.wsauth.user_deleted'
+    )
+
+
+class CachedAuthMiddleware(BaseMiddleware):
+    """Puts 'user' (and the owner's 'team_id') into the scope from the cache"""
+
+    async def __call__(self, scope, receive, send):
+        scope = dict(scope)
+        scope['user'], scope['team_id'] = await resolve(scope)
+        return await super().__call__(scope, receive, send)
+
+
+def CachedAuthMiddlewareStack(inner):
+    # Same layering as channels.auth.AuthMiddlewareStack; the session is
+    # only loaded on a cache miss
+    return CookieMiddleware(SessionMiddleware(CachedAuthMiddleware(inner)))
@@ -2,7 +2,6 @@
 import os
 from django.core.asgi import get_asgi_application
 from channels.routing import ProtocolTypeRouter, URLRouter
-from channels.auth import AuthMiddlewareStack
 from channels.security.websocket import AllowedHostsOriginValidator
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'sepl_project.settings')
@@ -10,13 +9,18 @@ os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'sepl_project.settings')
 django_asgi_app = get_asgi_application()
 
 from auction import routing
+from auction.admission import AdmissionMiddleware
+from auction.wsauth import CachedAuthMiddlewareStack
 
 application = ProtocolTypeRouter({
     "http": django_asgi_app,
     "websocket": AllowedHostsOriginValidator(
-        AuthMiddlewareStack(
-            URLRouter(
-                routing.websocket_urlpatterns
+        # Excess connects are shed before the session or user is loaded
+        AdmissionMiddleware(
+            CachedAuthMiddlewareStack(
+                URLRouter(
+                    routing.websocket_urlpatterns
+                )
             )
         )
     ),
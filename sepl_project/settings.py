@@ -106,10 +106,34 @@ DATABASES = {
 # ========================================
 REDIS_URL = os.environ.get('REDIS_URL', 'redis://localhost:6379')
 
+# Channel layer Redis instances (comma separated); channels and groups are
+# spread over them by consistent hashing
+REDIS_CHANNEL_URLS = os.environ.get('REDIS_CHANNEL_URLS', REDIS_URL).split(',')
+
+# 'lists' (channels_redis default: a Redis list push per socket per
+# broadcast) or 'pubsub' (one PUBLISH per broadcast, fanned out in each
+# worker; see auction.layers)
+CHANNEL_LAYER_MODE = os.environ.get('CHANNEL_LAYER_MODE', 'lists')
+
+CHANNEL_LAYER_BACKENDS = {
+    'lists': 'channels_redis.core.RedisChannelLayer',
+    'pubsub': 'auction.layers.AuctionPubSubChannelLayer',
+}
+
 CHANNEL_LAYERS = {
     'default': {
-        'BACKEND': 'channels_redis.core.RedisChannelLayer',
-        'CONFIG': {"hosts": [REDIS_URL]},
+        'BACKEND': CHANNEL_LAYER_BACKENDS[CHANNEL_LAYER_MODE],
+        'CONFIG': {"hosts": REDIS_CHANNEL_URLS},
+    },
+}
+
+# Shared by every worker: sessions (cached_db), WebSocket auth
+# (auction.wsauth) and presence (auction.presence)
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': REDIS_URL,
+        'KEY_PREFIX': 'sepl',
     },
 }
 
@@ -279,3 +303,63 @@ CRISPY_ALLOWED_TEMPLATE_PACKS = "bootstrap5"
 CRISPY_TEMPLATE_PACK = "bootstrap5"
 SESSION_ENGINE = 'django.contrib.sessions.backends.cached_db'
 CACHE_TIMEOUT = 300  # 5 minutes
+
+# Live auction: how long the background writer collects bids before
+# writing them as one batch (the sale always flushes first)
+AUCTION_WRITE_BEHIND_MS = int(os.environ.get('AUCTION_WRITE_BEHIND_MS', 5))
+
+# Live auction: seconds between the server's going-once/twice/SOLD calls
+# after the last bid (0 turns the clock off), and whether the sale is
+# completed automatically at SOLD
+AUCTION_GOING_INTERVAL = float(os.environ.get('AUCTION_GOING_INTERVAL', 5))
+AUCTION_GOING_AUTO_COMPLETE = os.environ.get('AUCTION_GOING_AUTO_COMPLETE', 'False') == 'True'
+
+# Live auction: broadcasts kept in memory for clients catching up on a gap
+AUCTION_FEED_BUFFER = int(os.environ.get('AUCTION_FEED_BUFFER', 256))
+
+# Live auction: spectators get at most one bid update per lot in this
+# window (latest wins); owners and staff get every bid immediately
+AUCTION_SPECTATOR_COALESCE_MS = int(os.environ.get('AUCTION_SPECTATOR_COALESCE_MS', 100))
+
+# Live auction: broadcasts a socket may have queued before it is dropped
+# to snapshot mode (stale bid updates are superseded, not queued)
+AUCTION_SEND_QUEUE_LIMIT = int(os.environ.get('AUCTION_SEND_QUEUE_LIMIT', 64))
+
+# Live auction: seconds between presence publishes to the cache; entries
+# expire after three intervals without one
+AUCTION_PRESENCE_INTERVAL = int(os.environ.get('AUCTION_PRESENCE_INTERVAL', 10))
+
+# Live auction: minimum milliseconds between two paddle raises by a team
+# on the same lot
+AUCTION_PADDLE_INTERVAL_MS = int(os.environ.get('AUCTION_PADDLE_INTERVAL_MS', 1000))
+
+# Live auction: seconds between outbox polls for broadcasts committed by
+# other processes or left unsent
+AUCTION_OUTBOX_POLL = int(os.environ.get('AUCTION_OUTBOX_POLL', 1))
+
+# Live auction: seconds a WebSocket connect's resolved session/user stays
+# cached (dropped early on logout, suspension and user type changes)
+AUCTION_WS_AUTH_TTL = int(os.environ.get('AUCTION_WS_AUTH_TTL', 300))
+
+# Live auction: WebSocket connects a worker handles at once; the rest are
+# closed with 1013 and a retry_after of base + random jitter
+AUCTION_MAX_HANDSHAKES = int(os.environ.get('AUCTION_MAX_HANDSHAKES', 100))
+
+# Live auction: client reconnect backoff in milliseconds (doubles from the
+# base up to the max, plus up to the jitter)
+AUCTION_RECONNECT_BASE_MS = int(os.environ.get('AUCTION_RECONNECT_BASE_MS', 1000))
+AUCTION_RECONNECT_JITTER_MS = int(os.environ.get('AUCTION_RECONNECT_JITTER_MS', 4000))
+AUCTION_RECONNECT_MAX_MS = int(os.environ.get('AUCTION_RECONNECT_MAX_MS', 30000))
+
+# Live auction: on SIGTERM a worker closes its sockets in this many
+# batches spread over this many seconds, then exits
+AUCTION_DRAIN_WINDOW = int(os.environ.get('AUCTION_DRAIN_WINDOW', 10))
+AUCTION_DRAIN_BATCHES = int(os.environ.get('AUCTION_DRAIN_BATCHES', 10))
+
+# Live auction: seconds a worker trusts its list of live sessions before
+# checking the shared cache for sessions started or ended elsewhere
+AUCTION_LIVE_SESSIONS_RECHECK = int(os.environ.get('AUCTION_LIVE_SESSIONS_RECHECK', 1))
+
+# Live auction: seconds a draining worker waits for the bids it accepted
+# to be written before it exits
+AUCTION_DRAIN_FLUSH_TIMEOUT = int(os.environ.get('AUCTION_DRAIN_FLUSH_TIMEOUT', 10))